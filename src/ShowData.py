@@ -1,77 +1,23 @@
 import streamlit as st
 import pandas as pd
 import os
-import sqlite3
+import tempfile
 from datetime import date, timedelta
-from datawebtaa import SwimDataScraper
-from datawebtaa_ajax import SwimDataAjaxScraper
 import database as db
+import entries
+import events
+import export
+import scrapers
+import parquet_store
+import analytics
+import planner
+import progression
+import standards
+import teams
+from swimutils import parse_thai_date, format_date_to_thai_buddhist
 
 st.set_page_config(page_title="TAA Ranking Analytics", layout="wide")
 
-def parse_age_range(age_str):
-    if not isinstance(age_str, str):
-        return None, None
-    if '-' in age_str:
-        try:
-            parts = age_str.split('-')
-            return int(parts[0]), int(parts[1])
-        except (ValueError, IndexError):
-            return None, None
-    else:
-        try:
-            age = int(age_str)
-            return age, age
-        except ValueError:
-            return None, None
-
-THAI_MONTH_MAP = {
-    'ม.ค.': 'Jan', 'ก.พ.': 'Feb', 'มี.ค.': 'Mar', 'เม.ย.': 'Apr', 'พ.ค.': 'May',
-    'มิ.ย.': 'Jun', 'ก.ค.': 'Jul', 'ส.ค.': 'Aug', 'ก.ย.': 'Sep', 'ต.ค.': 'Oct',
-    'พ.ย.': 'Nov', 'ธ.ค.': 'Dec'
-}
-
-def parse_thai_date(date_str):
-    if not isinstance(date_str, str):
-        return pd.NaT
-    try:
-        day, thai_month_abbr, buddhist_year_str = date_str.split('/')
-        buddhist_year = int(buddhist_year_str)
-        english_month_abbr = THAI_MONTH_MAP.get(thai_month_abbr.strip())
-        if english_month_abbr:
-            gregorian_year = buddhist_year - 543
-            standard_date_str = f"{day}-{english_month_abbr}-{gregorian_year}"
-            return pd.to_datetime(standard_date_str, format='%d-%b-%Y', errors='coerce')
-    except (ValueError, KeyError, IndexError):
-        pass
-    return pd.NaT
-
-def format_date_to_thai_buddhist(date_obj):
-    if not isinstance(date_obj, date):
-        return None
-    buddhist_year = date_obj.year + 543
-    thai_month_abbr_reverse_map = {v: k for k, v in THAI_MONTH_MAP.items()}
-    english_month_abbr = date_obj.strftime('%b')
-    thai_month = thai_month_abbr_reverse_map.get(english_month_abbr)
-    if thai_month:
-        return f"{date_obj.day}/{thai_month}/{buddhist_year}"
-    return None
-
-def time_string_to_seconds(time_str):
-    """Converts a time string (MM:SS.ss) to total seconds for sorting."""
-    if isinstance(time_str, str):
-        try:
-            parts = time_str.split(':')
-            minutes = int(parts[0])
-            seconds_parts = parts[1].split('.')
-            seconds = int(seconds_parts[0])
-            milliseconds = int(seconds_parts[1]) if len(seconds_parts) > 1 else 0
-            total_seconds = (minutes * 60) + seconds + (milliseconds / 100)
-            return total_seconds
-        except (ValueError, IndexError):
-            return float('inf') # Push invalid times to the end
-    return float('inf')
-
 def add_record_page():
     st.header("📝 Add a New Swim Record")
     # Initialize session state variables
@@ -141,13 +87,13 @@ def add_record_page():
 
     # --- 3. Event Details ---
     st.subheader("3. Enter Event Details")
-    stroke_options = [s['name'] for s in SwimDataScraper.STROKES.values()]
+    stroke_options = [s['name'] for s in events.STROKES.values()]
     freestyle_index = stroke_options.index("FreeStyle (ฟรีสไตล์)") if "FreeStyle (ฟรีสไตล์)" in stroke_options else 0
     c_age, c_stroke = st.columns(2)
     manual_age = c_age.text_input("Age (e.g., 9 or 10-11)*")
     manual_stroke = c_stroke.selectbox("Stroke*", stroke_options, index=freestyle_index)
     c_dist, c_min, c_sec = st.columns(3)
-    manual_distance = c_dist.selectbox("Distance*", [d['name'] for d in SwimDataScraper.DISTANCES.values()])
+    manual_distance = c_dist.selectbox("Distance*", [d['name'] for d in events.DISTANCES.values()])
     manual_min = c_min.number_input("Time (Min)", min_value=0, step=1, format="%d")
     manual_sec = c_sec.number_input("Time (Sec)", min_value=0.0, max_value=59.99, step=0.01, format="%.2f")
     manual_nationality = st.text_input("Nationality", value="THA")
@@ -166,6 +112,8 @@ def add_record_page():
                 "club": manual_club.strip(), "school": manual_school, "nationality": manual_nationality.strip()
             }
             if db.add_single_record(record_data):
+                parquet_store.refresh_snapshots()
+                standards.refresh_qualifications()
                 st.success(f"Record for {manual_name.strip()} added!")
                 for key in st.session_state:
                     if key.startswith('manual_'): st.session_state[key] = "" if 'search' in key else None
@@ -180,10 +128,10 @@ def scraping_and_management_page():
 
     with st.expander("Show Scraper Options", expanded=False):
         c1, c2, c3, c4 = st.columns(4)
-        stroke_k = c1.selectbox("Stroke", list(SwimDataScraper.STROKES.keys()), format_func=lambda x: SwimDataScraper.STROKES[x]['name'])
-        dist_k = c2.selectbox("Distance", list(SwimDataScraper.DISTANCES.keys()), format_func=lambda x: SwimDataScraper.DISTANCES[x]['name'])
-        gender_k = c3.selectbox("Gender", list(SwimDataScraper.GENDERS.keys()), format_func=lambda x: SwimDataScraper.GENDERS[x]['name'])
-        pool_k = c4.selectbox("Pool", list(SwimDataScraper.POOL_TYPES.keys()), format_func=lambda x: SwimDataScraper.POOL_TYPES[x]['name'])
+        stroke_k = c1.selectbox("Stroke", list(events.STROKES.keys()), format_func=lambda x: events.STROKES[x]['name'])
+        dist_k = c2.selectbox("Distance", list(events.DISTANCES.keys()), format_func=lambda x: events.DISTANCES[x]['name'])
+        gender_k = c3.selectbox("Gender", list(events.GENDERS.keys()), format_func=lambda x: events.GENDERS[x]['name'])
+        pool_k = c4.selectbox("Pool", list(events.POOL_TYPES.keys()), format_func=lambda x: events.POOL_TYPES[x]['name'])
         c5, c6, c7 = st.columns([1, 1, 2])
         min_age = c5.number_input("Min Age", 5, 90, 10)
         max_age = c6.number_input("Max Age", 5, 90, 11)
@@ -191,16 +139,21 @@ def scraping_and_management_page():
         st.caption(f"Search window: **{start_d.strftime('%d %b %Y')}** to **{end_d.strftime('%d %b %Y')}**")
 
     if st.button("🚀 Fetch Rankings"):
-        scraper = SwimDataScraper(headless=True) if scraper_choice == "Selenium" else SwimDataAjaxScraper()
+        # The chosen backend (and Selenium with it) is only imported here, not at app start
+        scraper = scrapers.make_scraper(scraper_choice, headless=True)
         try:
             with st.status("Initializing Scraper...", expanded=True) as status:
                 st.write(f"Applying filter: {start_d} to {end_d}")
-                df = scraper.scrape_rankings(
-                    SwimDataScraper.STROKES[stroke_k], SwimDataScraper.DISTANCES[dist_k],
-                    SwimDataScraper.GENDERS[gender_k], SwimDataScraper.POOL_TYPES[pool_k],
-                    str(min_age), str(max_age), start_d, end_d
-                )
+                job = {
+                    'stroke': events.STROKES[stroke_k], 'dist': events.DISTANCES[dist_k],
+                    'gender': events.GENDERS[gender_k], 'pool': events.POOL_TYPES[pool_k],
+                    'min_age': str(min_age), 'max_age': str(max_age), 'start_date': start_d, 'end_date': end_d,
+                }
+                # Stored coverage answers closed windows locally; only the missing part is fetched
+                results, fetched = planner.run([job], scraper, use_stored=True)
+                df = results[0]
                 st.session_state.scraped_data = df
+                st.session_state.scraped_fetches = fetched
                 if df is not None:
                     status.update(label=f"Fetched {len(df)} records!", state="complete", expanded=False)
                     st.success(f"Successfully retrieved {len(df)} swimmers." if not df.empty else "The search returned no results.")
@@ -217,7 +170,9 @@ def scraping_and_management_page():
             st.dataframe(df, width='stretch')
             if st.button("💾 Save Results to Database"):
                 with st.spinner("Saving..."):
-                    added_count = db.add_records(df)
+                    added_count = sum(planner.save(job, fetched_df) for job, fetched_df in st.session_state.get('scraped_fetches', []) if fetched_df is not None)
+                    parquet_store.refresh_snapshots()
+                    standards.refresh_qualifications()
                     st.success(f"Successfully saved {added_count} new records.")
         else:
             st.info("Last search returned no data.")
@@ -226,9 +181,11 @@ def scraping_and_management_page():
     st.header("✏️ Edit Records")
     st.info("Here you can directly edit saved records. UniqueID and Name cannot be edited.", icon="ℹ️")
     if 'record_editor_key' not in st.session_state: st.session_state.record_editor_key = 0
-    edited_records_df = st.data_editor(db.get_records(), width='stretch', num_rows="dynamic", key=f"record_editor_{st.session_state.record_editor_key}", disabled=['UniqueID', 'SwimmerUniqID', 'Name'])
+    edited_records_df = st.data_editor(db.get_records(compact=False), width='stretch', num_rows="dynamic", key=f"record_editor_{st.session_state.record_editor_key}", disabled=['UniqueID', 'SwimmerUniqID', 'Name'])
     if st.button("💾 Save Record Changes"):
-        with st.spinner("Saving..."): updated_count = db.sync_records(edited_records_df)
+        with st.spinner("Saving..."):
+            updated_count = db.sync_records(edited_records_df)
+            parquet_store.refresh_snapshots()
         st.success(f"{updated_count} records have been updated!")
         st.session_state.record_editor_key += 1
         st.rerun()
@@ -257,6 +214,7 @@ def scraping_and_management_page():
                 ids_to_delete = [display_to_id_map[display] for display in records_to_delete_display]
                 with st.spinner("Deleting records..."):
                     deleted_count = db.delete_records(ids_to_delete)
+                    parquet_store.refresh_snapshots()
                 st.success(f"Successfully deleted {deleted_count} record(s).")
                 st.rerun()
     else:
@@ -269,19 +227,38 @@ def scraping_and_management_page():
     if 'editor_key' not in st.session_state: st.session_state.editor_key = 0
     all_schools_for_editor = [""] + sorted(db.get_schools()['ThaiSchool'].tolist())
     edited_df = st.data_editor(
-        db.get_swimmers(), width='stretch', num_rows="dynamic", key=f"swimmer_editor_{st.session_state.editor_key}",
+        db.get_swimmers(compact=False), width='stretch', num_rows="dynamic", key=f"swimmer_editor_{st.session_state.editor_key}",
         column_config={
             "UniqID": st.column_config.TextColumn("Unique ID", disabled=True),
             "YearOfBirth": st.column_config.NumberColumn("Birth Year", format="%d", step=1),
             "Gender": st.column_config.SelectboxColumn("Gender", options=["Male (ชาย)", "Female (หญิง)"], required=True),
             "School": st.column_config.SelectboxColumn("School", options=all_schools_for_editor),
+            "BirthYearMin": st.column_config.NumberColumn("Born From (est.)", format="%d", disabled=True),
+            "BirthYearMax": st.column_config.NumberColumn("Born To (est.)", format="%d", disabled=True),
         }
     )
     if st.button("💾 Save Swimmer Changes"):
-        with st.spinner("Saving..."): db.sync_swimmers(edited_df)
+        with st.spinner("Saving..."):
+            db.sync_swimmers(edited_df)
+            parquet_store.refresh_snapshots()
         st.success("Swimmer profiles have been updated!")
         st.session_state.editor_key += 1
         st.rerun()
+
+    with st.expander("🔗 Possible Duplicate Swimmers", expanded=False):
+        duplicates_df = db.find_duplicate_swimmers()
+        if duplicates_df.empty:
+            st.info("No likely duplicates found.")
+        else:
+            st.dataframe(duplicates_df, width='stretch')
+            pair_labels = [f"{r.OtherName} ({r.OtherUniqID}) → {r.Name} ({r.UniqID})" for r in duplicates_df.itertuples()]
+            selected_pair = st.selectbox("Merge pair", range(len(pair_labels)), format_func=lambda i: pair_labels[i])
+            if st.button("Merge Selected Pair"):
+                pair = duplicates_df.iloc[selected_pair]
+                db.merge_swimmers(pair['OtherUniqID'], pair['UniqID'])
+                parquet_store.refresh_snapshots()
+                st.success("Swimmers merged.")
+                st.rerun()
     st.divider()
 
     st.header("🏫 School Management")
@@ -312,28 +289,25 @@ def dashboard_page():
         st.write(f"**DB Exists:** {'✅ Yes' if db_exists else '❌ No'}")
         if db_exists:
             try:
-                import sqlite3
-                conn = sqlite3.connect(db.DB_FILE)
-                c = conn.cursor()
-                c.execute("SELECT COUNT(*) FROM RecordTable")
-                count = c.fetchone()[0]
-                st.write(f"**Record Count:** `{count}`")
-                conn.close()
+                stats = db.get_stats()
+                st.write(f"**Record Count:** `{stats['RecordCount']}`")
+                st.write(f"**Swimmers:** `{stats['SwimmerCount']}` (`{stats['DistinctRecordSwimmers']}` with records)")
+                st.write(f"**Competitions:** `{stats['DistinctCompetitions']}`")
+                st.write(f"**Last Ingest:** `{stats['LastIngestAt'] or 'never'}`")
             except Exception as e:
                 st.error(f"Error checking record count: {e}")
 
     st.info("Explore and analyze your saved swimming records.")
-    records_df = db.get_records()
-    if records_df.empty:
+    engine = analytics.get_engine()
+    st.sidebar.caption(f"Query engine: `{engine.name}`")
+    if engine.is_empty():
         st.warning("No records found in the database. Scrape and save some data first!")
         return
 
     st.subheader("Filter Records")
-    records_df['CompetitionDate'] = records_df['CompetitionDate'].apply(parse_thai_date)
-    records_df[['_min_age_val', '_max_age_val']] = records_df['Age'].apply(lambda x: pd.Series(parse_age_range(x)))
-    records_df.dropna(subset=['_min_age_val', '_max_age_val'], inplace=True)
-    all_genders, all_strokes, all_distances = ["All"] + records_df['Gender'].dropna().unique().tolist(), ["All"] + records_df['Stroke'].dropna().unique().tolist(), ["All"] + records_df['Distance'].dropna().unique().tolist()
-    all_schools, all_clubs = records_df['School'].dropna().unique().tolist(), sorted(records_df['Club'].dropna().unique().tolist())
+    options = engine.filter_options()
+    all_genders, all_strokes, all_distances = ["All"] + options['genders'], ["All"] + options['strokes'], ["All"] + options['distances']
+    all_schools, all_clubs = options['schools'], options['clubs']
     
     c1, c2, c3, c4, c5 = st.columns(5)
     selected_gender = c1.selectbox("Gender", all_genders)
@@ -345,42 +319,51 @@ def dashboard_page():
     selected_schools = c6.multiselect("School", all_schools)
     selected_clubs = c7.multiselect("Club", all_clubs)
 
-    filtered_df = records_df.copy()
-    if selected_gender != "All": filtered_df = filtered_df[filtered_df['Gender'] == selected_gender]
-    if selected_stroke != "All": filtered_df = filtered_df[filtered_df['Stroke'] == selected_stroke]
-    if selected_distance != "All": filtered_df = filtered_df[filtered_df['Distance'] == selected_distance]
-    if selected_schools: filtered_df = filtered_df[filtered_df['School'].isin(selected_schools)]
-    if selected_clubs: filtered_df = filtered_df[filtered_df['Club'].isin(selected_clubs)]
-    filtered_df = filtered_df[filtered_df['_max_age_val'] >= selected_filter_min_age]
-    filtered_df = filtered_df[filtered_df['_min_age_val'] <= selected_filter_max_age]
+    filters = {
+        'gender': selected_gender, 'stroke': selected_stroke, 'distance': selected_distance,
+        'min_age': selected_filter_min_age, 'max_age': selected_filter_max_age,
+        'schools': selected_schools, 'clubs': selected_clubs,
+    }
+    summary = engine.summary(filters)
         
-    if filtered_df.empty:
+    if summary['records'] == 0:
         st.warning("No records match the selected filters.")
         return
 
     st.subheader("Summary Statistics")
     c1, c2, c3 = st.columns(3)
-    c1.metric("Total Records", len(filtered_df))
-    c2.metric("Unique Swimmers", filtered_df['Name'].nunique())
-    c3.metric("Unique Competitions", filtered_df['Competition'].nunique())
+    c1.metric("Total Records", summary['records'])
+    c2.metric("Unique Swimmers", summary['swimmers'])
+    c3.metric("Unique Competitions", summary['competitions'])
+
+    with st.expander("⬇️ Export Filtered Records", expanded=False):
+        formats = [fmt for fmt in export.FORMATS if export.is_available(fmt)]
+        c1, c2 = st.columns([0.3, 0.7])
+        export_format = c1.selectbox("Format", formats, format_func=str.upper)
+        if c2.button(f"Prepare {summary['records']} records"):
+            # Streamed from SQLite into a temporary file, never a full DataFrame
+            with st.spinner("Exporting..."), tempfile.TemporaryFile() as f:
+                rows = export.export_records(f, export_format, filters)
+                f.seek(0)
+                st.download_button(f"Download {rows} records", f, file_name=export.export_filename(filters, export_format),
+                                   mime=export.MIME_TYPES[export_format])
 
     st.subheader("Records by Stroke")
-    display_cols = ['Name', 'Distance', 'Time', 'CompetitionDate', 'Competition']
     # Ensure STROKES has an order or use sorted keys for consistent display
-    # Using sorted list of stroke names based on SwimDataScraper.STROKES
-    ordered_stroke_names = [s['name'] for s in SwimDataScraper.STROKES.values()]
+    # Using sorted list of stroke names based on events.STROKES
+    ordered_stroke_names = [s['name'] for s in events.STROKES.values()]
+    stroke_counts = engine.stroke_counts(filters)
 
     for stroke_name in ordered_stroke_names:
-        # Filter the main filtered_df for the current stroke
-        stroke_df = filtered_df[filtered_df['Stroke'] == stroke_name].copy()
+        stroke_count = stroke_counts.get(stroke_name, 0)
 
-        if not stroke_df.empty:
-            with st.expander(f"**{stroke_name} Records** ({len(stroke_df)} total)", expanded=False):
+        if stroke_count:
+            with st.expander(f"**{stroke_name} Records** ({stroke_count} total)", expanded=False):
                 # --- Filters for this specific stroke ---
                 col1, col2 = st.columns([0.7, 0.3])
                 
                 # Distance filter for this stroke
-                all_distances_for_stroke = ["All"] + sorted(stroke_df['Distance'].unique().tolist())
+                all_distances_for_stroke = ["All"] + engine.distances(filters, stroke_name)
                 selected_distance_for_stroke = col1.selectbox(
                     "Distance", 
                     all_distances_for_stroke, 
@@ -391,35 +374,184 @@ def dashboard_page():
                 show_top_n_for_stroke = col2.number_input(
                     "Show Top N", 
                     min_value=1, 
-                    value=min(10, len(stroke_df)), # Default to 10 or max available
+                    value=min(10, stroke_count), # Default to 10 or max available
                     step=1, 
                     key=f"top_n_filter_{stroke_name.replace(' ', '_')}"
                 )
 
-                # Apply distance filter
-                current_display_df = stroke_df.copy()
-                if selected_distance_for_stroke != "All":
-                    current_display_df = current_display_df[current_display_df['Distance'] == selected_distance_for_stroke]
-
-                if current_display_df.empty:
-                    st.info(f"No {selected_distance_for_stroke} records found for {stroke_name} with current filters.")
-                    continue
-
-                # Convert 'Time' to sortable numeric for sorting
-                current_display_df['_sortable_time'] = current_display_df['Time'].apply(time_string_to_seconds)
-                current_display_df = current_display_df.sort_values(by='_sortable_time', ascending=True)
-                current_display_df = current_display_df.drop(columns=['_sortable_time']) # Drop the temporary column
-                
-                # Apply 'Show Top N' filter
-                current_display_df = current_display_df.head(show_top_n_for_stroke)
+                # Fastest first, limited to the top N
+                current_display_df = engine.top_n(filters, stroke_name, selected_distance_for_stroke, show_top_n_for_stroke)
 
                 if not current_display_df.empty:
-                    st.dataframe(current_display_df[display_cols], width='stretch')
+                    st.dataframe(current_display_df, width='stretch')
                 else:
-                    st.info(f"No records found for {stroke_name} with the selected filters and top N.")
+                    st.info(f"No {selected_distance_for_stroke} records found for {stroke_name} with current filters.")
         else:
             st.info(f"No {stroke_name} records found with current filters.")
 
+def qualifications_page():
+    st.header("🎯 Qualifying Standards")
+    with st.expander("Load Standards", expanded=db.get_standards().empty):
+        st.caption("CSV columns: " + ", ".join(standards.STANDARD_COLUMNS) + " (CutTime as MM:SS.ss)")
+        uploaded = st.file_uploader("Standards CSV", type=["csv"], key="standards_file")
+        if uploaded is not None and st.button("Replace Standards"):
+            try:
+                count = standards.load_standards(uploaded)
+                st.success(f"Loaded {count} standards.")
+            except ValueError as e:
+                st.error(str(e))
+
+    cuts = db.get_standards()
+    if cuts.empty:
+        st.info("No standards loaded yet.")
+        return
+    # Cheap when nothing changed: only swimmers touched since the last refresh are re-checked
+    standards.refresh_qualifications()
+    standard = st.selectbox("Standard", sorted(cuts['Standard'].unique()))
+    df = db.get_qualifications(standard)
+    st.metric("Qualified swimmers", df['SwimmerUniqID'].nunique())
+    if df.empty:
+        st.info("No stored swim meets this standard yet.")
+    else:
+        st.dataframe(df.drop(columns=['SwimmerUniqID', 'BestUniqueID', 'Standard']), width='stretch', hide_index=True)
+
+    with st.expander("Check the Site", expanded=False):
+        st.caption("Asks the site for every swim under this standard's cuts, including swims not stored yet.")
+        c1, c2 = st.columns(2)
+        start_date = c1.date_input("From", date.today() - timedelta(days=365), key="qualifier_start")
+        end_date = c2.date_input("To", date.today(), key="qualifier_end")
+        if st.button("🔍 Check Site"):
+            scraper = scrapers.make_scraper()
+            try:
+                with st.spinner("Checking..."):
+                    fetched = [standards.fetch_qualifiers(scraper, row, start_date, end_date)
+                               for _, row in cuts[cuts['Standard'] == standard].iterrows()]
+            finally:
+                scraper.close()
+            fetched = [f for f in fetched if f is not None and not f.empty]
+            st.session_state.site_qualifiers = pd.concat(fetched, ignore_index=True) if fetched else pd.DataFrame()
+        site_df = st.session_state.get('site_qualifiers')
+        if site_df is not None:
+            if site_df.empty:
+                st.info("The site lists no swims under these cuts.")
+            else:
+                st.dataframe(site_df, width='stretch', hide_index=True)
+                if st.button("💾 Save Site Swims"):
+                    added = standards.save_qualifiers(site_df)
+                    parquet_store.refresh_snapshots()
+                    st.session_state.site_qualifiers = None
+                    st.success(f"Saved {added} new records.")
+                    st.rerun()
+
+def teams_page():
+    st.header("🏫 School & Club Comparison")
+    # Only the (season, stroke) slices written since the last refresh are re-aggregated
+    teams.refresh_cube()
+    c1, c2 = st.columns([0.3, 0.7])
+    kind = c1.radio("Compare", ("school", "club"), format_func=str.title, horizontal=True)
+    satit_only = kind == "school" and c2.checkbox("SATITGAME schools only", value=True)
+    options = teams.cube_options(kind)
+    if not options['seasons']:
+        st.info("No records with a school or club yet.")
+        return
+
+    c1, c2, c3, c4, c5 = st.columns(5)
+    season = c1.selectbox("Season", options['seasons'])
+    stroke = c2.selectbox("Stroke", options['strokes'])
+    distance = c3.selectbox("Distance", options['distances'])
+    gender = c4.selectbox("Gender", options['genders'])
+    age_band = c5.selectbox("Age Band", ["All"] + options['age_bands'])
+    selected = st.multiselect(kind.title() + "s", options['teams'], help="Leave empty to compare all")
+
+    df = db.get_team_cube(kind, season, stroke, distance, gender, None if age_band == "All" else age_band,
+                          selected, satit_only)
+    if df.empty:
+        st.info("No swims match this selection.")
+        return
+    st.metric(f"{kind.title()}s", df['Team'].nunique())
+    st.dataframe(df[['Team', 'AgeBand', 'Records', 'Swimmers', 'BestTime', 'MedianSeconds']], width='stretch', hide_index=True)
+    if age_band != "All":
+        st.bar_chart(df.set_index('Team')[['BestSeconds', 'MedianSeconds']])
+
+def profile_page():
+    st.header("🏊 Swimmer Profile")
+    query = st.text_input("Search swimmer", key="profile_search")
+    matches = db.search_swimmers(query) if query else pd.DataFrame()
+    if matches.empty:
+        st.info("Search for a swimmer by name or club." if not query else "No swimmer matches that search.")
+        return
+    labels = {row.UniqID: f"{row.Name} ({row.Club})" if row.Club else row.Name for row in matches.itertuples()}
+    uniq_id = st.selectbox("Swimmer", list(labels), format_func=labels.get)
+    # Cheap when nothing changed: only swimmers touched since the last refresh are rebuilt
+    progression.refresh_progression()
+    df = db.get_progression(uniq_id)
+    if df.empty:
+        st.info("No timed swims stored for this swimmer yet.")
+        return
+
+    bests = progression.personal_bests(df)
+    c1, c2, c3 = st.columns(3)
+    c1.metric("Swims", len(df))
+    c2.metric("Events", len(bests))
+    c3.metric("PBs", int(df['IsPB'].sum()))
+    st.dataframe(bests, width='stretch', hide_index=True)
+
+    events_swum = bests[progression.EVENT_COLUMNS].astype(object).where(bests[progression.EVENT_COLUMNS].notna(), None)
+    choices = list(events_swum.itertuples(index=False, name=None))
+    event = st.selectbox("Event", choices, format_func=lambda e: " · ".join(str(v) for v in e if v))
+    mask = pd.Series(True, index=df.index)
+    for column, value in zip(progression.EVENT_COLUMNS, event):
+        mask &= df[column].isna() if value is None else df[column] == value
+    swims = df[mask]
+    st.line_chart(swims.set_index('SwimDate')[['Seconds', 'BestSeconds', 'Trend']])
+    st.dataframe(swims[['Swim', 'SwimDate', 'Competition', 'Time', 'BestTime', 'IsPB', 'Improvement', 'Delta', 'Trend']],
+                 width='stretch', hide_index=True)
+
+def meet_entry_page():
+    st.header("📋 Meet Entry")
+    with st.expander("Course Conversions", expanded=False):
+        st.caption("CSV columns: " + ", ".join(entries.CONVERSION_COLUMNS) + " (FromPool time × Factor = ToPool time)")
+        uploaded = st.file_uploader("Conversions CSV", type=["csv"], key="conversions_file")
+        if uploaded is not None and st.button("Replace Conversions"):
+            try:
+                st.success(f"Loaded {entries.load_conversions(uploaded)} conversion factors.")
+            except ValueError as e:
+                st.error(str(e))
+
+    roster_file = st.file_uploader("Roster (CSV or Excel, a UniqID or Name column)", type=["csv", "xlsx"], key="roster_file")
+    if roster_file is None:
+        st.info("Upload a roster to seed its entries.")
+        return
+    sheet = pd.read_excel(roster_file, dtype=str) if roster_file.name.endswith(".xlsx") else pd.read_csv(roster_file, dtype=str)
+    roster = entries.read_roster(sheet)
+    st.caption(f"{len(roster)} swimmers on the roster.")
+
+    c1, c2 = st.columns(2)
+    strokes = c1.multiselect("Strokes", [s['name'] for s in events.STROKES.values()])
+    distances = c2.multiselect("Distances", [d['name'] for d in events.DISTANCES.values()])
+    c1, c2, c3 = st.columns(3)
+    pool = c1.selectbox("Pool", [p['name'] for p in events.POOL_TYPES.values()] + ["Any"])
+    pool = None if pool == "Any" else pool
+    window = c2.date_input("Swims between", value=(date.today() - timedelta(days=365), date.today()))
+    convert = pool is not None and c3.checkbox("Convert other-pool swims", value=not db.get_course_conversions().empty)
+    if not (roster and strokes and distances):
+        return
+
+    start_date, end_date = (window[0], window[-1]) if window else (None, None)
+    seeded = entries.seed_entries(roster, [(s, d) for s in strokes for d in distances], pool, start_date, end_date, convert)
+    c1, c2, c3 = st.columns(3)
+    c1.metric("Entries", len(seeded))
+    c2.metric("Seeded", int((seeded['SeedTime'] != entries.NO_TIME).sum()))
+    c3.metric("Not found", seeded.loc[seeded['SwimmerUniqID'].isna(), 'Entry'].nunique())
+    st.dataframe(seeded.drop(columns=['SwimmerUniqID', 'SeedSeconds']), width='stretch', hide_index=True)
+
+    formats = [fmt for fmt in ('csv', 'xlsx') if export.is_available(fmt)]
+    fmt = st.selectbox("Format", formats, format_func=str.upper)
+    with tempfile.TemporaryFile() as f:
+        entries.write_entries(f, seeded, fmt)
+        f.seek(0)
+        st.download_button("Download entry file", f.read(), file_name=f"meet_entries.{fmt}", mime=export.MIME_TYPES[fmt])
+
 def main():
     db.init_db()
     if 'scraped_data' not in st.session_state: st.session_state.scraped_data = None
@@ -429,23 +561,27 @@ def main():
     db_exists = os.path.exists(db.DB_FILE)
     if db_exists:
         try:
-            conn = sqlite3.connect(db.DB_FILE)
-            c = conn.cursor()
-            c.execute("SELECT COUNT(*) FROM RecordTable")
-            count = c.fetchone()[0]
+            count = db.get_stats()['RecordCount']
             st.sidebar.success(f"Database: Connected ({count} records)")
-            conn.close()
         except Exception as e:
             st.sidebar.error(f"Database: Connection Error: {e}")
     else:
         st.sidebar.error("Database: Missing (Creating empty)")
 
     st.sidebar.title("Navigation")
-    page = st.sidebar.radio("Go to", ("Dashboard", "Data Management", "Add Record"), index=0)
+    page = st.sidebar.radio("Go to", ("Dashboard", "Profile", "Teams", "Qualifications", "Meet Entry", "Data Management", "Add Record"), index=0)
 
     if page == "Dashboard":
         st.title("📊 Ranking Dashboard")
         dashboard_page()
+    elif page == "Profile":
+        profile_page()
+    elif page == "Teams":
+        teams_page()
+    elif page == "Qualifications":
+        qualifications_page()
+    elif page == "Meet Entry":
+        meet_entry_page()
     elif page == "Data Management":
         scraping_and_management_page()
     elif page == "Add Record":
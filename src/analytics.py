@@ -0,0 +1,210 @@
+import importlib.util
+import os
+import numpy as np
+import pandas as pd
+import database as db
+import parquet_store
+from swimutils import parse_age_range, parse_thai_date, THAI_MONTH_MAP
+
+# Which engine backs the dashboard: "pandas" (default) or "duckdb"
+QUERY_ENGINE = os.environ.get("TAA_QUERY_ENGINE", "pandas")
+
+DISPLAY_COLS = ['Name', 'Distance', 'Time', 'CompetitionDate', 'Competition']
+
+DEFAULT_FILTERS = {
+    'gender': "All", 'stroke': "All", 'distance': "All",
+    'min_age': 0, 'max_age': 200, 'schools': [], 'clubs': [],
+}
+
+
+def duckdb_available() -> bool:
+    """Whether the duckdb engine can run; duckdb itself is only imported by DuckDBEngine."""
+    return importlib.util.find_spec("duckdb") is not None and parquet_store.is_available()
+
+def _per_category(series: pd.Series, func, missing) -> np.ndarray:
+    """Applies func once per distinct value rather than once per row."""
+    series = series.astype('category')
+    lookup = [func(value) for value in series.cat.categories] + [missing]
+    # Missing values have code -1, which picks the trailing `missing` entry
+    return np.asarray(lookup)[series.cat.codes.to_numpy()]
+
+def _time_seconds(times: pd.Series) -> np.ndarray:
+    """Vectorized time_string_to_seconds: MM:SS.ss to seconds, inf when unparseable."""
+    # The fraction is decimal ("30.5" is 30.5 s), as in SECONDS_SQL and the DuckDB engine
+    parts = times.astype(object).str.extract(r'^\s*(\d+):(\d+(?:\.\d+)?)\s*$').astype(float)
+    seconds = parts[0] * 60 + parts[1]
+    return seconds.fillna(np.inf).to_numpy()
+
+
+class PandasEngine:
+    """
+    Dashboard queries over the compact DataFrame from database.get_records().
+    Filters are applied as boolean masks over that one frame, so a dashboard
+    render never copies the full data set.
+    """
+
+    name = "pandas"
+
+    def __init__(self, records_df: pd.DataFrame = None):
+        df = db.get_records() if records_df is None else records_df
+        if not df.empty:
+            df['CompetitionDate'] = pd.to_datetime(_per_category(df['CompetitionDate'], parse_thai_date, pd.NaT))
+            ages = _per_category(df['Age'], parse_age_range, (None, None))
+            df['_min_age_val'] = pd.to_numeric([a[0] for a in ages], errors='coerce')
+            df['_max_age_val'] = pd.to_numeric([a[1] for a in ages], errors='coerce')
+            df['_sortable_time'] = _time_seconds(df['Time'])
+            self._valid = df['_min_age_val'].notna() & df['_max_age_val'].notna()
+        self.df = df
+        self._mask_cache = (None, None)
+
+    def is_empty(self) -> bool:
+        return self.df.empty or not self._valid.any()
+
+    def filter_options(self) -> dict:
+        df = self.df[self._valid]
+        return {
+            'genders': df['Gender'].dropna().unique().tolist(),
+            'strokes': df['Stroke'].dropna().unique().tolist(),
+            'distances': df['Distance'].dropna().unique().tolist(),
+            'schools': df['School'].dropna().unique().tolist(),
+            'clubs': sorted(df['Club'].dropna().unique().tolist()),
+        }
+
+    def _mask(self, filters: dict, stroke=None, distance=None) -> pd.Series:
+        f = {**DEFAULT_FILTERS, **filters}
+        key = repr(sorted(f.items()))
+        if self._mask_cache[0] == key:
+            mask = self._mask_cache[1]
+        else:
+            df = self.df
+            mask = self._valid & (df['_max_age_val'] >= f['min_age']) & (df['_min_age_val'] <= f['max_age'])
+            if f['gender'] != "All": mask &= df['Gender'] == f['gender']
+            if f['stroke'] != "All": mask &= df['Stroke'] == f['stroke']
+            if f['distance'] != "All": mask &= df['Distance'] == f['distance']
+            if f['schools']: mask &= df['School'].isin(f['schools'])
+            if f['clubs']: mask &= df['Club'].isin(f['clubs'])
+            self._mask_cache = (key, mask)
+        if stroke is not None: mask = mask & (self.df['Stroke'] == stroke)
+        if distance is not None and distance != "All": mask = mask & (self.df['Distance'] == distance)
+        return mask
+
+    def summary(self, filters: dict) -> dict:
+        mask = self._mask(filters)
+        return {
+            'records': int(mask.sum()),
+            'swimmers': self.df.loc[mask, 'Name'].nunique(),
+            'competitions': self.df.loc[mask, 'Competition'].nunique(),
+        }
+
+    def stroke_counts(self, filters: dict) -> dict:
+        counts = self.df.loc[self._mask(filters), 'Stroke'].value_counts()
+        return {stroke: int(n) for stroke, n in counts.items() if n > 0}
+
+    def distances(self, filters: dict, stroke: str) -> list:
+        return sorted(self.df.loc[self._mask(filters, stroke), 'Distance'].unique().tolist())
+
+    def top_n(self, filters: dict, stroke: str, distance: str, n: int) -> pd.DataFrame:
+        # Sort just the two key columns of the matching rows, then fetch the winners
+        keys = self.df.loc[self._mask(filters, stroke, distance), ['_sortable_time', 'UniqueID']]
+        top = keys.sort_values(by=['_sortable_time', 'UniqueID'], kind='mergesort').index[:n]
+        return self.df.loc[top, DISPLAY_COLS].reset_index(drop=True)
+
+
+class DuckDBEngine:
+    """
+    The same dashboard queries as vectorized, multi-threaded SQL in DuckDB,
+    reading the Parquet snapshot directly instead of a pandas copy of the data.
+    """
+
+    name = "duckdb"
+
+    def __init__(self):
+        if not duckdb_available():
+            raise RuntimeError("The duckdb engine needs the duckdb and pyarrow packages.")
+        # Imported here so the default pandas engine never pays for it at startup
+        import duckdb
+        parquet_store.refresh_snapshots()
+        self.con = duckdb.connect()
+        source = os.path.join(parquet_store.EXPORT_DIR, "**", "*.parquet")
+        months = " ".join(f"WHEN '{thai}' THEN {i}" for i, thai in enumerate(THAI_MONTH_MAP, start=1))
+        self.con.execute(f"""
+            CREATE VIEW records AS
+            SELECT
+                * EXCLUDE (CompetitionDate),
+                TRY(make_date(
+                    TRY_CAST(split_part(CompetitionDate, '/', 3) AS INTEGER) - 543,
+                    CASE trim(split_part(CompetitionDate, '/', 2)) {months} END,
+                    TRY_CAST(split_part(CompetitionDate, '/', 1) AS INTEGER)
+                )) AS CompetitionDate,
+                TRY_CAST(split_part(Age, '-', 1) AS INTEGER) AS MinAge,
+                TRY_CAST(CASE WHEN contains(Age, '-') THEN split_part(Age, '-', 2) ELSE Age END AS INTEGER) AS MaxAge
+            FROM read_parquet('{source}', hive_partitioning = true)
+        """)
+
+    def _where(self, filters: dict, stroke=None, distance=None):
+        f = {**DEFAULT_FILTERS, **filters}
+        clauses = ["MinAge IS NOT NULL", "MaxAge IS NOT NULL", "MaxAge >= ?", "MinAge <= ?"]
+        params = [f['min_age'], f['max_age']]
+        for column, value in (('Gender', f['gender']), ('Stroke', f['stroke']), ('Distance', f['distance']),
+                              ('Stroke', stroke), ('Distance', distance)):
+            if value is not None and value != "All":
+                clauses.append(f"{column} = ?")
+                params.append(value)
+        for column, values in (('School', f['schools']), ('Club', f['clubs'])):
+            if values:
+                clauses.append(f"{column} IN ({', '.join('?' for _ in values)})")
+                params.extend(values)
+        return " AND ".join(clauses), params
+
+    def _distinct(self, column, order=False):
+        sql = f"SELECT DISTINCT {column} FROM records WHERE {column} IS NOT NULL"
+        if order:
+            sql += f" ORDER BY {column}"
+        return [row[0] for row in self.con.execute(sql).fetchall()]
+
+    def is_empty(self) -> bool:
+        return self.con.execute("SELECT COUNT(*) FROM records WHERE MinAge IS NOT NULL").fetchone()[0] == 0
+
+    def filter_options(self) -> dict:
+        return {
+            'genders': self._distinct('Gender'),
+            'strokes': self._distinct('Stroke'),
+            'distances': self._distinct('Distance'),
+            'schools': self._distinct('School'),
+            'clubs': self._distinct('Club', order=True),
+        }
+
+    def summary(self, filters: dict) -> dict:
+        where, params = self._where(filters)
+        records, swimmers, competitions = self.con.execute(
+            f"SELECT COUNT(*), COUNT(DISTINCT Name), COUNT(DISTINCT Competition) FROM records WHERE {where}", params
+        ).fetchone()
+        return {'records': records, 'swimmers': swimmers, 'competitions': competitions}
+
+    def stroke_counts(self, filters: dict) -> dict:
+        where, params = self._where(filters)
+        return dict(self.con.execute(f"SELECT Stroke, COUNT(*) FROM records WHERE {where} GROUP BY Stroke", params).fetchall())
+
+    def distances(self, filters: dict, stroke: str) -> list:
+        where, params = self._where(filters, stroke)
+        return [row[0] for row in self.con.execute(f"SELECT DISTINCT Distance FROM records WHERE {where} ORDER BY Distance", params).fetchall()]
+
+    def top_n(self, filters: dict, stroke: str, distance: str, n: int) -> pd.DataFrame:
+        where, params = self._where(filters, stroke, distance)
+        return self.con.execute(f"""
+            SELECT {', '.join(DISPLAY_COLS)} FROM records WHERE {where}
+            ORDER BY Seconds ASC NULLS LAST, UniqueID
+            LIMIT {int(n)}
+        """, params).df()
+
+
+ENGINES = {'pandas': PandasEngine, 'duckdb': DuckDBEngine}
+
+def get_engine(name: str = None):
+    """Builds the configured query engine, falling back to pandas if it cannot start."""
+    name = name or QUERY_ENGINE
+    try:
+        return ENGINES[name]()
+    except (KeyError, RuntimeError) as e:
+        print(f"[DEBUG] Query engine '{name}' unavailable ({e}). Falling back to pandas.")
+        return PandasEngine()
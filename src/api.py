@@ -0,0 +1,242 @@
+"""
+Read-only JSON API over database.py for tools that only need the numbers
+(coach tablets, the meet-entry spreadsheet):
+
+    GET /rankings?stroke=&distance=&gender=&pool=&min_age=&max_age=&start_date=&end_date=&club=&school=&best=1&limit=&offset=
+    GET /swimmers?q=
+    GET /swimmers/<UniqID>/history
+    GET /swimmers/<UniqID>/ranks
+    GET /swimmers/<UniqID>/progression
+    GET /competitions?q=&limit=&offset=
+    GET /stats
+
+Every response carries ETag "<change version>". The version is bumped by the
+database on every write, so a client polling with If-None-Match gets a 304
+without the query being run, and identical requests within one version are
+answered from a small in-memory cache.
+
+Run with `python -m api --port 8765` (or `python -m taa serve`).
+"""
+import argparse
+import json
+import threading
+from collections import OrderedDict
+from datetime import date
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, unquote, urlsplit
+
+import pandas as pd
+import database as db
+
+DEFAULT_LIMIT = 100
+MAX_LIMIT = 1000
+CACHE_SIZE = 256
+# 64-bit record keys are past JavaScript's exact integer range, so they are sent as strings
+KEY_COLUMNS = {'UniqueID', 'BestUniqueID'}
+
+
+class BadRequest(ValueError):
+    pass
+
+
+def _frame_items(df) -> list:
+    """DataFrame rows as JSON-safe dicts (NaN, NA and NaT become null, record keys become strings)."""
+    items = df.to_dict(orient='records')
+    for item in items:
+        for key, value in item.items():
+            if pd.api.types.is_scalar(value) and pd.isna(value):
+                item[key] = None
+            elif key in KEY_COLUMNS and value is not None:
+                item[key] = str(value)
+    return items
+
+def _int_param(params, name, default=None, minimum=0, maximum=None):
+    value = params.get(name, default)
+    if value is None:
+        return None
+    try:
+        value = int(value)
+    except (TypeError, ValueError):
+        raise BadRequest(f"'{name}' must be an integer")
+    if value < minimum:
+        raise BadRequest(f"'{name}' must be at least {minimum}")
+    return min(value, maximum) if maximum is not None else value
+
+def _date_param(params, name):
+    value = params.get(name)
+    if value is None:
+        return None
+    try:
+        return date.fromisoformat(value).isoformat()
+    except ValueError:
+        raise BadRequest(f"'{name}' must be an ISO date (YYYY-MM-DD)")
+
+def _page(params):
+    return _int_param(params, 'limit', DEFAULT_LIMIT, 1, MAX_LIMIT), _int_param(params, 'offset', 0)
+
+def _paged(df, limit, offset) -> dict:
+    total = int(df['Total'].iloc[0]) if not df.empty else 0
+    return {'total': total, 'limit': limit, 'offset': offset, 'items': _frame_items(df.drop(columns='Total'))}
+
+
+def rankings(params, _):
+    limit, offset = _page(params)
+    df = db.get_rankings(
+        stroke=params.get('stroke'), distance=params.get('distance'), gender=params.get('gender'),
+        min_age=_int_param(params, 'min_age'), max_age=_int_param(params, 'max_age'),
+        club=params.get('club'), school=params.get('school'), pool=params.get('pool'),
+        start_date=_date_param(params, 'start_date'), end_date=_date_param(params, 'end_date'),
+        best_only=params.get('best', "1") not in ("0", "false", "no"),
+        limit=limit, offset=offset,
+    )
+    return _paged(df, limit, offset)
+
+def swimmers(params, _):
+    return {'items': _frame_items(db.search_swimmers(params.get('q', "")))}
+
+def swimmer_history(params, uniq_id):
+    df = db.get_swimmer_history(uniq_id)
+    if df.empty:
+        return None
+    return {'swimmer': uniq_id, 'items': _frame_items(df)}
+
+def swimmer_ranks(params, uniq_id):
+    df = db.get_rank_history(uniq_id)
+    if df.empty:
+        return None
+    return {'swimmer': uniq_id, 'items': _frame_items(df)}
+
+def swimmer_progression(params, uniq_id):
+    df = db.get_progression(uniq_id)
+    if df.empty:
+        return None
+    return {'swimmer': uniq_id, 'items': _frame_items(df)}
+
+def competitions(params, _):
+    limit, offset = _page(params)
+    return _paged(db.get_competitions(params.get('q'), limit, offset), limit, offset)
+
+def stats(params, _):
+    return db.get_stats()
+
+# (first path segment, has an id segment, trailing segment) -> handler
+ROUTES = {
+    ('rankings', False, None): rankings,
+    ('swimmers', False, None): swimmers,
+    ('swimmers', True, 'history'): swimmer_history,
+    ('swimmers', True, 'ranks'): swimmer_ranks,
+    ('swimmers', True, 'progression'): swimmer_progression,
+    ('competitions', False, None): competitions,
+    ('stats', False, None): stats,
+}
+
+def route(path: str):
+    """Returns (handler, id) for a request path, or (None, None) if nothing matches."""
+    parts = [unquote(p) for p in path.strip('/').split('/') if p]
+    if len(parts) == 1:
+        key, item_id = (parts[0], False, None), None
+    elif len(parts) == 3:
+        key, item_id = (parts[0], True, parts[2]), parts[1]
+    else:
+        return None, None
+    return ROUTES.get(key), item_id
+
+
+class ResponseCache:
+    """Response bodies for the current change version; a new version empties it."""
+
+    def __init__(self, size: int = CACHE_SIZE):
+        self.size = size
+        self.version = None
+        self.entries = OrderedDict()
+        self.lock = threading.Lock()
+
+    def get(self, version, key):
+        with self.lock:
+            if version != self.version:
+                self.version = version
+                self.entries.clear()
+                return None
+            body = self.entries.get(key)
+            if body is not None:
+                self.entries.move_to_end(key)
+            return body
+
+    def put(self, version, key, body):
+        with self.lock:
+            if version != self.version:
+                return
+            self.entries[key] = body
+            while len(self.entries) > self.size:
+                self.entries.popitem(last=False)
+
+
+class ApiHandler(BaseHTTPRequestHandler):
+
+    def do_GET(self):
+        url = urlsplit(self.path)
+        handler, item_id = route(url.path)
+        if handler is None:
+            return self._send_json(404, {'error': "Not found"})
+
+        version = db.get_change_version()
+        etag = f'"{version}"'
+        if etag in [tag.strip() for tag in self.headers.get('If-None-Match', "").split(',')]:
+            return self._send(304, b"", etag)
+
+        body = self.server.cache.get(version, self.path)
+        if body is None:
+            params = {key: values[-1] for key, values in parse_qs(url.query).items()}
+            try:
+                payload = handler(params, item_id)
+            except BadRequest as e:
+                return self._send_json(400, {'error': str(e)})
+            if payload is None:
+                return self._send_json(404, {'error': "Not found"})
+            body = json.dumps({'version': version, **payload}, ensure_ascii=False, default=str).encode('utf-8')
+            self.server.cache.put(version, self.path, body)
+        self._send(200, body, etag)
+
+    def _send_json(self, status, payload):
+        self._send(status, json.dumps(payload).encode('utf-8'))
+
+    def _send(self, status, body, etag=None):
+        self.send_response(status)
+        if etag:
+            self.send_header('ETag', etag)
+            # Clients may keep the body but must revalidate it every time
+            self.send_header('Cache-Control', 'no-cache')
+        if status != 304:
+            self.send_header('Content-Type', 'application/json; charset=utf-8')
+            self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        if status != 304:
+            self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        print(f"[DEBUG] API {self.address_string()} {format % args}")
+
+
+def make_server(host: str = "127.0.0.1", port: int = 8765) -> ThreadingHTTPServer:
+    db.init_db()
+    server = ThreadingHTTPServer((host, port), ApiHandler)
+    server.cache = ResponseCache()
+    return server
+
+def serve(host: str = "127.0.0.1", port: int = 8765):
+    server = make_server(host, port)
+    print(f"[DEBUG] Serving the rankings API on http://{host}:{server.server_port}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Read-only JSON API for TAA rankings.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    args = parser.parse_args()
+    serve(args.host, args.port)
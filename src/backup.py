@@ -0,0 +1,156 @@
+"""
+Online snapshots of swim_data.db and verified restores.
+
+Snapshots use SQLite's online backup API, copying PAGES_PER_STEP pages per step
+and pausing between steps. The source is only read-locked while a step runs, so
+ingestion and dashboard reads carry on during a backup. If other connections
+keep writing, SQLite restarts the copy; after MAX_RESTARTS it finishes the copy
+in a single step instead, which under WAL still does not block writers.
+
+Each snapshot is written to a temporary file, integrity-checked, then renamed,
+so BACKUP_DIR only ever holds complete, verified copies. Older snapshots beyond
+the retention count are deleted.
+
+    python -m taa backup --keep 14
+    python -m taa restore src/backups/swim_data-20260301-020000-000000.db
+"""
+import os
+import sqlite3
+import time
+from datetime import datetime
+from urllib.parse import quote
+
+import database as db
+
+BACKUP_DIR = os.path.join(os.path.dirname(__file__), "backups")
+# Pages copied per step (4 KiB by default) and the pause between steps
+PAGES_PER_STEP = 256
+STEP_SLEEP = 0.005
+# Restarts caused by concurrent writes before the copy finishes in one step
+MAX_RESTARTS = 3
+# Snapshots kept by prune()
+KEEP_SNAPSHOTS = 14
+SNAPSHOT_PREFIX = "swim_data-"
+
+
+class BackupError(Exception):
+    pass
+
+
+class _TooManyRestarts(Exception):
+    pass
+
+
+def _read_only(path: str) -> sqlite3.Connection:
+    return sqlite3.connect(f"file:{quote(os.path.abspath(path))}?mode=ro", uri=True, check_same_thread=False)
+
+def integrity_errors(path: str) -> list:
+    """The problems PRAGMA integrity_check reports for a database file ([] when it is sound)."""
+    conn = _read_only(path)
+    try:
+        rows = [row[0] for row in conn.execute("PRAGMA integrity_check")]
+    except sqlite3.DatabaseError as e:
+        rows = [str(e)]
+    finally:
+        conn.close()
+    return [] if rows == ["ok"] else rows
+
+def _copy(source: sqlite3.Connection, target: sqlite3.Connection):
+    state = {'remaining': None, 'restarts': 0}
+
+    def progress(status, remaining, total):
+        # remaining grows again when a write elsewhere made SQLite restart the copy
+        if state['remaining'] is not None and remaining > state['remaining']:
+            state['restarts'] += 1
+            if state['restarts'] > MAX_RESTARTS:
+                raise _TooManyRestarts()
+        state['remaining'] = remaining
+        if remaining:
+            time.sleep(STEP_SLEEP)
+
+    try:
+        source.backup(target, pages=PAGES_PER_STEP, progress=progress)
+    except _TooManyRestarts:
+        print(f"[DEBUG] Backup restarted {MAX_RESTARTS} times under concurrent writes; finishing in one step.")
+        source.backup(target, pages=-1)
+    return state['restarts']
+
+def snapshot(backup_dir: str = None, keep: int = KEEP_SNAPSHOTS) -> str:
+    """Writes a verified snapshot of DB_FILE into backup_dir, prunes old ones and returns its path."""
+    backup_dir = backup_dir or BACKUP_DIR
+    os.makedirs(backup_dir, exist_ok=True)
+    path = os.path.join(backup_dir, f"{SNAPSHOT_PREFIX}{datetime.now().strftime('%Y%m%d-%H%M%S-%f')}.db")
+    partial = path + ".partial"
+
+    started = time.monotonic()
+    source = sqlite3.connect(db.DB_FILE, check_same_thread=False)
+    target = sqlite3.connect(partial)
+    try:
+        restarts = _copy(source, target)
+    finally:
+        target.close()
+        source.close()
+
+    errors = integrity_errors(partial)
+    if errors:
+        os.remove(partial)
+        raise BackupError(f"Snapshot failed its integrity check: {errors[:3]}")
+    os.replace(partial, path)
+    print(f"[DEBUG] Snapshot {path} written in {time.monotonic() - started:.2f}s ({restarts} restarts).")
+    if keep:
+        prune(backup_dir, keep)
+    return path
+
+def list_snapshots(backup_dir: str = None) -> list:
+    """Snapshot paths in backup_dir, newest first."""
+    backup_dir = backup_dir or BACKUP_DIR
+    if not os.path.isdir(backup_dir):
+        return []
+    names = [n for n in os.listdir(backup_dir) if n.startswith(SNAPSHOT_PREFIX) and n.endswith(".db")]
+    # Timestamped names sort chronologically
+    return [os.path.join(backup_dir, n) for n in sorted(names, reverse=True)]
+
+def prune(backup_dir: str = None, keep: int = KEEP_SNAPSHOTS) -> list:
+    """Deletes all but the newest keep snapshots and returns the deleted paths."""
+    removed = list_snapshots(backup_dir)[keep:]
+    for path in removed:
+        os.remove(path)
+    if removed:
+        print(f"[DEBUG] Pruned {len(removed)} old snapshots.")
+    return removed
+
+def restore(path: str, backup_dir: str = None) -> str:
+    """
+    Replaces DB_FILE's contents with a snapshot. The snapshot is integrity-checked
+    first, the current database is snapshotted (and returned) so the restore
+    can be undone, and the restored database is checked and migrated to the
+    current schema. Raises BackupError if either check fails.
+    """
+    if not os.path.isfile(path):
+        raise BackupError(f"No snapshot at {path}")
+    errors = integrity_errors(path)
+    if errors:
+        raise BackupError(f"Snapshot failed its integrity check, nothing was restored: {errors[:3]}")
+    conn = _read_only(path)
+    version = conn.execute("PRAGMA user_version").fetchone()[0]
+    conn.close()
+    if version > db.SCHEMA_VERSION:
+        raise BackupError(f"Snapshot schema version {version} is newer than this code ({db.SCHEMA_VERSION}).")
+
+    previous = snapshot(backup_dir, keep=0)
+    # Let queued writes finish; the restore then takes the write lock for one atomic copy
+    db.close_writers()
+    source = _read_only(path)
+    target = sqlite3.connect(db.DB_FILE, check_same_thread=False)
+    try:
+        source.backup(target, pages=-1)
+    finally:
+        target.close()
+        source.close()
+
+    errors = integrity_errors(db.DB_FILE)
+    if errors:
+        raise BackupError(f"Restored database failed its integrity check; the previous state is in {previous}: {errors[:3]}")
+    db.init_db(force=True)
+    print(f"[DEBUG] Restored {db.DB_FILE} from {path}; previous state saved to {previous}.")
+    return previous
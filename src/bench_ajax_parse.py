@@ -0,0 +1,78 @@
+"""
+Benchmarks turning a CheckRank response body into the scraped-records DataFrame:
+the original json + per-row dict loop against datawebtaa_ajax's columnar path.
+
+    python bench_ajax_parse.py --rows 100000
+"""
+import argparse
+import json
+import random
+import time
+
+import pandas as pd
+import datawebtaa_ajax
+from datawebtaa_ajax import constant_column, parse_rankings
+
+CONTEXT = {'Stroke': "FreeStyle (ฟรีสไตล์)", 'Distance': "50 m", 'AgeRange': "10-11",
+           'Pool': "Long Course (50m)", 'Gender': "Female (หญิง)"}
+
+
+def make_response(rows: int) -> bytes:
+    random.seed(0)
+    clubs = [f"สโมสรว่ายน้ำ {i}" for i in range(300)]
+    meets = [{'Name': f"Championships {i}", 'StartDayString': f"{1 + i % 28:02d}/ม.ค./2569"} for i in range(60)]
+    data = [{
+        'Place': i + 1, 'FullName': f"นักว่ายน้ำ หมายเลข{i}", 'ClubName': random.choice(clubs), 'Nation': "ไทย",
+        'Time': f"00:{30 + i % 30:02d}.{i % 100:02d}", 'Competition': random.choice(meets),
+    } for i in range(rows)]
+    return json.dumps({'draw': 1, 'recordsTotal': rows, 'data': data}, ensure_ascii=False).encode('utf-8')
+
+def legacy_parse(content: bytes) -> pd.DataFrame:
+    """The parsing loop scrape_rankings used before the columnar path."""
+    json_data = json.loads(content)
+    records = []
+    for item in json_data['data']:
+        records.append({
+            'Rank': item.get('Place'),
+            'Name': item.get('FullName'),
+            'Club': item.get('ClubName'),
+            'Nationality': item.get('Nation'),
+            'Time': item.get('Time'),
+            'Competition': item.get('Competition', {}).get('Name'),
+            'CompetitionDate': item.get('Competition', {}).get('StartDayString'),
+        })
+    df = pd.DataFrame(records)
+    for column, value in CONTEXT.items():
+        df[column] = value
+    return df
+
+def columnar_parse(content: bytes) -> pd.DataFrame:
+    df = parse_rankings(content)
+    for column, value in CONTEXT.items():
+        df[column] = constant_column(value, len(df))
+    return df
+
+def best_of(func, content, repeat):
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        df = func(content)
+        timings.append(time.perf_counter() - started)
+    return min(timings), df
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--rows", type=int, default=100_000)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    content = make_response(args.rows)
+    legacy_s, legacy_df = best_of(legacy_parse, content, args.repeat)
+    columnar_s, columnar_df = best_of(columnar_parse, content, args.repeat)
+    pd.testing.assert_frame_equal(legacy_df, columnar_df.astype({c: object for c in CONTEXT}), check_dtype=False)
+
+    print(f"{args.rows} rows, {len(content) / 1e6:.1f} MB, decoder: {'orjson' if datawebtaa_ajax.orjson else 'json'}")
+    print(f"  dict loop:  {legacy_s * 1000:8.1f} ms  {legacy_df.memory_usage(deep=True).sum() / 1e6:6.1f} MB")
+    print(f"  columnar:   {columnar_s * 1000:8.1f} ms  {columnar_df.memory_usage(deep=True).sum() / 1e6:6.1f} MB")
+    print(f"  speed-up:   {legacy_s / columnar_s:.1f}x")
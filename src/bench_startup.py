@@ -0,0 +1,88 @@
+"""
+Benchmarks the cold start of the Streamlit app: the time a fresh interpreter
+spends on `import ShowData`, against the same import plus the optional
+modules it used to load eagerly (the scraper backends, duckdb, pyarrow's
+dataset and parquet modules, openpyxl).
+
+    python bench_startup.py --repeat 7
+
+Each measurement runs in a new process so nothing is already in sys.modules.
+When ShowData itself cannot be imported here (e.g. streamlit is missing), its
+importable top-level modules are timed instead. Modules that are not
+installed are reported and skipped.
+"""
+import argparse
+import ast
+import os
+import statistics
+import subprocess
+import sys
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+# What ShowData loaded at import time before the scraper registry and the lazy
+# duckdb/pyarrow/openpyxl imports
+EAGER_MODULES = ['datawebtaa_ajax', 'datawebtaa', 'duckdb', 'pyarrow.dataset', 'pyarrow.parquet', 'openpyxl']
+
+
+def app_imports(path: str = os.path.join(HERE, "ShowData.py")) -> list:
+    """Top-level modules imported by the app, in source order."""
+    with open(path, encoding='utf-8') as f:
+        tree = ast.parse(f.read())
+    modules = []
+    for node in tree.body:
+        if isinstance(node, ast.Import):
+            names = [alias.name for alias in node.names]
+        elif isinstance(node, ast.ImportFrom) and node.module:
+            names = [node.module]
+        else:
+            continue
+        modules.extend(n for n in names if n not in modules)
+    return modules
+
+def importable(module: str) -> bool:
+    # Imported rather than just found, so a module whose own dependency is missing counts as missing
+    return subprocess.run([sys.executable, "-c", f"import {module}"], cwd=HERE, capture_output=True).returncode == 0
+
+def cold_import(modules: list) -> tuple:
+    """(seconds a fresh interpreter takes to import modules, EAGER_MODULES that ended up loaded)."""
+    code = (
+        "import sys, time; started = time.perf_counter()\n"
+        f"for m in {modules!r}: __import__(m)\n"
+        "elapsed = time.perf_counter() - started\n"
+        f"print(','.join(m for m in {EAGER_MODULES!r} if m in sys.modules))\n"
+        "print(elapsed)"
+    )
+    out = subprocess.run([sys.executable, "-c", code], cwd=HERE, capture_output=True, text=True, check=True)
+    lines = out.stdout.splitlines()
+    return float(lines[-1]), [m for m in lines[-2].split(',') if m]
+
+def median_of(modules: list, repeat: int) -> tuple:
+    runs = [cold_import(modules) for _ in range(repeat)]
+    return statistics.median(seconds for seconds, _ in runs), runs[-1][1]
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    missing = []
+    if importable("ShowData"):
+        app, label = ["ShowData"], "import ShowData"
+    else:
+        app = []
+        for module in app_imports():
+            (app if importable(module) else missing).append(module)
+        label = f"ShowData's importable top-level modules ({len(app)})"
+    eager = []
+    for module in EAGER_MODULES:
+        (eager if importable(module) else missing).append(module)
+    if missing:
+        print(f"Not installed, skipped: {', '.join(missing)}")
+
+    lazy_s, loaded = median_of(app, args.repeat)
+    eager_s, _ = median_of(app + eager, args.repeat)
+    print(f"{label}, median of {args.repeat} cold starts:")
+    print(f"  now:     {lazy_s * 1000:8.1f} ms  (optional modules loaded: {', '.join(loaded) or 'none'})")
+    print(f"  before:  {eager_s * 1000:8.1f} ms  (+ {', '.join(eager) or 'none installed'})")
+    print(f"  saved:   {(eager_s - lazy_s) * 1000:8.1f} ms")
@@ -1,15 +1,190 @@
 import sqlite3
 import pandas as pd
 import hashlib
+import importlib.util
+import itertools
 import os
+import threading
+import json
+import unicodedata
+from identity import SwimmerResolver, birth_year_range, strip_marks, trigrams
+from dbwriter import WriteQueue
+from swimutils import parse_thai_date, thai_date_to_iso
 
 DB_FILE = os.path.join(os.path.dirname(__file__), "swim_data.db")
 
-def init_db():
-    """Initializes the database and creates tables if they don't exist."""
-    conn = sqlite3.connect(DB_FILE, check_same_thread=False)
-    c = conn.cursor()
+# SQL fragments shared by triggers and queries. CompetitionDate is stored as
+# 'DD/<thai month>/<buddhist year>', so the season is its last four characters - 543.
+SEASON_SQL = "(CASE WHEN CAST(substr({0}, -4) AS INTEGER) > 2400 THEN CAST(substr({0}, -4) AS INTEGER) - 543 ELSE 0 END)"
+STROKE_SQL = "COALESCE(NULLIF({0}, ''), 'Unknown')"
+MIN_AGE_SQL = "(CASE WHEN {0} GLOB '[0-9]*' THEN CAST({0} AS INTEGER) END)"
+MAX_AGE_SQL = "(CASE WHEN {0} GLOB '[0-9]*' THEN CAST(CASE WHEN instr({0}, '-') THEN substr({0}, instr({0}, '-') + 1) ELSE {0} END AS INTEGER) END)"
+SECONDS_SQL = "(CASE WHEN {0} GLOB '*[0-9]:[0-9][0-9]*' THEN CAST(substr({0}, 1, instr({0}, ':') - 1) AS INTEGER) * 60 + CAST(substr({0}, instr({0}, ':') + 1) AS REAL) END)"
+
+_RECORDS_SQL = """
+    SELECT
+        R.UniqueID,
+        COALESCE(M.CanonicalID, R.SwimmerUniqID) AS SwimmerUniqID,
+        COALESCE(S.Name, R.Name) AS Name,
+        R.Age,
+        R.Stroke,
+        R.Distance,
+        R.Time,
+        R.Competition,
+        R.CompetitionDate,
+        R.Club,
+        R.Nationality,
+        S.Gender,
+        S.School
+    FROM
+        RecordView AS R
+    LEFT JOIN
+        SwimmerMergeTable AS M
+    ON
+        R.SwimmerUniqID = M.AliasID
+    LEFT JOIN
+        SwimmerTable AS S
+    ON
+        COALESCE(M.CanonicalID, R.SwimmerUniqID) = S.UniqID
+"""
+
+# Explicit column types for the frames returned by get_records/get_swimmers.
+# Repeated text is categorical (one copy of each string plus small codes); the
+# mostly-unique columns use Arrow-backed strings when pyarrow is installed.
+_TEXT = 'string[pyarrow]' if importlib.util.find_spec("pyarrow") is not None else 'object'
+
+RECORD_SCHEMA = {
+    'UniqueID': 'int64',
+    'SwimmerUniqID': 'category',
+    'Name': 'category',
+    'Age': 'category',
+    'Stroke': 'category',
+    'Distance': 'category',
+    'Time': _TEXT,
+    'Competition': 'category',
+    'CompetitionDate': 'category',
+    'Club': 'category',
+    'Nationality': 'category',
+    'Gender': 'category',
+    'School': 'category',
+}
+SWIMMER_SCHEMA = {
+    'UniqID': _TEXT,
+    'Name': _TEXT,
+    'Gender': 'category',
+    'YearOfBirth': 'Int16',
+    'Club': 'category',
+    'School': 'category',
+    'BirthYearMin': 'Int16',
+    'BirthYearMax': 'Int16',
+}
+READ_CHUNKSIZE = 50_000
+# Rows per fetch when streaming records out with iter_records()
+EXPORT_CHUNKSIZE = 10_000
+EXPORT_COLUMNS = list(RECORD_SCHEMA) + ['Seconds']
+
+def _read_frame(conn, query, schema, params=None):
+    """
+    Reads a query in chunks and converts each chunk to the schema, so an
+    all-object copy of the full result never exists at once.
+    """
+    def typed(chunk):
+        return chunk.astype({col: dtype for col, dtype in schema.items() if col in chunk.columns})
+
+    chunks = [typed(chunk) for chunk in pd.read_sql_query(query, conn, params=params, chunksize=READ_CHUNKSIZE)]
+    if not chunks:
+        return typed(pd.read_sql_query(f"SELECT * FROM ({query}) LIMIT 0", conn, params=params))
+    if len(chunks) == 1:
+        return chunks[0]
+    for col, dtype in schema.items():
+        if dtype == 'category' and col in chunks[0].columns:
+            categories = sorted(set().union(*(chunk[col].cat.categories for chunk in chunks)))
+            for chunk in chunks:
+                chunk[col] = chunk[col].cat.set_categories(categories)
+    return pd.concat(chunks, ignore_index=True)
+
+SCHEMA_VERSION = 16
+SCHOOL_FILE = 'schoolname.txt'
+
+_initialized_dbs = set()
+_init_lock = threading.Lock()
+
+def init_db(force: bool = False):
+    """
+    Brings the database schema up to SCHEMA_VERSION and reloads SchoolTable if
+    schoolname.txt changed. Runs once per process and database file; later calls
+    (e.g. every Streamlit rerun) return immediately unless force=True.
+    """
+    with _init_lock:
+        if DB_FILE in _initialized_dbs and not force:
+            return
+        conn = sqlite3.connect(DB_FILE, check_same_thread=False)
+        c = conn.cursor()
+        # IMMEDIATE takes the write lock up front so two processes never migrate at once
+        c.execute("BEGIN IMMEDIATE")
+        version = c.execute("PRAGMA user_version").fetchone()[0]
+        for target, migrate in _MIGRATIONS:
+            if version < target:
+                migrate(c)
+                c.execute(f"PRAGMA user_version = {target}")
+                print(f"[DEBUG] Migrated database schema to version {target}.")
+        conn.commit()
+        conn.close()
+
+        refresh_school_data(SCHOOL_FILE)
+        _initialized_dbs.add(DB_FILE)
+        print("[DEBUG] Database initialized.")
+
+_writers = {}
+_writers_lock = threading.Lock()
+
+def _writer() -> WriteQueue:
+    """
+    The single write queue for the current DB_FILE, started on first use.
+    All writes from every Streamlit session go through it, so concurrent saves
+    are group-committed instead of contending for the database lock.
+    """
+    with _writers_lock:
+        writer = _writers.get(DB_FILE)
+        if writer is None:
+            writer = _writers[DB_FILE] = WriteQueue(DB_FILE)
+        return writer
 
+# Writer connection id -> (connection, SwimmerResolver, ChangeVersion it reflects)
+_resolvers = {}
+
+def _resolver(c) -> SwimmerResolver:
+    """
+    The writer connection's SwimmerResolver, loaded once rather than per request.
+    It is reloaded when StatsTable.ChangeVersion shows a write it did not follow
+    (another process, or a request that changes swimmers without it). A request
+    hands it back with _keep_resolver() once its writes match the resolver; one
+    that raises never does, so a rolled-back request cannot leave it ahead of the table.
+    """
+    conn, resolver, version = _resolvers.pop(id(c.connection), (None, None, None))
+    if conn is not c.connection or version != _change_version(c):
+        return SwimmerResolver(c)
+    resolver.c = c
+    return resolver
+
+def _keep_resolver(c, resolver: SwimmerResolver):
+    _resolvers[id(c.connection)] = (c.connection, resolver, _change_version(c))
+
+def _change_version(c) -> int:
+    row = c.execute("SELECT ChangeVersion FROM StatsTable WHERE Id = 1").fetchone()
+    return row[0] if row else 0
+
+def close_writers():
+    """Finishes queued writes and stops every write queue."""
+    with _writers_lock:
+        writers = list(_writers.values())
+        _writers.clear()
+        _resolvers.clear()
+    for writer in writers:
+        writer.close()
+
+def _migrate_v1(c):
+    """Baseline schema. Every statement is idempotent so pre-versioning databases upgrade cleanly."""
     # Swimmer Table - for unique swimmer profiles
     c.execute('''
         CREATE TABLE IF NOT EXISTS SwimmerTable (
@@ -40,312 +215,2195 @@ def init_db():
         )
     ''')
 
-    # School Table - for pre-defined school names
+    # Swimmer Merge Table - maps duplicate/alias swimmer IDs onto one canonical swimmer
+    c.execute('''
+        CREATE TABLE IF NOT EXISTS SwimmerMergeTable (
+            AliasID TEXT PRIMARY KEY,
+            CanonicalID TEXT NOT NULL,
+            Score REAL,
+            Method TEXT,
+            CreatedAt TEXT DEFAULT CURRENT_TIMESTAMP
+        )
+    ''')
+    c.execute("CREATE INDEX IF NOT EXISTS idx_merge_canonical ON SwimmerMergeTable (CanonicalID)")
+    c.execute("CREATE INDEX IF NOT EXISTS idx_record_swimmer ON RecordTable (SwimmerUniqID)")
+
+    # Export Dirty Table - (season, stroke) partitions whose columnar snapshot is stale
+    c.execute('''
+        CREATE TABLE IF NOT EXISTS ExportDirtyTable (
+            Season INTEGER,
+            Stroke TEXT,
+            Marker INTEGER NOT NULL DEFAULT 0,
+            PRIMARY KEY (Season, Stroke)
+        )
+    ''')
+    _create_export_triggers(c, _INLINE_LAYOUT)
+
+    # School Table - for pre-defined school names
+    c.execute('''
+        CREATE TABLE IF NOT EXISTS SchoolTable (
+            ThaiSchool TEXT PRIMARY KEY,
+            ThaiAbridgeName TEXT,
+            EngAbridge TEXT,
+            SATITGAME TEXT
+        )
+    ''')
+
+    # Meta Table - small key/value store for bookkeeping such as the school file hash
+    c.execute('''
+        CREATE TABLE IF NOT EXISTS MetaTable (
+            Key TEXT PRIMARY KEY,
+            Value TEXT
+        )
+    ''')
+
+# How triggers reach a record's competition: stored inline on RecordTable before
+# schema v6, through CompetitionTable since. Migrations pass the layout of their time.
+_INLINE_LAYOUT = {
+    'records': "RecordTable",
+    'competition': "{0}.Competition",
+    'competition_date': "{0}.CompetitionDate",
+    'competition_key': "Competition",
+}
+_DIMENSION_LAYOUT = {
+    'records': "RecordView",
+    'competition': "(SELECT Name FROM CompetitionTable WHERE CompetitionID = {0}.CompetitionID)",
+    'competition_date': "(SELECT CompetitionDate FROM CompetitionTable WHERE CompetitionID = {0}.CompetitionID)",
+    'competition_key': "CompetitionID",
+}
+
+def _create_export_triggers(c, layout=_DIMENSION_LAYOUT):
+    """Marks snapshot partitions dirty whenever a record, swimmer or merge changes."""
+    _create_dirty_triggers(c, 'ExportDirtyTable', 'export', layout)
+
+def _create_dirty_triggers(c, table: str, prefix: str, layout=_DIMENSION_LAYOUT):
+    """
+    Marks (Season, Stroke) slices dirty in table whenever a record, swimmer or
+    merge changes. Triggers are named trg_{prefix}_*.
+    """
+    # Upserts rather than INSERT OR REPLACE: an outer statement's conflict policy
+    # overrides OR clauses inside triggers, but never an ON CONFLICT upsert.
+    # Bumping Marker lets the consumer spot slices re-marked while it was refreshing them.
+    bump = "ON CONFLICT (Season, Stroke) DO UPDATE SET Marker = Marker + 1;"
+    mark = f"INSERT INTO {table} (Season, Stroke, Marker) VALUES ({{season}}, {{stroke}}, 1) " + bump
+    mark_swimmer = f"""
+        INSERT INTO {table} (Season, Stroke, Marker)
+        SELECT DISTINCT {SEASON_SQL.format('R.CompetitionDate')}, {STROKE_SQL.format('R.Stroke')}, 1
+        FROM {layout['records']} AS R
+        WHERE R.SwimmerUniqID = {{0}}
+           OR R.SwimmerUniqID IN (SELECT AliasID FROM SwimmerMergeTable WHERE CanonicalID = {{0}})
+        {bump}
+    """
+    def mark_row(alias):
+        return mark.format(season=SEASON_SQL.format(layout['competition_date'].format(alias)), stroke=STROKE_SQL.format(f"{alias}.Stroke"))
+
+    triggers = {
+        f'trg_{prefix}_record_insert': f"AFTER INSERT ON RecordTable BEGIN {mark_row('NEW')} END",
+        f'trg_{prefix}_record_delete': f"AFTER DELETE ON RecordTable BEGIN {mark_row('OLD')} END",
+        f'trg_{prefix}_record_update': f"AFTER UPDATE ON RecordTable BEGIN {mark_row('OLD')} {mark_row('NEW')} END",
+        f'trg_{prefix}_swimmer_insert': f"AFTER INSERT ON SwimmerTable BEGIN {mark_swimmer.format('NEW.UniqID')} END",
+        f'trg_{prefix}_swimmer_update': f"AFTER UPDATE ON SwimmerTable BEGIN {mark_swimmer.format('NEW.UniqID')} END",
+        # The records stay behind, but lose the swimmer's gender and school
+        f'trg_{prefix}_swimmer_delete': f"AFTER DELETE ON SwimmerTable BEGIN {mark_swimmer.format('OLD.UniqID')} END",
+        f'trg_{prefix}_merge_insert': f"AFTER INSERT ON SwimmerMergeTable BEGIN {mark_swimmer.format('NEW.AliasID')} END",
+        f'trg_{prefix}_merge_delete': f"AFTER DELETE ON SwimmerMergeTable BEGIN {mark_swimmer.format('OLD.AliasID')} END",
+        # Re-pointing an alias (a merge of its canonical swimmer) moves its records
+        f'trg_{prefix}_merge_update': f"AFTER UPDATE ON SwimmerMergeTable BEGIN {mark_swimmer.format('OLD.AliasID')} "
+                                      f"{mark_swimmer.format('NEW.AliasID')} END",
+    }
+    for name, body in triggers.items():
+        c.execute(f"CREATE TRIGGER IF NOT EXISTS {name} {body}")
+
+def _migrate_v2(c):
+    """Trigger-maintained table statistics, backfilled from the existing rows."""
+    # Stats Table - a single row of running totals read by get_stats()
+    c.execute('''
+        CREATE TABLE IF NOT EXISTS StatsTable (
+            Id INTEGER PRIMARY KEY CHECK (Id = 1),
+            RecordCount INTEGER NOT NULL DEFAULT 0,
+            SwimmerCount INTEGER NOT NULL DEFAULT 0,
+            DistinctRecordSwimmers INTEGER NOT NULL DEFAULT 0,
+            DistinctCompetitions INTEGER NOT NULL DEFAULT 0,
+            LastIngestAt TEXT
+        )
+    ''')
+    # Stats Ref Count Table - records per swimmer/competition, so distinct counts update in O(1)
+    c.execute('''
+        CREATE TABLE IF NOT EXISTS StatsRefCountTable (
+            Kind TEXT,
+            Value TEXT,
+            N INTEGER NOT NULL,
+            PRIMARY KEY (Kind, Value)
+        ) WITHOUT ROWID
+    ''')
+    c.execute("INSERT OR IGNORE INTO StatsTable (Id) VALUES (1)")
+    _recount_stats(c, _INLINE_LAYOUT)
+    _create_stats_triggers(c, _INLINE_LAYOUT)
+
+    # Export dirty-marking moves from INSERT OR REPLACE to upserts with a Marker counter
+    columns = [row[1] for row in c.execute("PRAGMA table_info(ExportDirtyTable)")]
+    if 'Marker' not in columns:
+        c.execute("ALTER TABLE ExportDirtyTable ADD COLUMN Marker INTEGER NOT NULL DEFAULT 0")
+    for name in c.execute("SELECT name FROM sqlite_master WHERE type = 'trigger' AND name LIKE 'trg_export_%'").fetchall():
+        c.execute(f"DROP TRIGGER {name[0]}")
+    _create_export_triggers(c, _INLINE_LAYOUT)
+
+_STATS_DISTINCT_COLUMNS = {'swimmer': 'DistinctRecordSwimmers', 'competition': 'DistinctCompetitions'}
+
+def _recount_stats(c, layout=_DIMENSION_LAYOUT):
+    """Rebuilds StatsRefCountTable and the StatsTable totals from the tables, for writes the triggers did not see."""
+    records = layout['records']
+    c.execute("DELETE FROM StatsRefCountTable")
+    for kind, column in [('swimmer', 'SwimmerUniqID'), ('competition', 'Competition')]:
+        c.execute(f'''
+            INSERT INTO StatsRefCountTable (Kind, Value, N)
+            SELECT '{kind}', {column}, COUNT(*) FROM {records} WHERE {column} IS NOT NULL GROUP BY {column}
+        ''')
+    c.execute('''
+        UPDATE StatsTable SET
+            RecordCount = (SELECT COUNT(*) FROM RecordTable),
+            SwimmerCount = (SELECT COUNT(*) FROM SwimmerTable),
+            DistinctRecordSwimmers = (SELECT COUNT(*) FROM StatsRefCountTable WHERE Kind = 'swimmer'),
+            DistinctCompetitions = (SELECT COUNT(*) FROM StatsRefCountTable WHERE Kind = 'competition')
+        WHERE Id = 1
+    ''')
+
+def _create_stats_triggers(c, layout=_DIMENSION_LAYOUT):
+    """Keeps StatsTable current on every insert, update and delete."""
+    # (kind, expression for a record row) pairs whose distinct values StatsTable counts
+    refs = [('swimmer', "{0}.SwimmerUniqID"), ('competition', layout['competition'])]
+    key = layout['competition_key']
+
+    def add_refs(row):
+        sql = ""
+        for kind, expression in refs:
+            value = expression.format(row)
+            sql += f"""
+                INSERT INTO StatsRefCountTable (Kind, Value, N) SELECT '{kind}', {value}, 1 WHERE {value} IS NOT NULL
+                ON CONFLICT (Kind, Value) DO UPDATE SET N = N + 1;
+                UPDATE StatsTable SET {_STATS_DISTINCT_COLUMNS[kind]} = {_STATS_DISTINCT_COLUMNS[kind]} + 1
+                WHERE Id = 1 AND (SELECT N FROM StatsRefCountTable WHERE Kind = '{kind}' AND Value = {value}) = 1;
+            """
+        return sql
+
+    def remove_refs(row):
+        sql = ""
+        for kind, expression in refs:
+            value = expression.format(row)
+            sql += f"""
+                UPDATE StatsTable SET {_STATS_DISTINCT_COLUMNS[kind]} = {_STATS_DISTINCT_COLUMNS[kind]} - 1
+                WHERE Id = 1 AND (SELECT N FROM StatsRefCountTable WHERE Kind = '{kind}' AND Value = {value}) = 1;
+                UPDATE StatsRefCountTable SET N = N - 1 WHERE Kind = '{kind}' AND Value = {value};
+                DELETE FROM StatsRefCountTable WHERE Kind = '{kind}' AND Value = {value} AND N <= 0;
+            """
+        return sql
+
+    triggers = {
+        'trg_stats_record_insert': f"""AFTER INSERT ON RecordTable BEGIN
+            UPDATE StatsTable SET RecordCount = RecordCount + 1, LastIngestAt = strftime('%Y-%m-%dT%H:%M:%SZ', 'now') WHERE Id = 1;
+            {add_refs('NEW')}
+        END""",
+        'trg_stats_record_delete': f"""AFTER DELETE ON RecordTable BEGIN
+            UPDATE StatsTable SET RecordCount = RecordCount - 1 WHERE Id = 1;
+            {remove_refs('OLD')}
+        END""",
+        'trg_stats_record_update': f"""AFTER UPDATE OF SwimmerUniqID, {key} ON RecordTable
+        WHEN OLD.SwimmerUniqID IS NOT NEW.SwimmerUniqID OR OLD.{key} IS NOT NEW.{key} BEGIN
+            {remove_refs('OLD')}
+            {add_refs('NEW')}
+        END""",
+        'trg_stats_swimmer_insert': "AFTER INSERT ON SwimmerTable BEGIN UPDATE StatsTable SET SwimmerCount = SwimmerCount + 1 WHERE Id = 1; END",
+        'trg_stats_swimmer_delete': "AFTER DELETE ON SwimmerTable BEGIN UPDATE StatsTable SET SwimmerCount = SwimmerCount - 1 WHERE Id = 1; END",
+    }
+    for name, body in triggers.items():
+        c.execute(f"CREATE TRIGGER IF NOT EXISTS {name} {body}")
+
+def _migrate_v3(c):
+    """A change version bumped by every write, for cheap "has anything changed?" checks."""
+    columns = [row[1] for row in c.execute("PRAGMA table_info(StatsTable)")]
+    if 'ChangeVersion' not in columns:
+        c.execute("ALTER TABLE StatsTable ADD COLUMN ChangeVersion INTEGER NOT NULL DEFAULT 0")
+    _create_version_triggers(c)
+
+# Tables whose writes change what readers (e.g. the JSON API) would return
+_VERSIONED_TABLES = ['RecordTable', 'SwimmerTable', 'SwimmerMergeTable', 'SchoolTable']
+
+def _create_version_triggers(c, tables=_VERSIONED_TABLES):
+    """Bumps StatsTable.ChangeVersion on every insert, update and delete of a versioned table."""
+    for table in tables:
+        for event in ('INSERT', 'UPDATE', 'DELETE'):
+            c.execute(f'''
+                CREATE TRIGGER IF NOT EXISTS trg_version_{table.lower()}_{event.lower()} AFTER {event} ON {table}
+                BEGIN UPDATE StatsTable SET ChangeVersion = ChangeVersion + 1 WHERE Id = 1; END
+            ''')
+
+def _migrate_v4(c):
+    """Pool and an ISO SwimDate on every record, so rankings can be computed locally."""
+    columns = [row[1] for row in c.execute("PRAGMA table_info(RecordTable)")]
+    for column in ('Pool', 'SwimDate'):
+        if column not in columns:
+            c.execute(f"ALTER TABLE RecordTable ADD COLUMN {column} TEXT")
+    c.execute("CREATE INDEX IF NOT EXISTS idx_record_event ON RecordTable (Stroke, Distance, SwimDate)")
+    # One parse per distinct date string rather than per record
+    dates = [row[0] for row in c.execute("SELECT DISTINCT CompetitionDate FROM RecordTable WHERE SwimDate IS NULL")]
+    c.executemany(
+        "UPDATE RecordTable SET SwimDate = ? WHERE CompetitionDate = ? AND SwimDate IS NULL",
+        [(thai_date_to_iso(d), d) for d in dates if thai_date_to_iso(d)]
+    )
+
+def _migrate_v5(c):
+    """Scrape coverage: which (event, age band, window) boxes were fetched, and their records."""
+    c.execute('''
+        CREATE TABLE IF NOT EXISTS ScrapeCoverageTable (
+            CoverageID INTEGER PRIMARY KEY,
+            Stroke TEXT,
+            Distance TEXT,
+            Gender TEXT,
+            Pool TEXT,
+            MinAge INTEGER,
+            MaxAge INTEGER,
+            StartDate TEXT,
+            EndDate TEXT,
+            FetchedAt TEXT,
+            Rows INTEGER,
+            UNIQUE (Stroke, Distance, Gender, Pool, MinAge, MaxAge, StartDate, EndDate)
+        )
+    ''')
+    # A swim keeps the Age of whichever box stored it first, so each box lists its records explicitly
+    c.execute('''
+        CREATE TABLE IF NOT EXISTS ScrapeCoverageRecordTable (
+            CoverageID INTEGER,
+            UniqueID TEXT,
+            PRIMARY KEY (CoverageID, UniqueID)
+        ) WITHOUT ROWID
+    ''')
+
+def _migrate_v6(c):
+    """
+    Competition and club dimension tables with integer keys. RecordTable is
+    rebuilt to hold only CompetitionID/ClubID; RecordView joins the names back
+    for readers that want the original column layout.
+    """
+    # Competition Table - one row per (name, start date) as the site reports it
+    c.execute('''
+        CREATE TABLE IF NOT EXISTS CompetitionTable (
+            CompetitionID INTEGER PRIMARY KEY,
+            Name TEXT,
+            CompetitionDate TEXT,
+            UNIQUE (Name, CompetitionDate)
+        )
+    ''')
+    # Club Table - one row per club name
+    c.execute('''
+        CREATE TABLE IF NOT EXISTS ClubTable (
+            ClubID INTEGER PRIMARY KEY,
+            Name TEXT UNIQUE
+        )
+    ''')
+    c.execute('''
+        INSERT OR IGNORE INTO CompetitionTable (Name, CompetitionDate)
+        SELECT DISTINCT Competition, CompetitionDate FROM RecordTable
+        WHERE Competition IS NOT NULL OR CompetitionDate IS NOT NULL
+    ''')
+    c.execute("INSERT OR IGNORE INTO ClubTable (Name) SELECT DISTINCT Club FROM RecordTable WHERE Club IS NOT NULL")
+
+    # Every trigger reads the old columns, so they go before the rebuild and come back after it
+    for name in c.execute("SELECT name FROM sqlite_master WHERE type = 'trigger'").fetchall():
+        c.execute(f"DROP TRIGGER {name[0]}")
+    c.execute('''
+        CREATE TABLE RecordTable_v6 (
+            UniqueID TEXT PRIMARY KEY,
+            SwimmerUniqID TEXT,
+            Name TEXT,
+            Age TEXT,
+            Stroke TEXT,
+            Distance TEXT,
+            Time TEXT,
+            CompetitionID INTEGER,
+            ClubID INTEGER,
+            Nationality TEXT,
+            Pool TEXT,
+            SwimDate TEXT,
+            FOREIGN KEY (SwimmerUniqID) REFERENCES SwimmerTable (UniqID),
+            FOREIGN KEY (CompetitionID) REFERENCES CompetitionTable (CompetitionID),
+            FOREIGN KEY (ClubID) REFERENCES ClubTable (ClubID)
+        )
+    ''')
+    c.execute('''
+        INSERT INTO RecordTable_v6
+        SELECT R.UniqueID, R.SwimmerUniqID, R.Name, R.Age, R.Stroke, R.Distance, R.Time,
+            Co.CompetitionID, Cl.ClubID, R.Nationality, R.Pool, R.SwimDate
+        FROM RecordTable AS R
+        LEFT JOIN CompetitionTable AS Co ON Co.Name IS R.Competition AND Co.CompetitionDate IS R.CompetitionDate
+        LEFT JOIN ClubTable AS Cl ON Cl.Name = R.Club
+    ''')
+    c.execute("DROP TABLE RecordTable")
+    c.execute("ALTER TABLE RecordTable_v6 RENAME TO RecordTable")
+    c.execute("CREATE INDEX IF NOT EXISTS idx_record_swimmer ON RecordTable (SwimmerUniqID)")
+    c.execute("CREATE INDEX IF NOT EXISTS idx_record_event ON RecordTable (Stroke, Distance, SwimDate)")
+    c.execute("CREATE INDEX IF NOT EXISTS idx_record_competition ON RecordTable (CompetitionID)")
+
+    # Record View - RecordTable with competition and club names, in the pre-v6 column layout
+    c.execute('''
+        CREATE VIEW IF NOT EXISTS RecordView AS
+        SELECT
+            R.UniqueID, R.SwimmerUniqID, R.Name, R.Age, R.Stroke, R.Distance, R.Time,
+            Co.Name AS Competition, Co.CompetitionDate, Cl.Name AS Club, R.Nationality,
+            R.Pool, R.SwimDate, R.CompetitionID, R.ClubID
+        FROM RecordTable AS R
+        LEFT JOIN CompetitionTable AS Co ON Co.CompetitionID = R.CompetitionID
+        LEFT JOIN ClubTable AS Cl ON Cl.ClubID = R.ClubID
+    ''')
+    _create_export_triggers(c)
+    _create_stats_triggers(c)
+    _create_version_triggers(c)
+
+def _clean(value):
+    """None for missing values, including the NaN pandas uses for empty cells."""
+    return None if value is None or (isinstance(value, float) and pd.isna(value)) else value
+
+# Bumped whenever record_key() changes what it hashes; part of every hashed tuple
+RECORD_KEY_VERSION = 1
+# A control character never found in scraped text, so no two field splits join alike
+_KEY_SEPARATOR = "\x1f"
+
+def record_key(swimmer_id, competition, competition_date, stroke, distance, time) -> int:
+    """
+    The RecordTable key of a swim: an 8-byte BLAKE2b digest of the versioned,
+    delimited fields as a signed 64-bit integer (SQLite's INTEGER range).
+    Missing fields (None or NaN) hash as empty strings.
+    """
+    fields = [str(RECORD_KEY_VERSION)] + ["" if _clean(v) is None else str(v)
+                                          for v in (swimmer_id, competition, competition_date, stroke, distance, time)]
+    digest = hashlib.blake2b(_KEY_SEPARATOR.join(fields).encode('utf-8'), digest_size=8).digest()
+    return int.from_bytes(digest, 'big', signed=True)
+
+def _competition_id(c, name, competition_date, cache: dict):
+    """The CompetitionID for a name and date, adding the competition if it is new."""
+    name, competition_date = _clean(name), _clean(competition_date)
+    if name is None and competition_date is None:
+        return None
+    key = ('competition', name, competition_date)
+    if key not in cache:
+        row = c.execute("SELECT CompetitionID FROM CompetitionTable WHERE Name IS ? AND CompetitionDate IS ?",
+                        (name, competition_date)).fetchone()
+        if row is None:
+            c.execute("INSERT INTO CompetitionTable (Name, CompetitionDate) VALUES (?, ?)", (name, competition_date))
+            cache[key] = c.lastrowid
+        else:
+            cache[key] = row[0]
+    return cache[key]
+
+def _club_id(c, name, cache: dict):
+    """The ClubID for a club name, adding the club if it is new."""
+    name = _clean(name)
+    if name is None:
+        return None
+    key = ('club', name)
+    if key not in cache:
+        c.execute("INSERT OR IGNORE INTO ClubTable (Name) VALUES (?)", (name,))
+        cache[key] = c.execute("SELECT ClubID FROM ClubTable WHERE Name = ?", (name,)).fetchone()[0]
+    return cache[key]
+
+# Tables whose row changes go to ChangeLogTable, with the column that keys a row
+_LOGGED_TABLES = {'RecordTable': 'UniqueID', 'SwimmerTable': 'UniqID', 'SwimmerMergeTable': 'AliasID'}
+
+def _migrate_v7(c):
+    """Change log: an append-only (sequence, table, key, op, columns) row per change."""
+    c.execute('''
+        CREATE TABLE IF NOT EXISTS ChangeLogTable (
+            Seq INTEGER PRIMARY KEY AUTOINCREMENT,
+            TableName TEXT NOT NULL,
+            RowKey TEXT NOT NULL,
+            Op TEXT NOT NULL,
+            Columns TEXT,
+            ChangedAt TEXT DEFAULT CURRENT_TIMESTAMP
+        )
+    ''')
+    c.execute("CREATE INDEX IF NOT EXISTS idx_changelog_row ON ChangeLogTable (TableName, RowKey)")
+    _create_change_log_triggers(c)
+
+def _create_change_log_triggers(c):
+    """
+    Appends to ChangeLogTable inside the writing transaction. Updates record only
+    the columns whose value changed, and updates that change nothing (such as
+    sync_swimmers rewriting every row) are not logged at all.
+    """
+    for table, key in _LOGGED_TABLES.items():
+        columns = [row[1] for row in c.execute(f"PRAGMA table_info({table})") if row[1] != key]
+        changed = " || ".join(f"CASE WHEN OLD.{col} IS NOT NEW.{col} THEN ',{col}' ELSE '' END" for col in columns)
+        any_changed = " OR ".join(f"OLD.{col} IS NOT NEW.{col}" for col in [key, *columns])
+        log = "INSERT INTO ChangeLogTable (TableName, RowKey, Op, Columns) SELECT"
+        triggers = {
+            'insert': f"AFTER INSERT ON {table} BEGIN {log} '{table}', NEW.{key}, 'insert', NULL; END",
+            'delete': f"AFTER DELETE ON {table} BEGIN {log} '{table}', OLD.{key}, 'delete', NULL; END",
+            # A changed key reads as the old row going and a new one arriving
+            'update': f"""AFTER UPDATE ON {table} WHEN {any_changed} BEGIN
+                {log} '{table}', OLD.{key}, 'delete', NULL WHERE OLD.{key} IS NOT NEW.{key};
+                {log} '{table}', NEW.{key}, 'insert', NULL WHERE OLD.{key} IS NOT NEW.{key};
+                {log} '{table}', NEW.{key}, 'update', substr({changed}, 2) WHERE OLD.{key} IS NEW.{key};
+            END""",
+        }
+        for event, body in triggers.items():
+            c.execute(f"CREATE TRIGGER IF NOT EXISTS trg_changelog_{table.lower()}_{event} {body}")
+
+def _migrate_v8(c):
+    """Qualifying standards and the cached best qualifying swim per swimmer and standard."""
+    c.execute('''
+        CREATE TABLE IF NOT EXISTS StandardTable (
+            StandardID INTEGER PRIMARY KEY,
+            Standard TEXT NOT NULL,
+            Stroke TEXT NOT NULL,
+            Distance TEXT NOT NULL,
+            Gender TEXT NOT NULL,
+            Pool TEXT NOT NULL,
+            MinAge INTEGER NOT NULL,
+            MaxAge INTEGER NOT NULL,
+            CutTime TEXT NOT NULL,
+            CutSeconds REAL NOT NULL,
+            UNIQUE (Standard, Stroke, Distance, Gender, Pool, MinAge, MaxAge)
+        )
+    ''')
+    c.execute('''
+        CREATE TABLE IF NOT EXISTS QualificationTable (
+            SwimmerUniqID TEXT NOT NULL,
+            StandardID INTEGER NOT NULL,
+            BestUniqueID TEXT NOT NULL,
+            Time TEXT,
+            Seconds REAL,
+            Margin REAL,
+            SwimDate TEXT,
+            PRIMARY KEY (SwimmerUniqID, StandardID)
+        ) WITHOUT ROWID
+    ''')
+    c.execute("CREATE INDEX IF NOT EXISTS idx_qualification_best ON QualificationTable (BestUniqueID)")
+
+def _trigram_tokenizer_available(c) -> bool:
+    """FTS5's trigram tokenizer needs SQLite 3.34+ built with FTS5."""
+    try:
+        c.execute("CREATE VIRTUAL TABLE temp.TrigramProbe USING fts5(Text, tokenize = 'trigram')")
+        c.execute("DROP TABLE temp.TrigramProbe")
+        return True
+    except sqlite3.OperationalError:
+        return False
+
+def _migrate_v9(c):
+    """
+    Trigram search indexes over swimmer names and clubs and competition names,
+    kept in step by triggers. Without FTS5 trigram support the searches fall back
+    to LIKE scans.
+    """
+    if not _trigram_tokenizer_available(c):
+        print("[DEBUG] SQLite has no FTS5 trigram tokenizer; name search will use LIKE scans.")
+        return
+    c.execute("CREATE VIRTUAL TABLE IF NOT EXISTS SwimmerSearchTable USING fts5(UniqID UNINDEXED, Name, Club, tokenize = 'trigram')")
+    c.execute("INSERT INTO SwimmerSearchTable (UniqID, Name, Club) SELECT UniqID, Name, Club FROM SwimmerTable")
+    # Keyed on CompetitionID through the rowid
+    c.execute("CREATE VIRTUAL TABLE IF NOT EXISTS CompetitionSearchTable USING fts5(Name, tokenize = 'trigram')")
+    c.execute("INSERT INTO CompetitionSearchTable (rowid, Name) SELECT CompetitionID, Name FROM CompetitionTable WHERE Name IS NOT NULL")
+
+    _create_search_triggers(c)
+
+def _create_search_triggers(c):
+    """Keeps the trigram search tables in step with SwimmerTable and CompetitionTable."""
+    triggers = {
+        'trg_search_swimmer_insert': """AFTER INSERT ON SwimmerTable BEGIN
+            INSERT INTO SwimmerSearchTable (UniqID, Name, Club) VALUES (NEW.UniqID, NEW.Name, NEW.Club); END""",
+        'trg_search_swimmer_delete': """AFTER DELETE ON SwimmerTable BEGIN
+            DELETE FROM SwimmerSearchTable WHERE UniqID = OLD.UniqID; END""",
+        'trg_search_swimmer_update': """AFTER UPDATE OF UniqID, Name, Club ON SwimmerTable
+            WHEN OLD.UniqID IS NOT NEW.UniqID OR OLD.Name IS NOT NEW.Name OR OLD.Club IS NOT NEW.Club BEGIN
+            DELETE FROM SwimmerSearchTable WHERE UniqID = OLD.UniqID;
+            INSERT INTO SwimmerSearchTable (UniqID, Name, Club) VALUES (NEW.UniqID, NEW.Name, NEW.Club); END""",
+        'trg_search_competition_insert': """AFTER INSERT ON CompetitionTable WHEN NEW.Name IS NOT NULL BEGIN
+            INSERT INTO CompetitionSearchTable (rowid, Name) VALUES (NEW.CompetitionID, NEW.Name); END""",
+        'trg_search_competition_delete': """AFTER DELETE ON CompetitionTable BEGIN
+            DELETE FROM CompetitionSearchTable WHERE rowid = OLD.CompetitionID; END""",
+        'trg_search_competition_update': """AFTER UPDATE OF Name ON CompetitionTable WHEN OLD.Name IS NOT NEW.Name BEGIN
+            DELETE FROM CompetitionSearchTable WHERE rowid = OLD.CompetitionID;
+            INSERT INTO CompetitionSearchTable (rowid, Name) SELECT NEW.CompetitionID, NEW.Name WHERE NEW.Name IS NOT NULL; END""",
+    }
+    for name, body in triggers.items():
+        c.execute(f"CREATE TRIGGER IF NOT EXISTS {name} {body}")
+
+def _migrate_v10(c):
+    """
+    Ranking snapshots: the site's ranking for one (event, age band) at each
+    scrape, stored as a full keyframe every KEYFRAME_INTERVAL snapshots and as
+    the entries that changed in between.
+    """
+    c.execute('''
+        CREATE TABLE IF NOT EXISTS RankingSeriesTable (
+            SeriesID INTEGER PRIMARY KEY,
+            Stroke TEXT,
+            Distance TEXT,
+            Gender TEXT,
+            Pool TEXT,
+            AgeRange TEXT,
+            UNIQUE (Stroke, Distance, Gender, Pool, AgeRange)
+        )
+    ''')
+    c.execute('''
+        CREATE TABLE IF NOT EXISTS RankingSnapshotTable (
+            SnapshotID INTEGER PRIMARY KEY,
+            SeriesID INTEGER NOT NULL REFERENCES RankingSeriesTable (SeriesID),
+            TakenAt TEXT NOT NULL,
+            IsKeyframe INTEGER NOT NULL,
+            Entries INTEGER NOT NULL
+        )
+    ''')
+    c.execute("CREATE INDEX IF NOT EXISTS idx_snapshot_series ON RankingSnapshotTable (SeriesID, SnapshotID)")
+    # A NULL Rank in a delta means the swimmer dropped out of the ranking
+    c.execute('''
+        CREATE TABLE IF NOT EXISTS RankingEntryTable (
+            SnapshotID INTEGER NOT NULL,
+            SwimmerUniqID TEXT NOT NULL,
+            Rank INTEGER,
+            PRIMARY KEY (SnapshotID, SwimmerUniqID)
+        ) WITHOUT ROWID
+    ''')
+    c.execute("CREATE INDEX IF NOT EXISTS idx_entry_swimmer ON RankingEntryTable (SwimmerUniqID, SnapshotID)")
+    # A new snapshot changes rank history even when every scraped record was already stored
+    _create_version_triggers(c, ['RankingSnapshotTable'])
+
+def _migrate_v11(c):
+    """
+    A team performance cube: per school or club, season, stroke, distance,
+    gender and age band, the swim and swimmer counts and best and median times.
+    Triggers mark (Season, Stroke) slices dirty; refresh_team_cube() rebuilds them.
+    """
+    c.execute('''
+        CREATE TABLE IF NOT EXISTS TeamCubeDirtyTable (
+            Season INTEGER,
+            Stroke TEXT,
+            Marker INTEGER NOT NULL DEFAULT 0,
+            PRIMARY KEY (Season, Stroke)
+        )
+    ''')
+    c.execute('''
+        CREATE TABLE IF NOT EXISTS TeamCubeTable (
+            TeamKind TEXT NOT NULL,
+            Team TEXT NOT NULL,
+            Season INTEGER NOT NULL,
+            Stroke TEXT NOT NULL,
+            Distance TEXT NOT NULL,
+            Gender TEXT NOT NULL,
+            AgeBand TEXT NOT NULL,
+            Records INTEGER NOT NULL,
+            Swimmers INTEGER NOT NULL,
+            BestSeconds REAL,
+            BestTime TEXT,
+            MedianSeconds REAL,
+            PRIMARY KEY (TeamKind, Team, Season, Stroke, Distance, Gender, AgeBand)
+        ) WITHOUT ROWID
+    ''')
+    c.execute("CREATE INDEX IF NOT EXISTS idx_teamcube_slice ON TeamCubeTable (Season, Stroke)")
+    c.execute("CREATE INDEX IF NOT EXISTS idx_teamcube_event ON TeamCubeTable (TeamKind, Season, Stroke, Distance, Gender, AgeBand)")
+    _create_dirty_triggers(c, 'TeamCubeDirtyTable', 'cube')
+    # Every existing slice starts dirty, so the first refresh builds the whole cube
+    c.execute(f"""
+        INSERT OR IGNORE INTO TeamCubeDirtyTable (Season, Stroke, Marker)
+        SELECT DISTINCT {SEASON_SQL.format('CompetitionDate')}, {STROKE_SQL.format('Stroke')}, 1 FROM RecordView
+    """)
+
+def _migrate_v12(c):
+    """
+    Integer record keys: RecordTable.UniqueID becomes record_key() of the
+    record's fields, an INTEGER PRIMARY KEY that is the table's rowid instead of
+    a 40-character hex SHA-1 with its own index. Every table holding record keys
+    (coverage, qualifications, change log) is rewritten to the new keys.
+    """
+    key_map = [
+        (old_id, record_key(swimmer_id, competition, competition_date, stroke, distance, time))
+        for old_id, swimmer_id, competition, competition_date, stroke, distance, time in c.execute(
+            "SELECT UniqueID, SwimmerUniqID, Competition, CompetitionDate, Stroke, Distance, Time FROM RecordView")
+    ]
+    c.execute("CREATE TEMP TABLE RecordKeyMap (OldID TEXT PRIMARY KEY, NewID INTEGER NOT NULL)")
+    c.executemany("INSERT INTO temp.RecordKeyMap (OldID, NewID) VALUES (?, ?)", key_map)
+    # Keys that differed only in how missing fields were spelled now coincide; the first row is kept
+    # and the others are dropped, so their slices and the change log have to hear about it
+    c.execute(f'''
+        CREATE TEMP TABLE DroppedRecords AS
+        SELECT OldID, Season, Stroke FROM (
+            SELECT R.UniqueID AS OldID, {SEASON_SQL.format('Co.CompetitionDate')} AS Season, {STROKE_SQL.format('R.Stroke')} AS Stroke,
+                ROW_NUMBER() OVER (PARTITION BY K.NewID ORDER BY R.rowid) AS N
+            FROM RecordTable AS R
+            JOIN temp.RecordKeyMap AS K ON K.OldID = R.UniqueID
+            LEFT JOIN CompetitionTable AS Co ON Co.CompetitionID = R.CompetitionID
+        ) WHERE N > 1
+    ''')
+
+    # As in v6, every trigger and the view read RecordTable, so they go before the rebuild and come back after it
+    for name in c.execute("SELECT name FROM sqlite_master WHERE type = 'trigger'").fetchall():
+        c.execute(f"DROP TRIGGER {name[0]}")
+    c.execute("DROP VIEW IF EXISTS RecordView")
+
+    c.execute('''
+        CREATE TABLE RecordTable_v12 (
+            UniqueID INTEGER PRIMARY KEY,
+            SwimmerUniqID TEXT,
+            Name TEXT,
+            Age TEXT,
+            Stroke TEXT,
+            Distance TEXT,
+            Time TEXT,
+            CompetitionID INTEGER,
+            ClubID INTEGER,
+            Nationality TEXT,
+            Pool TEXT,
+            SwimDate TEXT,
+            FOREIGN KEY (SwimmerUniqID) REFERENCES SwimmerTable (UniqID),
+            FOREIGN KEY (CompetitionID) REFERENCES CompetitionTable (CompetitionID),
+            FOREIGN KEY (ClubID) REFERENCES ClubTable (ClubID)
+        )
+    ''')
+    c.execute('''
+        INSERT OR IGNORE INTO RecordTable_v12
+        SELECT K.NewID, R.SwimmerUniqID, R.Name, R.Age, R.Stroke, R.Distance, R.Time,
+            R.CompetitionID, R.ClubID, R.Nationality, R.Pool, R.SwimDate
+        FROM RecordTable AS R JOIN temp.RecordKeyMap AS K ON K.OldID = R.UniqueID
+        ORDER BY R.rowid
+    ''')
+    c.execute("DROP TABLE RecordTable")
+    c.execute("ALTER TABLE RecordTable_v12 RENAME TO RecordTable")
+    c.execute("CREATE INDEX IF NOT EXISTS idx_record_swimmer ON RecordTable (SwimmerUniqID)")
+    c.execute("CREATE INDEX IF NOT EXISTS idx_record_event ON RecordTable (Stroke, Distance, SwimDate)")
+    c.execute("CREATE INDEX IF NOT EXISTS idx_record_competition ON RecordTable (CompetitionID)")
+    c.execute('''
+        CREATE VIEW IF NOT EXISTS RecordView AS
+        SELECT
+            R.UniqueID, R.SwimmerUniqID, R.Name, R.Age, R.Stroke, R.Distance, R.Time,
+            Co.Name AS Competition, Co.CompetitionDate, Cl.Name AS Club, R.Nationality,
+            R.Pool, R.SwimDate, R.CompetitionID, R.ClubID
+        FROM RecordTable AS R
+        LEFT JOIN CompetitionTable AS Co ON Co.CompetitionID = R.CompetitionID
+        LEFT JOIN ClubTable AS Cl ON Cl.ClubID = R.ClubID
+    ''')
+
+    c.execute('''
+        CREATE TABLE ScrapeCoverageRecordTable_v12 (
+            CoverageID INTEGER,
+            UniqueID INTEGER,
+            PRIMARY KEY (CoverageID, UniqueID)
+        ) WITHOUT ROWID
+    ''')
+    c.execute('''
+        INSERT OR IGNORE INTO ScrapeCoverageRecordTable_v12
+        SELECT S.CoverageID, K.NewID FROM ScrapeCoverageRecordTable AS S JOIN temp.RecordKeyMap AS K ON K.OldID = S.UniqueID
+    ''')
+    c.execute("DROP TABLE ScrapeCoverageRecordTable")
+    c.execute("ALTER TABLE ScrapeCoverageRecordTable_v12 RENAME TO ScrapeCoverageRecordTable")
+
+    c.execute('''
+        CREATE TABLE QualificationTable_v12 (
+            SwimmerUniqID TEXT NOT NULL,
+            StandardID INTEGER NOT NULL,
+            BestUniqueID INTEGER NOT NULL,
+            Time TEXT,
+            Seconds REAL,
+            Margin REAL,
+            SwimDate TEXT,
+            PRIMARY KEY (SwimmerUniqID, StandardID)
+        ) WITHOUT ROWID
+    ''')
+    c.execute('''
+        INSERT INTO QualificationTable_v12
+        SELECT Q.SwimmerUniqID, Q.StandardID, K.NewID, Q.Time, Q.Seconds, Q.Margin, Q.SwimDate
+        FROM QualificationTable AS Q JOIN temp.RecordKeyMap AS K ON K.OldID = Q.BestUniqueID
+    ''')
+    c.execute("DROP TABLE QualificationTable")
+    c.execute("ALTER TABLE QualificationTable_v12 RENAME TO QualificationTable")
+    c.execute("CREATE INDEX IF NOT EXISTS idx_qualification_best ON QualificationTable (BestUniqueID)")
+
+    # RowKey loses its TEXT affinity so record keys stay integers next to text swimmer IDs.
+    # Entries for records deleted before (or dropped by) the migration keep their old hex key.
+    next_seq = c.execute("SELECT seq FROM sqlite_sequence WHERE name = 'ChangeLogTable'").fetchone()
+    c.execute('''
+        CREATE TABLE ChangeLogTable_v12 (
+            Seq INTEGER PRIMARY KEY AUTOINCREMENT,
+            TableName TEXT NOT NULL,
+            RowKey NOT NULL,
+            Op TEXT NOT NULL,
+            Columns TEXT,
+            ChangedAt TEXT DEFAULT CURRENT_TIMESTAMP
+        )
+    ''')
+    c.execute('''
+        INSERT INTO ChangeLogTable_v12 (Seq, TableName, RowKey, Op, Columns, ChangedAt)
+        SELECT L.Seq, L.TableName, COALESCE(K.NewID, L.RowKey), L.Op, L.Columns, L.ChangedAt
+        FROM ChangeLogTable AS L
+        LEFT JOIN temp.RecordKeyMap AS K ON L.TableName = 'RecordTable' AND K.OldID = L.RowKey
+            AND K.OldID NOT IN (SELECT OldID FROM temp.DroppedRecords)
+    ''')
+    c.execute("DROP TABLE ChangeLogTable")
+    c.execute("ALTER TABLE ChangeLogTable_v12 RENAME TO ChangeLogTable")
+    if next_seq is not None:
+        # Sequence numbers are never reused, even those of compacted-away entries
+        c.execute("UPDATE sqlite_sequence SET seq = MAX(seq, ?) WHERE name = 'ChangeLogTable'", (next_seq[0],))
+        if c.rowcount == 0:
+            c.execute("INSERT INTO sqlite_sequence (name, seq) VALUES ('ChangeLogTable', ?)", (next_seq[0],))
+    c.execute("CREATE INDEX IF NOT EXISTS idx_changelog_row ON ChangeLogTable (TableName, RowKey)")
+    c.execute("INSERT INTO ChangeLogTable (TableName, RowKey, Op) SELECT 'RecordTable', OldID, 'delete' FROM temp.DroppedRecords")
+    c.execute('''
+        INSERT INTO TeamCubeDirtyTable (Season, Stroke, Marker)
+        SELECT DISTINCT Season, Stroke, 1 FROM temp.DroppedRecords WHERE 1
+        ON CONFLICT (Season, Stroke) DO UPDATE SET Marker = Marker + 1
+    ''')
+    c.execute("DROP TABLE temp.RecordKeyMap")
+    c.execute("DROP TABLE temp.DroppedRecords")
+    _recount_stats(c)
+
+    _create_export_triggers(c)
+    _create_stats_triggers(c)
+    _create_version_triggers(c, _VERSIONED_TABLES + ['RankingSnapshotTable'])
+    _create_change_log_triggers(c)
+    if _has_table(c, 'SwimmerSearchTable'):
+        _create_search_triggers(c)
+    _create_dirty_triggers(c, 'TeamCubeDirtyTable', 'cube')
+    # The Parquet snapshots hold the old string keys
+    c.execute(f"""
+        INSERT INTO ExportDirtyTable (Season, Stroke, Marker)
+        SELECT DISTINCT {SEASON_SQL.format('CompetitionDate')}, {STROKE_SQL.format('Stroke')}, 1 FROM RecordView WHERE 1
+        ON CONFLICT (Season, Stroke) DO UPDATE SET Marker = Marker + 1
+    """)
+    c.execute("INSERT OR REPLACE INTO MetaTable (Key, Value) VALUES ('record_key_version', ?)", (str(RECORD_KEY_VERSION),))
+
+def _migrate_v13(c):
+    """
+    Per-swimmer progression: every timed swim of a canonical swimmer in event
+    order, with the personal best to date, improvement and rolling trend. Kept
+    current from the change log like QualificationTable; the first refresh
+    builds it (no 'progression_seq' in MetaTable yet).
+    """
+    # Clustered on the swimmer, so a profile is one range read of the primary key
+    c.execute('''
+        CREATE TABLE IF NOT EXISTS ProgressionTable (
+            SwimmerUniqID TEXT NOT NULL,
+            UniqueID INTEGER NOT NULL,
+            Stroke TEXT,
+            Distance TEXT,
+            Pool TEXT,
+            Swim INTEGER NOT NULL,
+            SwimDate TEXT,
+            Competition TEXT,
+            Time TEXT,
+            Seconds REAL,
+            BestSeconds REAL,
+            BestTime TEXT,
+            IsPB INTEGER NOT NULL,
+            Improvement REAL,
+            Delta REAL,
+            Trend REAL,
+            PRIMARY KEY (SwimmerUniqID, UniqueID)
+        ) WITHOUT ROWID
+    ''')
+    c.execute("CREATE INDEX IF NOT EXISTS idx_progression_record ON ProgressionTable (UniqueID)")
+    # The API serves progression, which lands after the record writes that already bumped the version
+    _create_version_triggers(c, ['ProgressionTable'])
+
+def _migrate_v14(c):
+    """
+    Course conversion factors for seed times: a swim in FromPool times Factor
+    is its equivalent in ToPool, per stroke and distance.
+    """
+    c.execute('''
+        CREATE TABLE IF NOT EXISTS CourseConversionTable (
+            Stroke TEXT NOT NULL,
+            Distance TEXT NOT NULL,
+            FromPool TEXT NOT NULL,
+            ToPool TEXT NOT NULL,
+            Factor REAL NOT NULL,
+            PRIMARY KEY (Stroke, Distance, FromPool, ToPool)
+        ) WITHOUT ROWID
+    ''')
+
+def _migrate_v15(c):
+    """
+    The resolver's birth-year estimate (from the age at each competition) is
+    kept on SwimmerTable, so same-name children stay apart across ingests and
+    not only within one batch. Existing swimmers get the years all their
+    records agree on; conflicting records leave the estimate empty.
+    """
+    columns = {row[1] for row in c.execute("PRAGMA table_info(SwimmerTable)")}
+    for column in ('BirthYearMin', 'BirthYearMax'):
+        if column not in columns:
+            c.execute(f"ALTER TABLE SwimmerTable ADD COLUMN {column} INTEGER")
+
+    ranges = {}
+    for uniq_id, age, date in c.execute("SELECT SwimmerUniqID, Age, CompetitionDate FROM RecordView").fetchall():
+        years = birth_year_range(age, date)
+        if years is None:
+            continue
+        first, last = ranges.get(uniq_id, years)
+        ranges[uniq_id] = (max(first, years[0]), min(last, years[1]))
+    c.executemany("UPDATE SwimmerTable SET BirthYearMin = ?, BirthYearMax = ? WHERE UniqID = ?",
+                  [(first, last, uniq_id) for uniq_id, (first, last) in ranges.items() if first <= last])
+
+def _migrate_v16(c):
+    """
+    Snapshot partitions and team cube slices are also marked dirty when a
+    swimmer is deleted or an alias is re-pointed to another canonical swimmer.
+    """
+    _create_export_triggers(c)
+    _create_dirty_triggers(c, 'TeamCubeDirtyTable', 'cube')
+
+# (version, migration) pairs applied in order by init_db
+_MIGRATIONS = [
+    (1, _migrate_v1),
+    (2, _migrate_v2),
+    (3, _migrate_v3),
+    (4, _migrate_v4),
+    (5, _migrate_v5),
+    (6, _migrate_v6),
+    (7, _migrate_v7),
+    (8, _migrate_v8),
+    (9, _migrate_v9),
+    (10, _migrate_v10),
+    (11, _migrate_v11),
+    (12, _migrate_v12),
+    (13, _migrate_v13),
+    (14, _migrate_v14),
+    (15, _migrate_v15),
+    (16, _migrate_v16),
+]
+
+def refresh_school_data(file_path=SCHOOL_FILE, force: bool = False) -> bool:
+    """
+    Re-populates SchoolTable from the specified file when its content hash has
+    changed since the last load (or when forced). The delete and re-insert happen
+    in one transaction. Returns True if the table was reloaded.
+    """
+    abs_file_path = os.path.join(os.path.dirname(__file__), file_path)
+    try:
+        with open(abs_file_path, 'rb') as f:
+            content = f.read()
+    except FileNotFoundError:
+        print(f"[ERROR] SchoolName.txt not found at {abs_file_path}. SchoolTable not populated.")
+        return False
+    content_hash = hashlib.sha256(content).hexdigest()
+
+    try:
+        return _writer().submit(_refresh_school_data, abs_file_path, content_hash, force)
+    except Exception as e:
+        print(f"[ERROR] Error populating SchoolTable: {e}")
+        return False
+
+def _refresh_school_data(c, file_path, content_hash: str, force: bool) -> bool:
+    c.execute("SELECT Value FROM MetaTable WHERE Key = 'school_file_sha256'")
+    stored = c.fetchone()
+    if not force and stored and stored[0] == content_hash:
+        return False
+    print(f"[DEBUG] Refreshing SchoolTable from: {file_path}")
+    c.execute("DELETE FROM SchoolTable")
+    populate_school_table(file_path, cursor=c)
+    c.execute("INSERT OR REPLACE INTO MetaTable (Key, Value) VALUES ('school_file_sha256', ?)", (content_hash,))
+    print("[DEBUG] SchoolTable refreshed.")
+    return True
+
+def _parse_school_file(file_path) -> list:
+    """Parses schoolname.txt into (ThaiSchool, ThaiAbridgeName, EngAbridge, SATITGAME) rows."""
+    rows = []
+    with open(file_path, 'r', encoding='utf-8') as f:
+        # Skip header line (assuming first line is header 'Item ThaiSchool ...')
+        lines = f.readlines()[1:]
+    for line in lines:
+        parts = line.strip().split(maxsplit=4) # Split into max 5 parts
+        if len(parts) >= 5: # Ensure we have enough parts
+            # Item, ThaiSchool, ThaiAbridgeName, ENG.Abridge, SATITGAME
+            # Skip 'Item' part, use others
+            satitgame_str = "True" if parts[4].strip().upper() == "YES" else "False"
+            rows.append((parts[1], parts[2], parts[3], satitgame_str))
+    return rows
+
+def populate_school_table(file_path, cursor=None):
+    """Bulk-inserts the schools from file_path. Uses the caller's transaction when given a cursor."""
+    rows = _parse_school_file(file_path)
+    if cursor is None:
+        return _writer().submit(_insert_schools, rows)
+    return _insert_schools(cursor, rows)
+
+def _insert_schools(c, rows: list) -> int:
+    c.executemany('''
+        INSERT OR IGNORE INTO SchoolTable (ThaiSchool, ThaiAbridgeName, EngAbridge, SATITGAME)
+        VALUES (?, ?, ?, ?)
+    ''', rows)
+    return len(rows)
+
+def get_stats() -> dict:
+    """
+    Returns the trigger-maintained totals (RecordCount, SwimmerCount,
+    DistinctRecordSwimmers, DistinctCompetitions, LastIngestAt, ChangeVersion)
+    in one primary-key lookup.
+    """
+    conn = sqlite3.connect(DB_FILE, check_same_thread=False)
+    conn.row_factory = sqlite3.Row
+    row = conn.execute('''
+        SELECT RecordCount, SwimmerCount, DistinctRecordSwimmers, DistinctCompetitions, LastIngestAt, ChangeVersion
+        FROM StatsTable WHERE Id = 1
+    ''').fetchone()
+    conn.close()
+    return dict(row) if row else {}
+
+def get_change_version() -> int:
+    """A counter that increases with every write to records, swimmers, merges or schools."""
+    conn = sqlite3.connect(DB_FILE, check_same_thread=False)
+    row = conn.execute("SELECT ChangeVersion FROM StatsTable WHERE Id = 1").fetchone()
+    conn.close()
+    return row[0] if row else 0
+
+def get_change_seq() -> int:
+    """The sequence number of the latest change log entry (0 if there is none)."""
+    conn = sqlite3.connect(DB_FILE, check_same_thread=False)
+    row = conn.execute("SELECT MAX(Seq) FROM ChangeLogTable").fetchone()
+    conn.close()
+    return row[0] or 0
+
+def changes_since(seq: int = 0, tables: list = None, chunk_size: int = 5_000):
+    """
+    Yields change log entries after seq, oldest first, as dicts with keys Seq,
+    TableName, RowKey, Op ('insert', 'update' or 'delete'), Columns (a list of
+    changed column names, or None for inserts and deletes) and ChangedAt.
+    A consumer stores the last Seq it applied and passes it back next time.
+    'insert' means "the row now exists": apply it as an upsert, since compaction
+    can fold updates into it. Rows are read in chunks, each on a fresh connection.
+    """
+    where, params = "Seq > ?", []
+    if tables:
+        where += f" AND TableName IN ({', '.join('?' for _ in tables)})"
+        params = list(tables)
+    while True:
+        conn = sqlite3.connect(DB_FILE, check_same_thread=False)
+        rows = conn.execute(
+            f"SELECT Seq, TableName, RowKey, Op, Columns, ChangedAt FROM ChangeLogTable WHERE {where} ORDER BY Seq LIMIT ?",
+            (seq, *params, chunk_size)
+        ).fetchall()
+        conn.close()
+        for row_seq, table, key, op, columns, changed_at in rows:
+            yield {'Seq': row_seq, 'TableName': table, 'RowKey': key, 'Op': op,
+                   'Columns': columns.split(',') if columns else None, 'ChangedAt': changed_at}
+        if len(rows) < chunk_size:
+            return
+        seq = rows[-1][0]
+
+def compact_changes(up_to_seq: int = None) -> int:
+    """
+    Folds the log up to up_to_seq (default: all of it) into one entry per row,
+    kept at that row's latest Seq: 'delete' if the row was last deleted,
+    'insert' if it was inserted at any point, otherwise 'update' with every
+    column changed along the way. A consumer at any Seq still learns about every
+    row changed after it. Returns the number of entries removed.
+    """
+    return _writer().submit(_compact_changes, up_to_seq)
+
+def _compact_changes(c, up_to_seq: int = None) -> int:
+    if up_to_seq is None:
+        up_to_seq = c.execute("SELECT COALESCE(MAX(Seq), 0) FROM ChangeLogTable").fetchone()[0]
+    # Folded in Python: GROUP_CONCAT's order is not guaranteed, even over an ordered subquery
+    rows = c.execute('''
+        SELECT L.TableName, L.RowKey, L.Seq, L.Op, L.Columns
+        FROM ChangeLogTable AS L
+        JOIN (
+            SELECT TableName, RowKey FROM ChangeLogTable WHERE Seq <= ?
+            GROUP BY TableName, RowKey HAVING COUNT(*) > 1
+        ) AS G ON G.TableName = L.TableName AND G.RowKey = L.RowKey
+        WHERE L.Seq <= ?
+        ORDER BY L.TableName, L.RowKey, L.Seq
+    ''', (up_to_seq, up_to_seq)).fetchall()
+    removed = 0
+    for (table, key), group in itertools.groupby(rows, key=lambda row: row[:2]):
+        group = list(group)
+        ops = [row[3] for row in group]
+        last_seq, count = group[-1][2], len(group)
+        if ops[-1] == 'delete':
+            op, merged = 'delete', None
+        elif 'insert' in ops:
+            op, merged = 'insert', None
+        else:
+            columns = [col for row in group if row[4] for col in row[4].split(',')]
+            op, merged = 'update', ",".join(dict.fromkeys(columns)) if columns else None
+        c.execute("DELETE FROM ChangeLogTable WHERE TableName = ? AND RowKey = ? AND Seq < ?", (table, key, last_seq))
+        c.execute("UPDATE ChangeLogTable SET Op = ?, Columns = ? WHERE Seq = ?", (op, merged, last_seq))
+        removed += count - 1
+    print(f"[DEBUG] Compacted the change log up to {up_to_seq}: {removed} entries removed.")
+    return removed
+
+def get_schools() -> pd.DataFrame:
+    """Fetches all school data from the SchoolTable."""
+    conn = sqlite3.connect(DB_FILE, check_same_thread=False)
+    df = pd.read_sql_query("SELECT * FROM SchoolTable", conn)
+    conn.close()
+    return df
+
+def add_records(df: pd.DataFrame, rankings: dict = None):
+    """
+    Adds scraped ranking data to the database.
+    It populates both SwimmerTable and RecordTable.
+
+    Each call is taken as whole scraped rankings. A ranking read in chunks
+    passes the same rankings dict to every call instead, and stores it once
+    with add_ranking_snapshots() after the last chunk.
+    """
+    if df.empty:
+        return 0
+    return _writer().submit(_add_records, df, None, rankings)
+
+def add_ranking_snapshots(rankings: dict) -> int:
+    """Stores the rankings collected by add_records(). Returns the number of new snapshots."""
+    if not rankings:
+        return 0
+    return _writer().submit(_add_ranking_snapshots, rankings)
+
+def _add_ranking_snapshots(c, rankings: dict) -> int:
+    return sum(_add_ranking_snapshot(c, series, ranking) is not None for series, ranking in rankings.items())
+
+def _add_records(c, df: pd.DataFrame, unique_ids: list = None, rankings: dict = None) -> int:
+    resolver = _resolver(c)
+    dimension_ids = {}
+    records_added = 0
+    # Scraped rankings carry the site's Place as Rank: keep it per (event, age band) snapshot
+    deferred = rankings is not None
+    if 'Rank' not in df.columns:
+        rankings = None
+    elif rankings is None:
+        rankings = {}
+
+    for _, row in df.iterrows():
+        swimmer_name = row['Name']
+        if not isinstance(swimmer_name, str):
+            continue
+
+        swimmer_uniq_id, _ = resolver.resolve(
+            swimmer_name, row.get('Gender'), row.get('Club'),
+            row.get('AgeRange'), row.get('CompetitionDate')
+        )
+
+        # Add swimmer to SwimmerTable if not exists, with Gender and the birth-year estimate
+        c.execute('''
+            INSERT OR IGNORE INTO SwimmerTable (UniqID, Name, Gender, Club, BirthYearMin, BirthYearMax)
+            VALUES (?, ?, ?, ?, ?, ?)
+        ''', (swimmer_uniq_id, swimmer_name, row.get('Gender'), row['Club'], *resolver.birth_years(swimmer_uniq_id)))
+
+        # Create a unique ID for the record to prevent duplicates
+        record_unique_id = record_key(swimmer_uniq_id, row.get('Competition'), row.get('CompetitionDate'),
+                                      row.get('Stroke'), row.get('Distance'), row.get('Time'))
+        if unique_ids is not None:
+            unique_ids.append(record_unique_id)
+        if rankings is not None and not pd.isna(row['Rank']):
+            ranking = rankings.setdefault(tuple(_clean(row.get(col)) for col in RANKING_SERIES_COLUMNS), {})
+            ranking[swimmer_uniq_id] = min(int(row['Rank']), ranking.get(swimmer_uniq_id, int(row['Rank'])))
+
+        # Add record to RecordTable
+        try:
+            age_to_record = row.get('AgeRange')
+            if isinstance(age_to_record, str) and '-' in age_to_record:
+                parts = age_to_record.split('-')
+                if len(parts) == 2 and parts[0] == parts[1]:
+                    age_to_record = parts[0]
+
+            c.execute('''
+                INSERT INTO RecordTable (UniqueID, SwimmerUniqID, Name, Age, Stroke, Distance, Time, CompetitionID, ClubID, Nationality, Pool, SwimDate)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+            ''', (
+                record_unique_id,
+                swimmer_uniq_id,
+                swimmer_name,
+                age_to_record,
+                row.get('Stroke'),
+                row.get('Distance'),
+                row.get('Time'),
+                _competition_id(c, row.get('Competition'), row.get('CompetitionDate'), dimension_ids),
+                _club_id(c, row.get('Club'), dimension_ids),
+                row.get('Nationality'),
+                row.get('Pool'),
+                thai_date_to_iso(row.get('CompetitionDate'))
+            ))
+            records_added += 1
+        except sqlite3.IntegrityError:
+            # This record already exists, skip.
+            pass
+
+    if rankings and not deferred:
+        _add_ranking_snapshots(c, rankings)
+
+    _keep_resolver(c, resolver)
+    print(f"[DEBUG] Added {records_added} new records to the database.")
+    return records_added
+
+# What one scraped ranking is for, in RankingSeriesTable column order
+RANKING_SERIES_COLUMNS = ['Stroke', 'Distance', 'Gender', 'Pool', 'AgeRange']
+# Every this many snapshots of a series, one is stored in full
+KEYFRAME_INTERVAL = 10
+
+def _series_id(c, series: tuple, create: bool = False):
+    where = " AND ".join(f"{col} IS ?" for col in RANKING_SERIES_COLUMNS)
+    row = c.execute(f"SELECT SeriesID FROM RankingSeriesTable WHERE {where}", series).fetchone()
+    if row is not None:
+        return row[0]
+    if not create:
+        return None
+    c.execute(f"INSERT INTO RankingSeriesTable ({', '.join(RANKING_SERIES_COLUMNS)}) VALUES (?, ?, ?, ?, ?)", series)
+    return c.lastrowid
+
+def _load_ranking(c, series_id: int, snapshot_id: int = None):
+    """
+    Rebuilds a series' ranking as of snapshot_id (default: its latest) from the
+    last keyframe and the deltas after it. Returns (snapshot_id, snapshots since
+    the keyframe, {swimmer: rank}), or (None, 0, {}) if there is no snapshot yet.
+    """
+    bound = "" if snapshot_id is None else "AND SnapshotID <= ?"
+    params = (series_id,) if snapshot_id is None else (series_id, snapshot_id)
+    latest, keyframe = c.execute(f'''
+        SELECT MAX(SnapshotID), MAX(CASE WHEN IsKeyframe THEN SnapshotID END)
+        FROM RankingSnapshotTable WHERE SeriesID = ? {bound}
+    ''', params).fetchone()
+    if latest is None:
+        return None, 0, {}
+    ranking = {}
+    rows = c.execute('''
+        SELECT E.SwimmerUniqID, E.Rank FROM RankingEntryTable AS E
+        JOIN RankingSnapshotTable AS S ON S.SnapshotID = E.SnapshotID
+        WHERE S.SeriesID = ? AND E.SnapshotID BETWEEN ? AND ?
+        ORDER BY E.SnapshotID
+    ''', (series_id, keyframe, latest))
+    for swimmer, rank in rows:
+        if rank is None:
+            ranking.pop(swimmer, None)
+        else:
+            ranking[swimmer] = rank
+    since_keyframe = c.execute("SELECT COUNT(*) FROM RankingSnapshotTable WHERE SeriesID = ? AND SnapshotID > ? AND SnapshotID <= ?",
+                               (series_id, keyframe, latest)).fetchone()[0]
+    return latest, since_keyframe, ranking
+
+def _add_ranking_snapshot(c, series: tuple, ranking: dict):
+    """Stores one scraped ranking unless it is identical to the series' latest one."""
+    series_id = _series_id(c, series, create=True)
+    previous_id, since_keyframe, previous = _load_ranking(c, series_id)
+    if previous_id is not None and previous == ranking:
+        return None
+    keyframe = previous_id is None or since_keyframe + 1 >= KEYFRAME_INTERVAL
+    if keyframe:
+        entries = ranking
+    else:
+        entries = {swimmer: rank for swimmer, rank in ranking.items() if previous.get(swimmer) != rank}
+        entries.update({swimmer: None for swimmer in previous.keys() - ranking.keys()})
+    c.execute("INSERT INTO RankingSnapshotTable (SeriesID, TakenAt, IsKeyframe, Entries) VALUES (?, datetime('now'), ?, ?)",
+              (series_id, int(keyframe), len(ranking)))
+    snapshot_id = c.lastrowid
+    c.executemany("INSERT INTO RankingEntryTable (SnapshotID, SwimmerUniqID, Rank) VALUES (?, ?, ?)",
+                  [(snapshot_id, swimmer, rank) for swimmer, rank in entries.items()])
+    return snapshot_id
+
+def get_swimmers(compact: bool = True) -> pd.DataFrame:
+    """
+    Fetches all swimmer profiles from the database.
+    compact=False returns plain object columns, e.g. for free-text editing.
+    """
+    conn = sqlite3.connect(DB_FILE, check_same_thread=False)
+    if compact:
+        df = _read_frame(conn, "SELECT * FROM SwimmerTable", SWIMMER_SCHEMA)
+    else:
+        df = pd.read_sql_query("SELECT * FROM SwimmerTable", conn)
+    conn.close()
+    return df
+
+def sync_swimmers(df: pd.DataFrame):
+    """
+    Synchronizes the SwimmerTable with the provided DataFrame.
+    Handles additions, updates, and deletions.
+    """
+    _writer().submit(_sync_swimmers, df)
+
+def _sync_swimmers(c, df: pd.DataFrame):
+    # Generate UniqID for new rows if they are empty (based on Name, never reusing a taken ID).
+    # The sync rewrites the table, so the resolver is not kept and the next request reloads it.
+    resolver = _resolver(c)
+    df['UniqID'] = df.apply(
+        lambda row: resolver.new_uniq_id(row['Name']) if pd.isna(row.get('UniqID')) and isinstance(row.get('Name'), str) else row.get('UniqID'),
+        axis=1
+    )
+    df.dropna(subset=['UniqID'], inplace=True)
+    df.drop_duplicates(subset=['UniqID'], keep='first', inplace=True)
+
+    all_ids_in_df = tuple(df['UniqID'].unique())
+    
+    # Delete swimmers from DB that are not in the DataFrame anymore
+    if all_ids_in_df:
+        c.execute(f"DELETE FROM SwimmerTable WHERE UniqID NOT IN ({','.join('?' for _ in all_ids_in_df)})", all_ids_in_df)
+    else:
+        c.execute("DELETE FROM SwimmerTable")
+
+    # Insert or Replace swimmers in the DB from the DataFrame
+    for _, row in df.iterrows():
+        # Ensure YearOfBirth is an integer or None
+        yob = row.get('YearOfBirth')
+        if yob is not None and not pd.isna(yob):
+            try:
+                yob = int(yob)
+            except (ValueError, TypeError):
+                yob = None
+        else:
+            yob = None
+
+        # An upsert rather than INSERT OR REPLACE, so update triggers fire instead of a silent delete
+        c.execute('''
+            INSERT INTO SwimmerTable (UniqID, Name, Gender, YearOfBirth, Club, School)
+            VALUES (?, ?, ?, ?, ?, ?)
+            ON CONFLICT (UniqID) DO UPDATE SET
+                Name = excluded.Name, Gender = excluded.Gender, YearOfBirth = excluded.YearOfBirth,
+                Club = excluded.Club, School = excluded.School
+        ''', (row['UniqID'], row['Name'], row.get('Gender'), yob, row['Club'], row['School']))
+
+    print(f"[DEBUG] Synced {len(df)} swimmers with the database.")
+
+def swimmer_resolver() -> SwimmerResolver:
+    """A read-only SwimmerResolver over the stored swimmers, for matching rows that are not being saved."""
+    conn = sqlite3.connect(DB_FILE, check_same_thread=False)
+    resolver = SwimmerResolver(conn.cursor(), read_only=True)
+    conn.close()
+    return resolver
+
+def find_duplicate_swimmers() -> pd.DataFrame:
+    """Lists likely duplicate swimmer profiles, compared only within blocking-index blocks."""
+    conn = sqlite3.connect(DB_FILE, check_same_thread=False)
+    resolver = SwimmerResolver(conn.cursor())
+    pairs = [
+        (a, resolver.swimmers[a]['Name'], b, resolver.swimmers[b]['Name'], round(score, 3))
+        for a, b, score in resolver.duplicate_pairs()
+    ]
+    conn.close()
+    return pd.DataFrame(pairs, columns=['UniqID', 'Name', 'OtherUniqID', 'OtherName', 'Score'])
+
+def merge_swimmers(alias_id: str, canonical_id: str) -> bool:
+    """
+    Records that alias_id is the same swimmer as canonical_id.
+    Existing aliases of alias_id are re-pointed so merges never chain.
+    """
+    if alias_id == canonical_id:
+        return False
+    return _writer().submit(_merge_swimmers, alias_id, canonical_id)
+
+def _merge_swimmers(c, alias_id: str, canonical_id: str) -> bool:
+    resolver = _resolver(c)
+    target = resolver.canonical(canonical_id)
+    if target == alias_id:
+        _keep_resolver(c, resolver)
+        return False
+    resolver.add_alias(alias_id, target)
+    c.execute("UPDATE SwimmerMergeTable SET CanonicalID = ? WHERE CanonicalID = ?", (target, alias_id))
+    resolver.aliases.update((alias, target) for alias, canonical in resolver.aliases.items() if canonical == alias_id)
+    _keep_resolver(c, resolver)
+    print(f"[DEBUG] Merged swimmer {alias_id} into {target}.")
+    return True
+
+def unmerge_swimmer(alias_id: str) -> bool:
+    """Removes a merge so alias_id is reported as its own swimmer again."""
+    return _writer().submit(_unmerge_swimmer, alias_id)
+
+def _unmerge_swimmer(c, alias_id: str) -> bool:
+    resolver = _resolver(c)
+    c.execute("DELETE FROM SwimmerMergeTable WHERE AliasID = ?", (alias_id,))
+    removed = c.rowcount > 0
+    resolver.aliases.pop(alias_id, None)
+    _keep_resolver(c, resolver)
+    return removed
+
+def get_records(compact: bool = True) -> pd.DataFrame:
+    """
+    Fetches all records from the database, including swimmer gender and school.
+    Records of merged swimmers are reported under their canonical swimmer.
+    Columns follow RECORD_SCHEMA; compact=False returns plain object columns instead.
+    """
+    conn = sqlite3.connect(DB_FILE, check_same_thread=False)
+    if compact:
+        df = _read_frame(conn, _RECORDS_SQL, RECORD_SCHEMA)
+    else:
+        df = pd.read_sql_query(_RECORDS_SQL, conn)
+    conn.close()
+    return df
+
+def get_partition_records(season: int, stroke: str) -> pd.DataFrame:
+    """Fetches the records of one (season, stroke) snapshot partition, with time in seconds."""
+    conn = sqlite3.connect(DB_FILE, check_same_thread=False)
+    query = f"""
+    SELECT *, {SECONDS_SQL.format('Time')} AS Seconds FROM ({_RECORDS_SQL}) AS P
+    WHERE {SEASON_SQL.format('P.CompetitionDate')} = ? AND {STROKE_SQL.format('P.Stroke')} = ?
+    """
+    df = pd.read_sql_query(query, conn, params=(season, stroke))
+    conn.close()
+    return df
+
+def _record_filter_sql(filters: dict):
+    """WHERE clause and parameters for a dashboard filter dict over the _RECORDS_SQL columns."""
+    if not filters:
+        return "1", []
+    min_age, max_age = MIN_AGE_SQL.format('P.Age'), MAX_AGE_SQL.format('P.Age')
+    # Same rule as the dashboard: records without a readable age never match
+    clauses = [f"{min_age} IS NOT NULL", f"{max_age} IS NOT NULL", f"{max_age} >= ?", f"{min_age} <= ?"]
+    params = [filters.get('min_age', 0), filters.get('max_age', 200)]
+    for column, key in (('Gender', 'gender'), ('Stroke', 'stroke'), ('Distance', 'distance')):
+        value = filters.get(key, "All")
+        if value not in (None, "All"):
+            clauses.append(f"P.{column} = ?")
+            params.append(value)
+    for column, key in (('School', 'schools'), ('Club', 'clubs')):
+        values = list(filters.get(key) or [])
+        if values:
+            clauses.append(f"P.{column} IN ({', '.join('?' for _ in values)})")
+            params.extend(values)
+    return " AND ".join(clauses), params
+
+def count_records(filters: dict = None) -> int:
+    """Number of records matching a dashboard filter dict (None for every record)."""
+    where, params = _record_filter_sql(filters)
+    conn = sqlite3.connect(DB_FILE, check_same_thread=False)
+    count = conn.execute(f"SELECT COUNT(*) FROM ({_RECORDS_SQL}) AS P WHERE {where}", params).fetchone()[0]
+    conn.close()
+    return count
+
+def iter_records(filters: dict = None, chunk_size: int = EXPORT_CHUNKSIZE):
+    """
+    Streams the records matching a dashboard filter dict (keys as in
+    analytics.DEFAULT_FILTERS, all optional; None for every record) as lists of
+    up to chunk_size row tuples in EXPORT_COLUMNS order. Rows come straight off one cursor, so
+    memory use is bounded by chunk_size however many records match.
+    """
+    where, params = _record_filter_sql(filters)
+    conn = sqlite3.connect(DB_FILE, check_same_thread=False)
+    try:
+        cursor = conn.execute(f"""
+            SELECT *, {SECONDS_SQL.format('P.Time')} AS Seconds FROM ({_RECORDS_SQL}) AS P
+            WHERE {where}
+        """, params)
+        while True:
+            rows = cursor.fetchmany(chunk_size)
+            if not rows:
+                return
+            yield rows
+    finally:
+        conn.close()
+
+def get_dirty_partitions(full: bool = False) -> list:
+    """
+    Returns [(season, stroke, marker)] for stale snapshot partitions.
+    With full=True every partition holding records is returned as well.
+    """
+    if full:
+        return _writer().submit(_mark_all_partitions)
+    conn = sqlite3.connect(DB_FILE, check_same_thread=False)
+    partitions = conn.execute("SELECT Season, Stroke, Marker FROM ExportDirtyTable ORDER BY Season, Stroke").fetchall()
+    conn.close()
+    return partitions
+
+def _mark_all_partitions(c) -> list:
+    c.execute(f"""
+        INSERT INTO ExportDirtyTable (Season, Stroke, Marker)
+        SELECT DISTINCT {SEASON_SQL.format('CompetitionDate')}, {STROKE_SQL.format('Stroke')}, 1 FROM RecordView WHERE 1
+        ON CONFLICT (Season, Stroke) DO UPDATE SET Marker = Marker + 1
+    """)
+    return c.execute("SELECT Season, Stroke, Marker FROM ExportDirtyTable ORDER BY Season, Stroke").fetchall()
+
+def clear_dirty_partitions(partitions: list):
+    """Clears exported partitions unless they were marked dirty again in the meantime."""
+    if partitions:
+        _writer().submit(_clear_dirty_partitions, partitions)
+
+def _clear_dirty_partitions(c, partitions: list):
+    c.executemany("DELETE FROM ExportDirtyTable WHERE Season = ? AND Stroke = ? AND Marker <= ?", partitions)
+
+TEAM_CUBE_COLUMNS = ['TeamKind', 'Team', 'Season', 'Stroke', 'Distance', 'Gender', 'AgeBand',
+                     'Records', 'Swimmers', 'BestSeconds', 'BestTime', 'MedianSeconds']
+
+def get_dirty_team_slices(full: bool = False) -> list:
+    """
+    Returns [(season, stroke, marker)] for stale team cube slices.
+    With full=True every slice holding records is returned as well.
+    """
+    if full:
+        return _writer().submit(_mark_all_team_slices)
+    conn = sqlite3.connect(DB_FILE, check_same_thread=False)
+    rows = conn.execute("SELECT Season, Stroke, Marker FROM TeamCubeDirtyTable ORDER BY Season, Stroke").fetchall()
+    conn.close()
+    return rows
+
+def _mark_all_team_slices(c) -> list:
+    c.execute(f"""
+        INSERT INTO TeamCubeDirtyTable (Season, Stroke, Marker)
+        SELECT DISTINCT {SEASON_SQL.format('CompetitionDate')}, {STROKE_SQL.format('Stroke')}, 1 FROM RecordView WHERE 1
+        ON CONFLICT (Season, Stroke) DO UPDATE SET Marker = Marker + 1
+    """)
+    # Slices whose records are all gone still need their cube rows removed
+    c.execute("""
+        INSERT INTO TeamCubeDirtyTable (Season, Stroke, Marker)
+        SELECT DISTINCT Season, Stroke, 1 FROM TeamCubeTable WHERE 1
+        ON CONFLICT (Season, Stroke) DO NOTHING
+    """)
+    return c.execute("SELECT Season, Stroke, Marker FROM TeamCubeDirtyTable ORDER BY Season, Stroke").fetchall()
+
+def replace_team_slice(df: pd.DataFrame, season: int, stroke: str, marker: int) -> int:
+    """
+    Replaces the cube rows of one (season, stroke) slice with df (TEAM_CUBE_COLUMNS)
+    and clears the slice's dirty mark unless it was marked again in the meantime.
+    """
+    return _writer().submit(_replace_team_slice, df, season, stroke, marker)
+
+def _replace_team_slice(c, df: pd.DataFrame, season: int, stroke: str, marker: int) -> int:
+    c.execute("DELETE FROM TeamCubeTable WHERE Season = ? AND Stroke = ?", (season, stroke))
+    c.executemany(
+        f"INSERT INTO TeamCubeTable ({', '.join(TEAM_CUBE_COLUMNS)}) VALUES ({', '.join('?' for _ in TEAM_CUBE_COLUMNS)})",
+        df[TEAM_CUBE_COLUMNS].astype(object).where(df[TEAM_CUBE_COLUMNS].notna(), None).itertuples(index=False, name=None)
+    )
+    c.execute("DELETE FROM TeamCubeDirtyTable WHERE Season = ? AND Stroke = ? AND Marker <= ?", (season, stroke, marker))
+    return len(df)
+
+def get_team_cube(kind: str = 'school', season: int = None, stroke: str = None, distance: str = None,
+                  gender: str = None, age_band: str = None, teams: list = None, satit_only: bool = False) -> pd.DataFrame:
+    """
+    Cube rows for one team kind ('school' or 'club'), narrowed by any of the
+    given keys, fastest best time first. School rows carry their SATITGAME flag;
+    satit_only keeps just the SATITGAME schools.
+    """
+    clauses, params = ["T.TeamKind = ?"], [kind]
+    for column, value in (('Season', season), ('Stroke', stroke), ('Distance', distance),
+                          ('Gender', gender), ('AgeBand', age_band)):
+        if value is not None:
+            clauses.append(f"T.{column} = ?")
+            params.append(value)
+    if teams:
+        clauses.append(f"T.Team IN ({', '.join('?' for _ in teams)})")
+        params.extend(teams)
+    if satit_only:
+        clauses.append("Sc.SATITGAME = 'True'")
+    query = f"""
+    SELECT T.*, COALESCE(Sc.SATITGAME = 'True', 0) AS SatitGame
+    FROM TeamCubeTable AS T
+    LEFT JOIN SchoolTable AS Sc ON T.TeamKind = 'school' AND Sc.ThaiSchool = T.Team
+    WHERE {' AND '.join(clauses)}
+    ORDER BY T.BestSeconds IS NULL, T.BestSeconds, T.Team
+    """
+    conn = sqlite3.connect(DB_FILE, check_same_thread=False)
+    df = pd.read_sql_query(query, conn, params=params)
+    conn.close()
+    df['SatitGame'] = df['SatitGame'].astype(bool)
+    return df
+
+def add_single_record(data: dict) -> bool:
+    """
+    Adds a single record to the database manually.
+    Ensures swimmer exists in SwimmerTable and then adds the record to RecordTable.
+    Returns True on success, False on failure (e.g., duplicate record).
+    """
+    try:
+        return _writer().submit(_add_single_record, data)
+    except sqlite3.IntegrityError:
+        print(f"[DEBUG] Manual record for {data['name']} on {data['competition_date']} already exists. Skipping.")
+        return False
+    except Exception as e:
+        print(f"[DEBUG] Error adding manual record: {e}")
+        return False
+
+def _add_single_record(c, data: dict) -> bool:
+    swimmer_name = data['name']
+    resolver = _resolver(c)
+    swimmer_uniq_id, _ = resolver.resolve(
+        swimmer_name, data.get('gender'), data.get('club'),
+        data.get('age'), data.get('competition_date')
+    )
+
+    # Ensure swimmer exists in SwimmerTable
+    c.execute('''
+        INSERT OR IGNORE INTO SwimmerTable (UniqID, Name, Gender, Club, School, BirthYearMin, BirthYearMax)
+        VALUES (?, ?, ?, ?, ?, ?, ?)
+    ''', (swimmer_uniq_id, swimmer_name, data.get('gender'), data.get('club'), data.get('school'),
+          *resolver.birth_years(swimmer_uniq_id)))
+
+    # Format age to record (handle "X-X" -> "X" logic)
+    age_to_record = data.get('age')
+    if isinstance(age_to_record, str) and '-' in age_to_record:
+        parts = age_to_record.split('-')
+        if len(parts) == 2 and parts[0] == parts[1]:
+            age_to_record = parts[0]
+
+    # Create a unique ID for the record
+    record_unique_id = record_key(swimmer_uniq_id, data['competition'], data['competition_date'],
+                                  data['stroke'], data['distance'], data['time'])
+
+    # Add record to RecordTable (a duplicate raises IntegrityError, rolling back the swimmer insert too)
+    dimension_ids = {}
     c.execute('''
-        CREATE TABLE IF NOT EXISTS SchoolTable (
-            ThaiSchool TEXT PRIMARY KEY,
-            ThaiAbridgeName TEXT,
-            EngAbridge TEXT,
-            SATITGAME TEXT
-        )
-    ''')
+        INSERT INTO RecordTable (UniqueID, SwimmerUniqID, Name, Age, Stroke, Distance, Time, CompetitionID, ClubID, Nationality, Pool, SwimDate)
+        VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+    ''', (
+        record_unique_id,
+        swimmer_uniq_id,
+        swimmer_name,
+        age_to_record,
+        data['stroke'],
+        data['distance'],
+        data['time'],
+        # competition_date is stored as DD/MM/YYYY (Buddhist Year) string
+        _competition_id(c, data['competition'], data['competition_date'], dimension_ids),
+        _club_id(c, data['club'], dimension_ids),
+        data['nationality'],
+        data.get('pool'),
+        thai_date_to_iso(data['competition_date'])
+    ))
+    _keep_resolver(c, resolver)
+    return True
 
-    conn.commit()
+# How many index hits are re-scored per search, and the smallest share of the
+# query's trigrams a result must contain. The index orders hits by bm25, not by
+# the re-score, so the pool is kept wide enough for the closest names to be in it.
+SEARCH_CANDIDATES = 500
+MIN_SEARCH_SCORE = 0.4
+# A club match counts for less than a name match
+CLUB_SEARCH_WEIGHT = 0.8
+# Queries at least this long look candidates up by 4-character parts rather than trigrams
+SEARCH_LONG_QUERY = 8
 
-    # Always refresh SchoolTable with latest data from file
-    refresh_school_data('schoolname.txt') 
+def _has_table(conn, name: str) -> bool:
+    return conn.execute("SELECT 1 FROM sqlite_master WHERE name = ?", (name,)).fetchone() is not None
 
-    conn.close()
-    print("[DEBUG] Database initialized.")
+def _like_pattern(name_query: str) -> str:
+    escaped = name_query.replace('%', '\\%').replace('_', '\\_')
+    return f"%{escaped}%"
+
+def _match_any_part(name_query: str):
+    """
+    An FTS5 query matching any short substring of the text, or None if it is too
+    short for a trigram. Long queries use 4-character parts: each still survives
+    most typos, and they are far more selective than single trigrams.
+    The query is normalised as the trigram tokenizer folds the indexed names
+    (NFKC, case-folded, single spaces), and its parts are taken with and
+    without Thai tone marks so a spelling variant still shares them.
+    """
+    text = ' '.join(unicodedata.normalize('NFKC', name_query).casefold().split())
+    size = 4 if len(text) >= SEARCH_LONG_QUERY else 3
+    grams = sorted({form[i:i + size] for form in {text, strip_marks(text)} for i in range(len(form) - size + 1)})
+    if not grams:
+        return None
+    return " OR ".join('"' + gram.replace('"', '""') + '"' for gram in grams)
+
+def _search_score(query_grams: set, text) -> tuple:
+    """(share of the query's trigrams in text, trigram Jaccard similarity); higher is closer."""
+    grams = trigrams(text)
+    if not query_grams or not grams:
+        return (0.0, 0.0)
+    shared = len(query_grams & grams)
+    return (shared / len(query_grams), shared / len(query_grams | grams))
 
-def refresh_school_data(file_path='schoolname.txt'):
+def _ranked(query_grams: set, candidates: list, limit: int) -> list:
+    """candidates as (key, [(text, weight), ...]); returns the best-scoring keys first."""
+    scored = []
+    for key, texts in candidates:
+        score = max(tuple(part * weight for part in _search_score(query_grams, text)) for text, weight in texts)
+        if score[0] >= MIN_SEARCH_SCORE:
+            scored.append((score, key))
+    scored.sort(key=lambda item: item[0], reverse=True)
+    return [key for _, key in scored[:limit]]
+
+def search_swimmers(name_query: str, limit: int = 10) -> pd.DataFrame:
     """
-    Clears the SchoolTable and then re-populates it from the specified file.
-    This ensures the SchoolTable is always up-to-date with the schoolname.txt file.
+    Searches swimmers by name or club, tolerating typos and Thai spelling
+    variants. Candidates sharing part of the query come from the trigram index;
+    they are ranked by how many of the query's trigrams they contain.
     """
+    if not name_query:
+        return pd.DataFrame()
     conn = sqlite3.connect(DB_FILE, check_same_thread=False)
-    c = conn.cursor()
-    c.execute("DELETE FROM SchoolTable")
-    conn.commit()
+    match = _match_any_part(name_query)
+    if match is None or not _has_table(conn, 'SwimmerSearchTable'):
+        df = pd.read_sql_query("SELECT * FROM SwimmerTable WHERE Name LIKE ? ESCAPE '\\' LIMIT ?", conn,
+                               params=(_like_pattern(name_query), limit))
+        conn.close()
+        return df
+
+    rows = conn.execute(
+        "SELECT UniqID, Name, Club FROM SwimmerSearchTable WHERE SwimmerSearchTable MATCH ? ORDER BY rank LIMIT ?",
+        (match, SEARCH_CANDIDATES)
+    ).fetchall()
+    ids = _ranked(trigrams(name_query), [(uid, [(name, 1.0), (club, CLUB_SEARCH_WEIGHT)]) for uid, name, club in rows], limit)
+    df = pd.read_sql_query("SELECT * FROM SwimmerTable WHERE UniqID IN (SELECT value FROM json_each(?))", conn,
+                           params=(json.dumps(ids),))
     conn.close()
-    abs_file_path = os.path.join(os.path.dirname(__file__), file_path)
-    print(f"[DEBUG] Refreshing SchoolTable from: {abs_file_path}")
-    populate_school_table(abs_file_path)
-    print("[DEBUG] SchoolTable refreshed.")
+    order = {uid: i for i, uid in enumerate(ids)}
+    return df.sort_values('UniqID', key=lambda col: col.map(order)).reset_index(drop=True)
+
+def get_swimmer_by_name(name: str) -> pd.Series:
+    """Fetches a single swimmer's details by their exact name."""
+    conn = sqlite3.connect(DB_FILE, check_same_thread=False)
+    df = pd.read_sql_query("SELECT * FROM SwimmerTable WHERE Name = ?", conn, params=(name,))
+    conn.close()
+    if not df.empty:
+        return df.iloc[0]
+    return None
 
-def populate_school_table(file_path):
+def search_competitions(name_query: str, limit: int = 10) -> list:
+    """Searches unique competition names, tolerating typos; the closest matches come first."""
+    if not name_query:
+        return []
     conn = sqlite3.connect(DB_FILE, check_same_thread=False)
     c = conn.cursor()
+    match = _match_any_part(name_query)
+    if match is None or not _has_table(conn, 'CompetitionSearchTable'):
+        c.execute("SELECT DISTINCT Name FROM CompetitionTable WHERE Name LIKE ? ESCAPE '\\' LIMIT ?", (_like_pattern(name_query), limit))
+        results = [row[0] for row in c.fetchall()]
+        conn.close()
+        return results
 
-    # Check if table is empty
-    c.execute("SELECT COUNT(*) FROM SchoolTable")
-    count_before = c.fetchone()[0]
+    c.execute("SELECT Name FROM CompetitionSearchTable WHERE CompetitionSearchTable MATCH ? ORDER BY rank LIMIT ?",
+              (match, SEARCH_CANDIDATES))
+    names = list(dict.fromkeys(row[0] for row in c.fetchall()))
+    conn.close()
+    return _ranked(trigrams(name_query), [(name, [(name, 1.0)]) for name in names], limit)
 
-    if count_before == 0:
-        try:
-            with open(file_path, 'r', encoding='utf-8') as f:
-                # Skip header line (assuming first line is header 'Item ThaiSchool ...')
-                lines = f.readlines()[1:] 
-                for line in lines:
-                    parts = line.strip().split(maxsplit=4) # Split into max 5 parts
-                    if len(parts) >= 5: # Ensure we have enough parts
-                        # Item, ThaiSchool, ThaiAbridgeName, ENG.Abridge, SATITGAME
-                        # Skip 'Item' part, use others
-                        thai_school = parts[1]
-                        thai_abridge_name = parts[2]
-                        eng_abridge = parts[3]
-                        satitgame = parts[4] if len(parts) > 4 else "" # Handle cases where SATITGAME might be missing
-                        satitgame_str = "True" if satitgame.strip().upper() == "YES" else "False"
-
-                        c.execute('''
-                            INSERT OR IGNORE INTO SchoolTable (ThaiSchool, ThaiAbridgeName, EngAbridge, SATITGAME)
-                            VALUES (?, ?, ?, ?)
-                        ''', (thai_school, thai_abridge_name, eng_abridge, satitgame_str))
-                conn.commit()
-        except FileNotFoundError:
-            print(f"[ERROR] SchoolName.txt not found at {file_path}. SchoolTable not populated.")
-        except Exception as e:
-            print(f"[ERROR] Error populating SchoolTable: {e}")
+def get_competition_date(competition_name: str) -> str:
+    """Gets the most recent date string for a given competition."""
+    conn = sqlite3.connect(DB_FILE, check_same_thread=False)
+    c = conn.cursor()
+    c.execute('''
+        SELECT CompetitionDate FROM CompetitionTable WHERE Name = ? AND CompetitionDate IS NOT NULL
+        ORDER BY CompetitionID DESC LIMIT 1
+    ''', (competition_name,))
+    result = c.fetchone()
     conn.close()
+    return result[0] if result else None
 
-def get_schools() -> pd.DataFrame:
-    """Fetches all school data from the SchoolTable."""
+# A swimmer's age in the year of the swim, from SwimmerTable.YearOfBirth
+# (Gregorian; a Buddhist-era year is converted). NULL when either is unknown.
+SWIM_AGE_SQL = "(CAST(substr({date}, 1, 4) AS INTEGER) - (CASE WHEN {yob} > 2400 THEN {yob} - 543 ELSE {yob} END))"
+
+# Canonical records with Pool, SwimDate, Seconds, AgeAtSwim and the stored age range's bounds
+_TIMED_SQL = f"""
+    SELECT P.*, R.Pool, R.SwimDate, {SECONDS_SQL.format('P.Time')} AS Seconds,
+        {SWIM_AGE_SQL.format(date='R.SwimDate', yob='Y.YearOfBirth')} AS AgeAtSwim,
+        {MIN_AGE_SQL.format('P.Age')} AS MinAge, {MAX_AGE_SQL.format('P.Age')} AS MaxAge
+    FROM ({_RECORDS_SQL}) AS P
+    JOIN RecordTable AS R ON R.UniqueID = P.UniqueID
+    LEFT JOIN SwimmerTable AS Y ON Y.UniqID = P.SwimmerUniqID
+"""
+
+def get_rankings(stroke=None, distance=None, gender=None, min_age=None, max_age=None,
+                 club=None, school=None, best_only=True, limit=None, offset=0,
+                 pool=None, start_date=None, end_date=None) -> pd.DataFrame:
+    """
+    Ranks timed records by Seconds within each (Stroke, Distance, Pool, Gender)
+    event, entirely from stored results, so any age band can be ranked without
+    re-scraping.
+
+    A swimmer's age at a swim comes from YearOfBirth and the swim date; without a
+    birth year the stored age range must lie wholly inside [min_age, max_age].
+    start_date/end_date are ISO dates bounding SwimDate. With best_only each
+    swimmer keeps only their fastest swim per event. Tied times share a rank
+    (RANK()). The Total column is the row count before limit/offset.
+    """
+    clauses, params = ["Seconds IS NOT NULL"], []
+    for column, value in (('Stroke', stroke), ('Distance', distance), ('Gender', gender), ('Club', club),
+                          ('School', school), ('Pool', pool)):
+        if value is not None:
+            clauses.append(f"{column} = ?")
+            params.append(value)
+    if min_age is not None:
+        clauses.append("COALESCE(AgeAtSwim, MinAge) >= ?")
+        params.append(int(min_age))
+    if max_age is not None:
+        clauses.append("COALESCE(AgeAtSwim, MaxAge) <= ?")
+        params.append(int(max_age))
+    if start_date is not None:
+        clauses.append("SwimDate >= ?")
+        params.append(str(start_date))
+    if end_date is not None:
+        clauses.append("SwimDate <= ?")
+        params.append(str(end_date))
+
+    query = f"""
+    WITH Timed AS ({_TIMED_SQL}),
+    Matching AS (
+        SELECT *, ROW_NUMBER() OVER (PARTITION BY SwimmerUniqID, Stroke, Distance, Pool ORDER BY Seconds, UniqueID) AS SwimmerRow
+        FROM Timed WHERE {' AND '.join(clauses)}
+    )
+    SELECT
+        RANK() OVER (PARTITION BY Stroke, Distance, Pool, Gender ORDER BY Seconds) AS Rank,
+        UniqueID, SwimmerUniqID, Name, Gender, Age, AgeAtSwim, Stroke, Distance, Pool, Time, Seconds,
+        Competition, CompetitionDate, SwimDate, Club, Nationality, School,
+        COUNT(*) OVER () AS Total
+    FROM Matching
+    {'WHERE SwimmerRow = 1' if best_only else ''}
+    ORDER BY Stroke, Distance, Pool, Gender, Seconds, UniqueID
+    LIMIT ? OFFSET ?
+    """
+    params += [-1 if limit is None else int(limit), int(offset)]
     conn = sqlite3.connect(DB_FILE, check_same_thread=False)
-    df = pd.read_sql_query("SELECT * FROM SchoolTable", conn)
+    df = pd.read_sql_query(query, conn, params=params)
     conn.close()
     return df
 
-def add_records(df: pd.DataFrame):
+def get_timed_records(swimmer_ids=None) -> pd.DataFrame:
     """
-    Adds scraped ranking data to the database.
-    It populates both SwimmerTable and RecordTable.
+    Every timed record (Seconds not NULL) with the columns ranking and
+    qualification need, optionally only for the given canonical swimmer IDs.
+    """
+    where, params = "", []
+    if swimmer_ids is not None:
+        where, params = "AND SwimmerUniqID IN (SELECT value FROM json_each(?))", [json.dumps(sorted(swimmer_ids))]
+    query = f"""
+    SELECT UniqueID, SwimmerUniqID, Gender, Stroke, Distance, Pool, Time, Seconds, SwimDate, Competition, AgeAtSwim, MinAge, MaxAge
+    FROM ({_TIMED_SQL}) WHERE Seconds IS NOT NULL {where}
     """
-    if df.empty:
-        return 0
-        
     conn = sqlite3.connect(DB_FILE, check_same_thread=False)
-    c = conn.cursor()
-    records_added = 0
+    df = pd.read_sql_query(query, conn, params=params)
+    conn.close()
+    return df
 
-    for _, row in df.iterrows():
-        swimmer_name = row['Name']
-        if not isinstance(swimmer_name, str):
-            continue
-            
-        swimmer_uniq_id = swimmer_name.replace(' ', '_').lower()
+def get_standards() -> pd.DataFrame:
+    """Fetches all qualifying standards."""
+    conn = sqlite3.connect(DB_FILE, check_same_thread=False)
+    df = pd.read_sql_query("SELECT * FROM StandardTable ORDER BY Standard, Stroke, Distance, Gender, MinAge", conn)
+    conn.close()
+    return df
 
-        # Add swimmer to SwimmerTable if not exists, including Gender
-        c.execute('''
-            INSERT OR IGNORE INTO SwimmerTable (UniqID, Name, Gender, Club)
-            VALUES (?, ?, ?, ?)
-        ''', (swimmer_uniq_id, swimmer_name, row.get('Gender'), row['Club']))
+def set_standards(df: pd.DataFrame) -> int:
+    """
+    Replaces the qualifying standards. df has Standard, Stroke, Distance, Gender,
+    Pool, MinAge, MaxAge, CutTime and CutSeconds columns. The qualification cache
+    is emptied, so the next refresh re-evaluates every swim.
+    """
+    return _writer().submit(_set_standards, df)
 
-        # Create a unique ID for the record to prevent duplicates
-        record_uid_str = f"{swimmer_uniq_id}{row.get('Competition', '')}{row.get('CompetitionDate', '')}{row.get('Stroke', '')}{row.get('Distance', '')}{row.get('Time', '')}"
-        record_unique_id = hashlib.sha1(record_uid_str.encode()).hexdigest()
+def _set_standards(c, df: pd.DataFrame) -> int:
+    c.execute("DELETE FROM StandardTable")
+    c.executemany('''
+        INSERT INTO StandardTable (Standard, Stroke, Distance, Gender, Pool, MinAge, MaxAge, CutTime, CutSeconds)
+        VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+    ''', [
+        (r['Standard'], r['Stroke'], r['Distance'], r['Gender'], r['Pool'], int(r['MinAge']), int(r['MaxAge']), r['CutTime'], float(r['CutSeconds']))
+        for r in df.to_dict(orient='records')
+    ])
+    c.execute("DELETE FROM QualificationTable")
+    c.execute("DELETE FROM MetaTable WHERE Key = 'qualification_seq'")
+    print(f"[DEBUG] Stored {len(df)} qualifying standards.")
+    return len(df)
 
-        # Add record to RecordTable
-        try:
-            age_to_record = row.get('AgeRange')
-            if isinstance(age_to_record, str) and '-' in age_to_record:
-                parts = age_to_record.split('-')
-                if len(parts) == 2 and parts[0] == parts[1]:
-                    age_to_record = parts[0]
+def _get_meta_seq(key: str):
+    conn = sqlite3.connect(DB_FILE, check_same_thread=False)
+    row = conn.execute("SELECT Value FROM MetaTable WHERE Key = ?", (key,)).fetchone()
+    conn.close()
+    return int(row[0]) if row else None
 
-            c.execute('''
-                INSERT INTO RecordTable (UniqueID, SwimmerUniqID, Name, Age, Stroke, Distance, Time, Competition, CompetitionDate, Club, Nationality)
-                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-            ''', (
-                record_unique_id,
-                swimmer_uniq_id,
-                swimmer_name,
-                age_to_record,
-                row.get('Stroke'),
-                row.get('Distance'),
-                row.get('Time'),
-                row.get('Competition'),
-                row.get('CompetitionDate'),
-                row.get('Club'),
-                row.get('Nationality')
-            ))
-            records_added += 1
-        except sqlite3.IntegrityError:
-            # This record already exists, skip.
-            pass
+def get_qualification_seq():
+    """The change log position the qualification cache reflects, or None if it was never built."""
+    return _get_meta_seq('qualification_seq')
 
-    conn.commit()
+# Swimmer caches keyed on record keys: cache name -> (table, record key column)
+_SWIMMER_CACHES = {
+    'qualification': ('QualificationTable', 'BestUniqueID'),
+    'progression': ('ProgressionTable', 'UniqueID'),
+}
+
+def get_affected_swimmers(record_ids: list, swimmer_ids: list, cache: str = 'qualification') -> set:
+    """
+    The swimmer IDs, raw and canonical, whose cached rows in one of
+    _SWIMMER_CACHES may change after the given records and swimmers (or merges
+    keyed on them) changed: the records' swimmers, the swimmers with a cached
+    row for one of the records, and the swimmers with a cached row for a record
+    of one of the given swimmers.
+    """
+    table, key = _SWIMMER_CACHES[cache]
+    conn = sqlite3.connect(DB_FILE, check_same_thread=False)
+    rows = conn.execute(f'''
+        WITH Records(Id) AS (SELECT value FROM json_each(:records)),
+        Ids(Id) AS (
+            SELECT SwimmerUniqID FROM RecordTable WHERE UniqueID IN Records
+            UNION SELECT SwimmerUniqID FROM {table} WHERE {key} IN Records
+            UNION SELECT value FROM json_each(:swimmers)
+            UNION SELECT Q.SwimmerUniqID FROM {table} AS Q
+                JOIN RecordTable AS R ON R.UniqueID = Q.{key}
+                WHERE R.SwimmerUniqID IN (SELECT value FROM json_each(:swimmers))
+        )
+        SELECT Id FROM Ids WHERE Id IS NOT NULL
+        UNION SELECT M.CanonicalID FROM Ids JOIN SwimmerMergeTable AS M ON M.AliasID = Ids.Id
+    ''', {'records': json.dumps(list(record_ids)), 'swimmers': json.dumps(list(swimmer_ids))}).fetchall()
     conn.close()
-    print(f"[DEBUG] Added {records_added} new records to the database.")
-    return records_added
+    return {row[0] for row in rows}
+
+def replace_qualifications(df: pd.DataFrame, swimmer_ids, seq: int) -> int:
+    """
+    Replaces the cached qualifications of swimmer_ids (all swimmers if None)
+    with the rows of df and records that the cache now reflects change log
+    position seq. Returns the number of rows stored.
+    """
+    return _writer().submit(_replace_qualifications, df, swimmer_ids, seq)
+
+def _replace_qualifications(c, df: pd.DataFrame, swimmer_ids, seq: int) -> int:
+    if swimmer_ids is None:
+        c.execute("DELETE FROM QualificationTable")
+    else:
+        c.execute("DELETE FROM QualificationTable WHERE SwimmerUniqID IN (SELECT value FROM json_each(?))",
+                  (json.dumps(sorted(swimmer_ids)),))
+    columns = ['SwimmerUniqID', 'StandardID', 'BestUniqueID', 'Time', 'Seconds', 'Margin', 'SwimDate']
+    c.executemany(
+        f"INSERT INTO QualificationTable ({', '.join(columns)}) VALUES ({', '.join('?' for _ in columns)})",
+        df[columns].astype(object).where(df[columns].notna(), None).itertuples(index=False, name=None)
+    )
+    c.execute("INSERT OR REPLACE INTO MetaTable (Key, Value) VALUES ('qualification_seq', ?)", (str(seq),))
+    return len(df)
 
-def get_swimmers() -> pd.DataFrame:
-    """Fetches all swimmer profiles from the database."""
+def get_qualifications(standard: str = None, swimmer_id: str = None) -> pd.DataFrame:
+    """Cached qualifications with swimmer and standard details, closest to the cut last."""
+    clauses, params = [], []
+    if standard is not None:
+        clauses.append("T.Standard = ?")
+        params.append(standard)
+    if swimmer_id is not None:
+        clauses.append("Q.SwimmerUniqID = ?")
+        params.append(swimmer_id)
+    query = f"""
+    SELECT Q.SwimmerUniqID, S.Name, S.Club, S.School, T.Standard, T.Stroke, T.Distance, T.Gender, T.Pool,
+        T.MinAge, T.MaxAge, T.CutTime, Q.Time, Q.Margin, Q.SwimDate, Q.BestUniqueID
+    FROM QualificationTable AS Q
+    JOIN StandardTable AS T ON T.StandardID = Q.StandardID
+    LEFT JOIN SwimmerTable AS S ON S.UniqID = Q.SwimmerUniqID
+    {'WHERE ' + ' AND '.join(clauses) if clauses else ''}
+    ORDER BY T.Standard, T.Stroke, T.Distance, T.Gender, T.MinAge, Q.Margin DESC
+    """
     conn = sqlite3.connect(DB_FILE, check_same_thread=False)
-    df = pd.read_sql_query("SELECT * FROM SwimmerTable", conn)
+    df = pd.read_sql_query(query, conn, params=params)
     conn.close()
     return df
 
-def sync_swimmers(df: pd.DataFrame):
+PROGRESSION_COLUMNS = ['SwimmerUniqID', 'UniqueID', 'Stroke', 'Distance', 'Pool', 'Swim', 'SwimDate', 'Competition',
+                       'Time', 'Seconds', 'BestSeconds', 'BestTime', 'IsPB', 'Improvement', 'Delta', 'Trend']
+
+def get_progression_seq():
+    """The change log position the progression store reflects, or None if it was never built."""
+    return _get_meta_seq('progression_seq')
+
+def replace_progression(df: pd.DataFrame, swimmer_ids, seq: int) -> int:
     """
-    Synchronizes the SwimmerTable with the provided DataFrame.
-    Handles additions, updates, and deletions.
+    Replaces the progression rows of swimmer_ids (all swimmers if None) with
+    the rows of df (PROGRESSION_COLUMNS) and records that the store now reflects
+    change log position seq. Returns the number of rows stored.
+    """
+    return _writer().submit(_replace_progression, df, swimmer_ids, seq)
+
+def _replace_progression(c, df: pd.DataFrame, swimmer_ids, seq: int) -> int:
+    if swimmer_ids is None:
+        c.execute("DELETE FROM ProgressionTable")
+    else:
+        c.execute("DELETE FROM ProgressionTable WHERE SwimmerUniqID IN (SELECT value FROM json_each(?))",
+                  (json.dumps(sorted(swimmer_ids)),))
+    c.executemany(
+        f"INSERT INTO ProgressionTable ({', '.join(PROGRESSION_COLUMNS)}) VALUES ({', '.join('?' for _ in PROGRESSION_COLUMNS)})",
+        df[PROGRESSION_COLUMNS].astype(object).where(df[PROGRESSION_COLUMNS].notna(), None).itertuples(index=False, name=None)
+    )
+    c.execute("INSERT OR REPLACE INTO MetaTable (Key, Value) VALUES ('progression_seq', ?)", (str(seq),))
+    return len(df)
+
+def get_progression(uniq_id: str) -> pd.DataFrame:
+    """
+    A swimmer's stored progression (merged aliases resolve to their canonical
+    swimmer), event by event in swim order. IsPB is a bool.
+    """
+    query = """
+    SELECT * FROM ProgressionTable
+    WHERE SwimmerUniqID = COALESCE((SELECT CanonicalID FROM SwimmerMergeTable WHERE AliasID = ?), ?)
+    ORDER BY Stroke, Distance, Pool, Swim
     """
     conn = sqlite3.connect(DB_FILE, check_same_thread=False)
-    c = conn.cursor()
+    df = pd.read_sql_query(query, conn, params=(uniq_id, uniq_id))
+    conn.close()
+    df['IsPB'] = df['IsPB'].astype(bool)
+    return df
 
-    # Generate UniqID for new rows if they are empty (based on Name)
-    df['UniqID'] = df.apply(
-        lambda row: row['Name'].replace(' ', '_').lower() if pd.isna(row.get('UniqID')) and isinstance(row.get('Name'), str) else row.get('UniqID'),
-        axis=1
+def get_course_conversions() -> pd.DataFrame:
+    """Fetches all course conversion factors."""
+    conn = sqlite3.connect(DB_FILE, check_same_thread=False)
+    df = pd.read_sql_query("SELECT * FROM CourseConversionTable ORDER BY Stroke, Distance, FromPool, ToPool", conn)
+    conn.close()
+    return df
+
+def set_course_conversions(df: pd.DataFrame) -> int:
+    """Replaces the course conversion factors. df has Stroke, Distance, FromPool, ToPool and Factor columns."""
+    return _writer().submit(_set_course_conversions, df)
+
+def _set_course_conversions(c, df: pd.DataFrame) -> int:
+    c.execute("DELETE FROM CourseConversionTable")
+    c.executemany(
+        "INSERT INTO CourseConversionTable (Stroke, Distance, FromPool, ToPool, Factor) VALUES (?, ?, ?, ?, ?)",
+        [(r['Stroke'], r['Distance'], r['FromPool'], r['ToPool'], float(r['Factor'])) for r in df.to_dict(orient='records')]
     )
-    df.dropna(subset=['UniqID'], inplace=True)
-    df.drop_duplicates(subset=['UniqID'], keep='first', inplace=True)
+    print(f"[DEBUG] Stored {len(df)} course conversion factors.")
+    return len(df)
 
-    all_ids_in_df = tuple(df['UniqID'].unique())
-    
-    # Delete swimmers from DB that are not in the DataFrame anymore
-    if all_ids_in_df:
-        c.execute(f"DELETE FROM SwimmerTable WHERE UniqID NOT IN ({','.join('?' for _ in all_ids_in_df)})", all_ids_in_df)
-    else:
-        c.execute("DELETE FROM SwimmerTable")
+def get_seed_times(roster: list, events: list, pool: str = None, start_date: str = None, end_date: str = None,
+                   convert: bool = False) -> pd.DataFrame:
+    """
+    Seed times for a meet entry list in one query: for every roster entry and
+    every (stroke, distance) in events, the swimmer's fastest swim in pool (in
+    any pool if None, e.g. for records stored without one) between the ISO
+    dates start_date and end_date (both optional), with the competition it
+    came from.
 
-    # Insert or Replace swimmers in the DB from the DataFrame
-    for _, row in df.iterrows():
-        # Ensure YearOfBirth is an integer or None
-        yob = row.get('YearOfBirth')
-        if yob is not None and not pd.isna(yob):
-            try:
-                yob = int(yob)
-            except (ValueError, TypeError):
-                yob = None
-        else:
-            yob = None
+    A roster entry is a swimmer UniqID or, failing that, a SwimmerTable name;
+    a name shared by several swimmers gives a row for each, an unknown entry a
+    row with no SwimmerUniqID. Aliases resolve to their canonical swimmer, whose
+    merged records all count. With convert, swims in other pools count too,
+    multiplied by their CourseConversionTable factor into pool (Converted is
+    then true). Rows follow the roster order, then the events order; entries
+    without a time have NULL SeedSeconds.
+    """
+    query = f"""
+    WITH Roster(Pos, Entry) AS (SELECT key, trim(value) FROM json_each(:roster)),
+    Matched(Pos, UniqID) AS (
+        SELECT R.Pos, S.UniqID FROM Roster AS R JOIN SwimmerTable AS S ON S.UniqID = R.Entry
+        UNION ALL
+        SELECT R.Pos, S.UniqID FROM Roster AS R JOIN SwimmerTable AS S ON S.Name = R.Entry
+        WHERE NOT EXISTS (SELECT 1 FROM SwimmerTable WHERE UniqID = R.Entry)
+    ),
+    Entrants(Pos, Entry, SwimmerUniqID) AS (
+        SELECT DISTINCT R.Pos, R.Entry, COALESCE(G.CanonicalID, M.UniqID)
+        FROM Roster AS R
+        LEFT JOIN Matched AS M ON M.Pos = R.Pos
+        LEFT JOIN SwimmerMergeTable AS G ON G.AliasID = M.UniqID
+    ),
+    -- The raw swimmer IDs whose records count for each entrant, so RecordTable is read through its swimmer index
+    Sources(SwimmerUniqID, RawID) AS (
+        SELECT SwimmerUniqID, SwimmerUniqID FROM Entrants WHERE SwimmerUniqID IS NOT NULL
+        UNION SELECT E.SwimmerUniqID, G.AliasID FROM Entrants AS E JOIN SwimmerMergeTable AS G ON G.CanonicalID = E.SwimmerUniqID
+    ),
+    Events(EventPos, Stroke, Distance) AS (
+        SELECT key, json_extract(value, '$[0]'), json_extract(value, '$[1]') FROM json_each(:events)
+    ),
+    Swims AS (
+        SELECT So.SwimmerUniqID, R.UniqueID, R.Stroke, R.Distance, R.Pool, R.Time, R.SwimDate,
+            R.Competition, R.CompetitionDate, :pool IS NOT NULL AND R.Pool IS NOT :pool AS Converted,
+            {SECONDS_SQL.format('R.Time')} * (CASE WHEN :pool IS NULL OR R.Pool = :pool THEN 1 ELSE C.Factor END) AS SeedSeconds
+        FROM Sources AS So
+        JOIN RecordView AS R ON R.SwimmerUniqID = So.RawID
+        JOIN Events AS Ev ON Ev.Stroke = R.Stroke AND Ev.Distance = R.Distance
+        LEFT JOIN CourseConversionTable AS C
+            ON :convert AND C.Stroke = R.Stroke AND C.Distance = R.Distance AND C.FromPool = R.Pool AND C.ToPool = :pool
+        WHERE (:pool IS NULL OR R.Pool = :pool OR C.Factor IS NOT NULL)
+            AND (:start IS NULL OR R.SwimDate >= :start) AND (:end IS NULL OR R.SwimDate <= :end)
+    ),
+    Best AS (
+        SELECT *, ROW_NUMBER() OVER (
+            PARTITION BY SwimmerUniqID, Stroke, Distance ORDER BY SeedSeconds, Converted, SwimDate, UniqueID
+        ) AS SwimRank
+        FROM Swims WHERE SeedSeconds IS NOT NULL
+    )
+    SELECT E.Entry, E.SwimmerUniqID, S.Name, S.Gender, S.Club, S.School, Ev.Stroke, Ev.Distance,
+        ROUND(B.SeedSeconds, 2) AS SeedSeconds, B.Time, B.Pool, B.Converted, B.Competition, B.CompetitionDate,
+        B.SwimDate, B.UniqueID
+    FROM Entrants AS E
+    CROSS JOIN Events AS Ev
+    LEFT JOIN Best AS B ON B.SwimmerUniqID = E.SwimmerUniqID AND B.Stroke = Ev.Stroke AND B.Distance = Ev.Distance
+        AND B.SwimRank = 1
+    LEFT JOIN SwimmerTable AS S ON S.UniqID = E.SwimmerUniqID
+    ORDER BY E.Pos, Ev.EventPos, E.SwimmerUniqID
+    """
+    params = {
+        'roster': json.dumps([str(entry) for entry in roster]), 'events': json.dumps([list(event) for event in events]),
+        'pool': pool, 'convert': int(convert),
+        'start': None if start_date is None else str(start_date), 'end': None if end_date is None else str(end_date),
+    }
+    conn = sqlite3.connect(DB_FILE, check_same_thread=False)
+    cursor = conn.execute(query, params)
+    columns = [d[0] for d in cursor.description]
+    rows = cursor.fetchall()
+    conn.close()
+    df = pd.DataFrame(rows, columns=columns)
+    # Entries without a swim would turn the 64-bit keys into floats, which cannot hold them exactly
+    df['UniqueID'] = pd.array([row[columns.index('UniqueID')] for row in rows], dtype='Int64')
+    df['Converted'] = df['Converted'] == 1
+    return df
 
-        c.execute('''
-            INSERT OR REPLACE INTO SwimmerTable (UniqID, Name, Gender, YearOfBirth, Club, School)
-            VALUES (?, ?, ?, ?, ?, ?)
-        ''', (row['UniqID'], row['Name'], row.get('Gender'), yob, row['Club'], row['School']))
-        
-    conn.commit()
+def get_scrape_coverage(stroke: str, distance: str, gender: str, pool: str) -> list:
+    """
+    Returns [(coverage_id, min_age, max_age, start_date, end_date)] of the stored
+    boxes for one event that are complete: their window had closed before they
+    were fetched, so no later swim can belong to them.
+    """
+    conn = sqlite3.connect(DB_FILE, check_same_thread=False)
+    rows = conn.execute('''
+        SELECT CoverageID, MinAge, MaxAge, StartDate, EndDate FROM ScrapeCoverageTable
+        WHERE Stroke = ? AND Distance = ? AND Gender = ? AND Pool = ? AND EndDate < date(FetchedAt)
+    ''', (stroke, distance, gender, pool)).fetchall()
     conn.close()
-    print(f"[DEBUG] Synced {len(df)} swimmers with the database.")
+    return rows
 
-def get_records() -> pd.DataFrame:
-    """Fetches all records from the database, including swimmer gender and school."""
+def get_coverage_records(coverage_id: int) -> pd.DataFrame:
+    """The stored records of one coverage box, in the column layout the scrapers return."""
     conn = sqlite3.connect(DB_FILE, check_same_thread=False)
-    query = """
-    SELECT
-        R.*,
-        S.Gender,
-        S.School
-    FROM
-        RecordTable AS R
-    LEFT JOIN
-        SwimmerTable AS S
-    ON
-        R.SwimmerUniqID = S.UniqID
+    query = f"""
+    SELECT P.Name, P.Club, P.Nationality, P.Time, P.Competition, P.CompetitionDate,
+        P.Stroke, P.Distance, P.Age AS AgeRange, R.Pool, P.Gender
+    FROM ScrapeCoverageRecordTable AS C
+    JOIN ({_RECORDS_SQL}) AS P ON P.UniqueID = C.UniqueID
+    JOIN RecordTable AS R ON R.UniqueID = C.UniqueID
+    WHERE C.CoverageID = ?
     """
-    df = pd.read_sql_query(query, conn)
+    df = pd.read_sql_query(query, conn, params=(coverage_id,))
     conn.close()
     return df
 
-def add_single_record(data: dict) -> bool:
+def add_covered_records(df: pd.DataFrame, stroke, distance, gender, pool, min_age, max_age, start_date, end_date) -> int:
     """
-    Adds a single record to the database manually.
-    Ensures swimmer exists in SwimmerTable and then adds the record to RecordTable.
-    Returns True on success, False on failure (e.g., duplicate record).
+    Adds the scraped rows of one fetched box and records the box as covered,
+    replacing any earlier fetch of the same box. Returns the number of new records.
     """
-    conn = sqlite3.connect(DB_FILE, check_same_thread=False)
-    c = conn.cursor()
-
-    try:
-        swimmer_name = data['name']
-        swimmer_uniq_id = swimmer_name.replace(' ', '_').lower()
+    box = (stroke, distance, gender, pool, int(min_age), int(max_age), str(start_date), str(end_date))
+    return _writer().submit(_add_covered_records, df, box)
 
-        # Ensure swimmer exists in SwimmerTable
-        c.execute('''
-            INSERT OR IGNORE INTO SwimmerTable (UniqID, Name, Gender, Club, School)
-            VALUES (?, ?, ?, ?, ?)
-        ''', (swimmer_uniq_id, swimmer_name, data.get('gender'), data.get('club'), data.get('school')))
-        
-        # Format age to record (handle "X-X" -> "X" logic)
-        age_to_record = data.get('age')
-        if isinstance(age_to_record, str) and '-' in age_to_record:
-            parts = age_to_record.split('-')
-            if len(parts) == 2 and parts[0] == parts[1]:
-                age_to_record = parts[0]
+def _add_covered_records(c, df: pd.DataFrame, box: tuple) -> int:
+    unique_ids = []
+    added = _add_records(c, df, unique_ids) if not df.empty else 0
+    c.execute('''
+        INSERT INTO ScrapeCoverageTable (Stroke, Distance, Gender, Pool, MinAge, MaxAge, StartDate, EndDate, Rows, FetchedAt)
+        VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, strftime('%Y-%m-%dT%H:%M:%SZ', 'now'))
+        ON CONFLICT (Stroke, Distance, Gender, Pool, MinAge, MaxAge, StartDate, EndDate)
+        DO UPDATE SET Rows = excluded.Rows, FetchedAt = excluded.FetchedAt
+    ''', box + (len(df),))
+    coverage_id = c.execute('''
+        SELECT CoverageID FROM ScrapeCoverageTable
+        WHERE Stroke = ? AND Distance = ? AND Gender = ? AND Pool = ? AND MinAge = ? AND MaxAge = ? AND StartDate = ? AND EndDate = ?
+    ''', box).fetchone()[0]
+    c.execute("DELETE FROM ScrapeCoverageRecordTable WHERE CoverageID = ?", (coverage_id,))
+    c.executemany(
+        "INSERT OR IGNORE INTO ScrapeCoverageRecordTable (CoverageID, UniqueID) VALUES (?, ?)",
+        [(coverage_id, uid) for uid in unique_ids]
+    )
+    return added
 
-        # Create a unique ID for the record
-        record_uid_str = f"{swimmer_uniq_id}{data['competition']}{data['competition_date']}{data['stroke']}{data['distance']}{data['time']}"
-        record_unique_id = hashlib.sha1(record_uid_str.encode()).hexdigest()
+def get_ranking_snapshots(stroke, distance, gender, pool, age_range) -> pd.DataFrame:
+    """The stored snapshots of one ranking (SnapshotID, TakenAt, IsKeyframe, Entries), oldest first."""
+    conn = sqlite3.connect(DB_FILE, check_same_thread=False)
+    series_id = _series_id(conn.cursor(), (stroke, distance, gender, pool, age_range))
+    df = pd.read_sql_query(
+        "SELECT SnapshotID, TakenAt, IsKeyframe, Entries FROM RankingSnapshotTable WHERE SeriesID = ? ORDER BY SnapshotID",
+        conn, params=(series_id,))
+    conn.close()
+    return df
 
-        # Add record to RecordTable
-        c.execute('''
-            INSERT INTO RecordTable (UniqueID, SwimmerUniqID, Name, Age, Stroke, Distance, Time, Competition, CompetitionDate, Club, Nationality)
-            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-        ''', (
-            record_unique_id,
-            swimmer_uniq_id,
-            swimmer_name,
-            age_to_record,
-            data['stroke'],
-            data['distance'],
-            data['time'],
-            data['competition'],
-            data['competition_date'], # Stored as DD/MM/YYYY (Buddhist Year) string
-            data['club'],
-            data['nationality']
-        ))
-        conn.commit()
-        return True
-    except sqlite3.IntegrityError:
-        print(f"[DEBUG] Manual record for {data['name']} on {data['competition_date']} already exists. Skipping.")
-        return False
-    except Exception as e:
-        print(f"[DEBUG] Error adding manual record: {e}")
-        return False
-    finally:
-        conn.close()
+def _ranking_frame(conn, ranking: dict) -> pd.DataFrame:
+    names = dict(conn.execute("SELECT UniqID, Name FROM SwimmerTable WHERE UniqID IN (SELECT value FROM json_each(?))",
+                              (json.dumps(list(ranking)),)).fetchall())
+    df = pd.DataFrame({'Rank': list(ranking.values()), 'SwimmerUniqID': list(ranking)}, columns=['Rank', 'SwimmerUniqID'])
+    df['Name'] = df['SwimmerUniqID'].map(names)
+    return df.sort_values(['Rank', 'SwimmerUniqID']).reset_index(drop=True)
 
-def search_swimmers(name_query: str) -> pd.DataFrame:
-    """Searches for swimmers by name (case-insensitive)."""
-    if not name_query:
-        return pd.DataFrame()
+def get_ranking_snapshot(stroke, distance, gender, pool, age_range, snapshot_id: int = None) -> pd.DataFrame:
+    """One ranking (Rank, SwimmerUniqID, Name) as of snapshot_id, or as last scraped."""
     conn = sqlite3.connect(DB_FILE, check_same_thread=False)
-    query = "SELECT * FROM SwimmerTable WHERE Name LIKE ? ESCAPE '\\' LIMIT 10"
-    df = pd.read_sql_query(query, conn, params=(f"%{name_query.replace('%', '\\%').replace('_', '\\_')}%",))
+    c = conn.cursor()
+    series_id = _series_id(c, (stroke, distance, gender, pool, age_range))
+    ranking = _load_ranking(c, series_id, snapshot_id)[2] if series_id is not None else {}
+    df = _ranking_frame(conn, ranking)
     conn.close()
     return df
 
-def get_swimmer_by_name(name: str) -> pd.Series:
-    """Fetches a single swimmer's details by their exact name."""
+def get_rank_history(uniq_id: str) -> pd.DataFrame:
+    """
+    A swimmer's rank (including under merged aliases) at every snapshot of every
+    ranking they have appeared in, from their first appearance on. Rank is NaN
+    for snapshots where they were not ranked.
+    """
     conn = sqlite3.connect(DB_FILE, check_same_thread=False)
-    df = pd.read_sql_query("SELECT * FROM SwimmerTable WHERE Name = ?", conn, params=(name,))
+    ids = [uniq_id] + [row[0] for row in conn.execute("SELECT AliasID FROM SwimmerMergeTable WHERE CanonicalID = ?", (uniq_id,))]
+    entries = {}
+    for snapshot_id, rank in conn.execute(
+        "SELECT SnapshotID, Rank FROM RankingEntryTable WHERE SwimmerUniqID IN (SELECT value FROM json_each(?))", (json.dumps(ids),)
+    ):
+        # An alias and its canonical swimmer in the same ranking: the better rank counts
+        if snapshot_id not in entries or entries[snapshot_id] is None or (rank is not None and rank < entries[snapshot_id]):
+            entries[snapshot_id] = rank
+    snapshots = conn.execute(f'''
+        SELECT S.SnapshotID, S.TakenAt, S.IsKeyframe, S.SeriesID, {', '.join('R.' + col for col in RANKING_SERIES_COLUMNS)}
+        FROM RankingSnapshotTable AS S JOIN RankingSeriesTable AS R ON R.SeriesID = S.SeriesID
+        WHERE S.SeriesID IN (SELECT SeriesID FROM RankingSnapshotTable WHERE SnapshotID IN (SELECT value FROM json_each(?)))
+            AND S.SnapshotID >= ?
+        ORDER BY S.SeriesID, S.SnapshotID
+    ''', (json.dumps(list(entries)), min(entries, default=0))).fetchall()
     conn.close()
-    if not df.empty:
-        return df.iloc[0]
-    return None
 
-def search_competitions(name_query: str) -> list:
-    """Searches for unique competition names by name (case-insensitive)."""
-    if not name_query:
-        return []
+    rows, current = [], {}
+    for snapshot_id, taken_at, is_keyframe, series_id, *series in snapshots:
+        if is_keyframe or snapshot_id in entries:
+            current[series_id] = entries.get(snapshot_id)
+        if series_id in current:
+            rows.append((*series, snapshot_id, taken_at, current[series_id]))
+    df = pd.DataFrame(rows, columns=RANKING_SERIES_COLUMNS + ['SnapshotID', 'TakenAt', 'Rank'])
+    df['Rank'] = pd.to_numeric(df['Rank']).astype(float)
+    return df
+
+def get_biggest_movers(stroke, distance, gender, pool, age_range, since: str = None, limit: int = 20) -> pd.DataFrame:
+    """
+    Rank changes between an earlier snapshot and the latest one: the last
+    snapshot taken at or before since (an ISO date or datetime), or the one
+    before the latest. Swimmers new to the ranking have no FromRank. Sorted by
+    places gained, most first.
+    """
+    columns = ['SwimmerUniqID', 'Name', 'FromRank', 'ToRank', 'Change']
     conn = sqlite3.connect(DB_FILE, check_same_thread=False)
     c = conn.cursor()
-    query = "SELECT DISTINCT Competition FROM RecordTable WHERE Competition LIKE ? ESCAPE '\\' LIMIT 10"
-    c.execute(query, (f"%{name_query.replace('%', '\\%').replace('_', '\\_')}%",))
-    results = [row[0] for row in c.fetchall()]
+    series_id = _series_id(c, (stroke, distance, gender, pool, age_range))
+    latest_id, _, latest = _load_ranking(c, series_id) if series_id is not None else (None, 0, {})
+    if latest_id is None:
+        conn.close()
+        return pd.DataFrame(columns=columns)
+    if since is None:
+        row = c.execute("SELECT MAX(SnapshotID) FROM RankingSnapshotTable WHERE SeriesID = ? AND SnapshotID < ?",
+                        (series_id, latest_id)).fetchone()
+    else:
+        # TakenAt is 'YYYY-MM-DD HH:MM:SS' (UTC); a bare date means the end of that day
+        bound = since.replace('T', ' ') if len(since) > 10 else since + " 23:59:59"
+        row = c.execute("SELECT MAX(SnapshotID) FROM RankingSnapshotTable WHERE SeriesID = ? AND TakenAt <= ?",
+                        (series_id, bound)).fetchone()
+    earlier = _load_ranking(c, series_id, row[0])[2] if row[0] is not None else {}
+
+    df = _ranking_frame(conn, latest).rename(columns={'Rank': 'ToRank'})
     conn.close()
-    return results
+    df['FromRank'] = df['SwimmerUniqID'].map(earlier).astype(float)
+    df['Change'] = df['FromRank'] - df['ToRank']
+    df = df.sort_values(['Change', 'ToRank'], ascending=[False, True], na_position='last')
+    return df[columns].head(limit).reset_index(drop=True)
 
-def get_competition_date(competition_name: str) -> str:
-    """Gets the most recent date string for a given competition."""
+def get_swimmer_history(uniq_id: str) -> pd.DataFrame:
+    """Every record of a swimmer (including merged aliases), newest competition first."""
     conn = sqlite3.connect(DB_FILE, check_same_thread=False)
-    c = conn.cursor()
-    c.execute("SELECT CompetitionDate FROM RecordTable WHERE Competition = ? AND CompetitionDate IS NOT NULL LIMIT 1", (competition_name,))
-    result = c.fetchone()
+    query = f"""
+    SELECT *, {SECONDS_SQL.format('P.Time')} AS Seconds FROM ({_RECORDS_SQL}) AS P
+    WHERE P.SwimmerUniqID = COALESCE((SELECT CanonicalID FROM SwimmerMergeTable WHERE AliasID = ?), ?)
+    """
+    df = pd.read_sql_query(query, conn, params=(uniq_id, uniq_id))
     conn.close()
-    return result[0] if result else None
+    if not df.empty:
+        df['_date'] = pd.to_datetime(df['CompetitionDate'].map(parse_thai_date))
+        df = df.sort_values(['_date', 'Stroke', 'Distance'], ascending=[False, True, True], kind='mergesort')
+        df = df.drop(columns='_date').reset_index(drop=True)
+    return df
+
+def get_competitions(name_query: str = None, limit: int = None, offset: int = 0) -> pd.DataFrame:
+    """Lists competitions with their date and record/swimmer counts, optionally filtered by name."""
+    where, params = "", []
+    if name_query:
+        where = "WHERE Co.Name LIKE ? ESCAPE '\\'"
+        escaped = name_query.replace('%', '\\%').replace('_', '\\_')
+        params.append(f"%{escaped}%")
+    query = f"""
+    SELECT Co.Name AS Competition, MIN(Co.CompetitionDate) AS CompetitionDate, COUNT(*) AS Records,
+        COUNT(DISTINCT R.SwimmerUniqID) AS Swimmers, COUNT(*) OVER () AS Total
+    FROM CompetitionTable AS Co
+    JOIN RecordTable AS R ON R.CompetitionID = Co.CompetitionID
+    {where}
+    GROUP BY Co.Name
+    ORDER BY Co.Name
+    LIMIT ? OFFSET ?
+    """
+    params += [-1 if limit is None else int(limit), int(offset)]
+    conn = sqlite3.connect(DB_FILE, check_same_thread=False)
+    df = pd.read_sql_query(query, conn, params=params)
+    conn.close()
+    return df
 
 def sync_records(df: pd.DataFrame):
     """
@@ -353,8 +2411,9 @@ def sync_records(df: pd.DataFrame):
     This function only performs UPDATES on existing records based on UniqueID.
     It does not allow adding or deleting records for safety.
     """
-    conn = sqlite3.connect(DB_FILE, check_same_thread=False)
-    c = conn.cursor()
+    return _writer().submit(_sync_records, df)
+
+def _sync_records(c, df: pd.DataFrame) -> int:
     updated_count = 0
     
     # These are the columns a user is allowed to edit.
@@ -363,18 +2422,36 @@ def sync_records(df: pd.DataFrame):
         'Competition', 'CompetitionDate', 'Club', 'Nationality'
     ]
 
+    dimension_ids = {}
+
     for _, row in df.iterrows():
         unique_id = row.get('UniqueID')
-        if not unique_id or pd.isna(unique_id):
+        if unique_id is None or pd.isna(unique_id):
             continue
+        # Data editor rows carry numpy integers, which sqlite3 cannot bind
+        unique_id = int(unique_id)
 
         # Build the SET part of the SQL query dynamically
         set_clauses = []
         params = []
-        for col in editable_columns:
-            if col in row and not pd.isna(row[col]):
+        edited = {col: row[col] for col in editable_columns if col in row and not pd.isna(row[col])}
+        for col, value in edited.items():
+            if col in ('Age', 'Stroke', 'Distance', 'Time', 'Nationality'):
                 set_clauses.append(f"{col} = ?")
-                params.append(row[col])
+                params.append(value)
+        if 'Club' in edited:
+            set_clauses.append("ClubID = ?")
+            params.append(_club_id(c, edited['Club'], dimension_ids))
+        if 'Competition' in edited or 'CompetitionDate' in edited:
+            # Competitions are keyed on name and date together; fill in whichever was not edited
+            current = c.execute("SELECT Competition, CompetitionDate FROM RecordView WHERE UniqueID = ?", (unique_id,)).fetchone()
+            if current is not None:
+                name = edited.get('Competition', current[0])
+                competition_date = edited.get('CompetitionDate', current[1])
+                set_clauses.append("CompetitionID = ?")
+                params.append(_competition_id(c, name, competition_date, dimension_ids))
+                set_clauses.append("SwimDate = ?")
+                params.append(thai_date_to_iso(competition_date))
         
         if not set_clauses:
             continue
@@ -390,8 +2467,6 @@ def sync_records(df: pd.DataFrame):
         except sqlite3.Error as e:
             print(f"[ERROR] Failed to update record {unique_id}: {e}")
 
-    conn.commit()
-    conn.close()
     print(f"[DEBUG] Synced/updated {updated_count} records in the database.")
     return updated_count
 
@@ -399,26 +2474,17 @@ def delete_records(unique_ids: list):
     """Deletes records from the RecordTable based on a list of UniqueIDs."""
     if not unique_ids:
         return 0
-    
-    conn = sqlite3.connect(DB_FILE, check_same_thread=False)
-    c = conn.cursor()
-    
+
     try:
-        # Create placeholders for the IN clause
-        placeholders = ','.join('?' for _ in unique_ids)
-        query = f"DELETE FROM RecordTable WHERE UniqueID IN ({placeholders})"
-        
-        c.execute(query, unique_ids)
-        deleted_count = c.rowcount
-        conn.commit()
-        
+        deleted_count = _writer().submit(_delete_records, [int(uid) for uid in unique_ids])
         print(f"[DEBUG] Deleted {deleted_count} records from the database.")
         return deleted_count
     except sqlite3.Error as e:
         print(f"[ERROR] Failed to delete records: {e}")
-        conn.rollback()
         return 0
-    finally:
-        conn.close()
-
 
+def _delete_records(c, unique_ids: list) -> int:
+    # Create placeholders for the IN clause
+    placeholders = ','.join('?' for _ in unique_ids)
+    c.execute(f"DELETE FROM RecordTable WHERE UniqueID IN ({placeholders})", unique_ids)
+    return c.rowcount
@@ -7,33 +7,64 @@ import time
 import io
 from datetime import datetime
 from selenium.common.exceptions import TimeoutException
+import json
+import events
+
+HOME_RANKING_URL = "https://www.thaiaquatics.or.th/Index/HomeRanking"
+
+# Sets every filter control with .val(), which fires no change handler (each would
+# reload the table), then rebuilds the table once. The page's ReInitDatatable()
+# asks for 50 rows; the preXhr hook raises that to All (-1) in the same request.
+# taaFastDrawn is set once the rebuilt table has drawn the response.
+FAST_FILTER_SCRIPT = """
+    var f = arguments[0], table = $('#ResultTable');
+    window.taaFastDrawn = false;
+    $('#SwimmingTypeDetail').val(f.SwimmingTypeDetailId);
+    $('#Distance').val(f.DistId);
+    $('#GenderGroup').val(f.GenderId);
+    $('#PoolLengthId').val(f.PoolLengthId);
+    $('#AgeGroupMin').val(f.AgeMin);
+    $('#AgeGroupMax').val(f.AgeMax);
+    $('#StartDate').val(f.startDate);
+    $('#EndDate').val(f.endDate);
+    table.one('preXhr.dt', function (e, settings, data) { data.length = -1; });
+    // Only our request asks for length -1; a response to the page's own first load may still arrive
+    table.on('xhr.dt.taa', function (e, settings) {
+        if (settings.oAjaxData && String(settings.oAjaxData.length) === '-1') {
+            table.off('xhr.taa').one('draw.dt', function () { window.taaFastDrawn = true; });
+        }
+    });
+    ReInitDatatable();
+"""
+
+def filter_mismatches(params: dict, filters: dict) -> list:
+    """
+    Names of the filters (see SwimDataScraper._filters) that the table's last
+    request, DataTable().ajax.params(), did not carry, plus 'length' if it did
+    not ask for every row.
+    """
+    if not params:
+        return ['request']
+    try:
+        sent = json.loads(params.get('CompetitionEvent') or "{}")
+    except ValueError:
+        sent = {}
+    mismatches = [key for key, value in filters['event'].items() if str(sent.get(key, "")) != str(value)]
+    mismatches += [key for key in ('startDate', 'endDate') if params.get(key) != filters[key]]
+    if str(params.get('length')) != "-1":
+        mismatches.append('length')
+    return mismatches
 
 class SwimDataScraper:
-    STROKES = {
-        "1": {"name": "FreeStyle (ฟรีสไตล์)", "id": "2"},
-        "2": {"name": "Backstroke (กรรเชียง)", "id": "3"},
-        "3": {"name": "Breaststroke (กบ)", "id": "4"},
-        "4": {"name": "Butterfly (ผีเสื้อ)", "id": "5"},
-        "5": {"name": "Individual Medley (เดี่ยวผสม)", "id": "6"}
-    }
-    DISTANCES = {
-        "1": {"name": "50 m", "id": "1"},
-        "2": {"name": "100 m", "id": "2"},
-        "3": {"name": "200 m", "id": "3"},
-        "4": {"name": "400 m", "id": "4"},
-        "5": {"name": "800 m", "id": "5"},
-        "6": {"name": "1500 m", "id": "9"}
-    }
-    GENDERS = {
-        "1": {"name": "Male (ชาย)", "id": "1"},
-        "2": {"name": "Female (หญิง)", "id": "2"}
-    }
-    POOL_TYPES = {
-        "1": {"name": "Long Course (50m)", "id": "1"},
-        "2": {"name": "Short Course (25m)", "id": "2"}
-    }
-
-    def __init__(self, headless=True):
+    # Kept as class attributes for callers that read them off the scraper
+    STROKES = events.STROKES
+    DISTANCES = events.DISTANCES
+    GENDERS = events.GENDERS
+    POOL_TYPES = events.POOL_TYPES
+
+    def __init__(self, headless=True, fast_path=True):
+        # fast_path: set every filter in one go (see _load_fast), falling back to the form when it does not take
+        self.fast_path = fast_path
         self.options = webdriver.ChromeOptions()
         if headless:
             self.options.add_argument('--headless=new')
@@ -42,7 +73,7 @@ class SwimDataScraper:
             self.options.add_argument("--disable-dev-shm-usage")
         self.driver = webdriver.Chrome(options=self.options)
         self.wait = WebDriverWait(self.driver, 15)
-        self.initial_url = "https://www.thaiaquatics.or.th/Index/HomeRanking?Distance=1&SwimmingTypeDetailId=2"
+        self.initial_url = f"{HOME_RANKING_URL}?Distance=1&SwimmingTypeDetailId=2"
 
     def _select_and_wait(self, element_id, value):
         select_element = self.wait.until(EC.presence_of_element_located((By.ID, element_id)))
@@ -79,57 +110,103 @@ class SwimDataScraper:
             self.wait.until(EC.invisibility_of_element_located((By.ID, 'ResultTable_processing')))
         except: pass
 
+    def _filters(self, stroke, dist, gender, pool, min_age, max_age, start_str, end_str) -> dict:
+        """The CompetitionEvent fields and dates the site's ReInitDatatable() sends for a scrape."""
+        return {
+            'event': {
+                "SwimmingTypeDetailId": stroke['id'], "DistId": dist['id'], "GenderId": gender['id'],
+                "PoolLengthId": pool['id'], "AgeMin": str(min_age), "AgeMax": str(max_age),
+            },
+            'startDate': start_str,
+            'endDate': end_str,
+        }
+
+    def _load_fast(self, stroke, dist, filters) -> bool:
+        """
+        Loads the filtered ranking with one table request: the event is put in the
+        URL, every other control is set by script without firing its change
+        handler, and ReInitDatatable() is called once with the page length forced
+        to All. Returns False (after logging why) if the request the table
+        actually sent does not match filters.
+        """
+        try:
+            self.driver.get(f"{HOME_RANKING_URL}?Distance={dist['id']}&SwimmingTypeDetailId={stroke['id']}")
+            self.wait.until(EC.presence_of_element_located((By.ID, 'SwimmingTypeDetail')))
+            # The page's own first load (document ready) must finish before the table is rebuilt
+            self.wait.until(lambda d: d.execute_script(
+                "return typeof(ReInitDatatable) === 'function' && !$('#ResultTable_processing').is(':visible');"))
+            self.driver.execute_script(FAST_FILTER_SCRIPT, {**filters['event'], 'startDate': filters['startDate'],
+                                                            'endDate': filters['endDate']})
+            self.wait.until(lambda d: d.execute_script("return window.taaFastDrawn === true;"))
+            params = self.driver.execute_script("return $('#ResultTable').DataTable().ajax.params();")
+        except Exception as e:
+            print(f"[DEBUG] Fast path failed: {e}")
+            return False
+        mismatches = filter_mismatches(params, filters)
+        if mismatches:
+            print(f"[DEBUG] Fast path applied the wrong filters ({', '.join(mismatches)}).")
+            return False
+        print("[DEBUG] Fast path: filters applied with a single table load.")
+        return True
+
+    def _load_with_form(self, stroke, dist, gender, pool, min_age, max_age, start_str, end_str):
+        """Sets the filters one control at a time, as a user would, then shows all entries."""
+        self.driver.get(self.initial_url)
+        self.wait.until(EC.presence_of_element_located((By.ID, 'SwimmingTypeDetail')))
+
+        # Standard selections
+        self._select_and_wait('SwimmingTypeDetail', stroke['id'])
+        self._select_and_wait('Distance', dist['id'])
+        self._select_and_wait('GenderGroup', gender['id'])
+        self._select_and_wait('PoolLengthId', pool['id'])
+        self._enter_text_and_wait('AgeGroupMin', min_age)
+        self._enter_text_and_wait('AgeGroupMax', max_age)
+
+        # CRITICAL: Input dates AFTER other selections to prevent them from being reset
+        self._enter_text_and_wait('StartDate', start_str)
+        self._enter_text_and_wait('EndDate', end_str)
+
+        try:
+            # Attempt 1: Standard <select> element (keeping as a quick check)
+            select_element = self.wait.until(EC.presence_of_element_located((By.CSS_SELECTOR, '#ResultTable_length select')))
+            dropdown = Select(select_element)
+            dropdown.select_by_value('-1')
+            print("[DEBUG] Success: Used standard <select> to show all entries.")
+            self.wait.until(EC.invisibility_of_element_located((By.ID, 'ResultTable_processing')))
+        except TimeoutException:
+            print("[DEBUG] Info: Standard <select> not found. Trying custom dropdown interaction (e.g., Bootstrap/DataTables style).")
+            try:
+                # Attempt 2: Click a dropdown-toggle button, then find the 'All' link.
+
+                # 1. Find and click the button that opens the dropdown menu.
+                # This targets a button with class 'dropdown-toggle' inside the length container.
+                trigger_button = self.wait.until(EC.element_to_be_clickable((By.CSS_SELECTOR, '#ResultTable_length .dropdown-toggle')))
+                trigger_button.click()
+                print("[DEBUG] Info: Clicked dropdown trigger button.")
+
+                # 2. Wait for the 'All' option link to appear in the menu and click it.
+                all_option_link = self.wait.until(EC.element_to_be_clickable((By.XPATH, "//ul[contains(@class, 'dropdown-menu')]//a[normalize-space()='All']")))
+                all_option_link.click()
+
+                print("[DEBUG] Success: Used custom dropdown to show all entries.")
+                self.wait.until(EC.invisibility_of_element_located((By.ID, 'ResultTable_processing')))
+            except Exception as e:
+                print(f"[DEBUG] Error: Failed to interact with custom dropdown. Proceeding with default. Error: {e}")
+
+        time.sleep(2) # Final breather for JS updates
+
     def scrape_rankings(self, stroke, dist, gender, pool, min_age, max_age, start_date, end_date):
         try:
             print(f"[DEBUG] Starting scrape: {start_date} to {end_date}")
-            self.driver.get(self.initial_url)
-            self.wait.until(EC.presence_of_element_located((By.ID, 'SwimmingTypeDetail')))
-            
+
             # Format dates as DD/MMM/YY (matching website's datepicker format)
             start_str = start_date.strftime('%d/%b/%y')
             end_str = end_date.strftime('%d/%b/%y')
 
-            # Standard selections
-            self._select_and_wait('SwimmingTypeDetail', stroke['id'])
-            self._select_and_wait('Distance', dist['id'])
-            self._select_and_wait('GenderGroup', gender['id'])
-            self._select_and_wait('PoolLengthId', pool['id'])
-            self._enter_text_and_wait('AgeGroupMin', min_age)
-            self._enter_text_and_wait('AgeGroupMax', max_age)
-            
-            # CRITICAL: Input dates AFTER other selections to prevent them from being reset
-            self._enter_text_and_wait('StartDate', start_str)
-            self._enter_text_and_wait('EndDate', end_str)
+            filters = self._filters(stroke, dist, gender, pool, min_age, max_age, start_str, end_str)
+            if not (self.fast_path and self._load_fast(stroke, dist, filters)):
+                self._load_with_form(stroke, dist, gender, pool, min_age, max_age, start_str, end_str)
 
-            try:
-                # Attempt 1: Standard <select> element (keeping as a quick check)
-                select_element = self.wait.until(EC.presence_of_element_located((By.CSS_SELECTOR, '#ResultTable_length select')))
-                dropdown = Select(select_element)
-                dropdown.select_by_value('-1')
-                print("[DEBUG] Success: Used standard <select> to show all entries.")
-                self.wait.until(EC.invisibility_of_element_located((By.ID, 'ResultTable_processing')))
-            except TimeoutException:
-                print("[DEBUG] Info: Standard <select> not found. Trying custom dropdown interaction (e.g., Bootstrap/DataTables style).")
-                try:
-                    # Attempt 2: Click a dropdown-toggle button, then find the 'All' link.
-                    
-                    # 1. Find and click the button that opens the dropdown menu.
-                    # This targets a button with class 'dropdown-toggle' inside the length container.
-                    trigger_button = self.wait.until(EC.element_to_be_clickable((By.CSS_SELECTOR, '#ResultTable_length .dropdown-toggle')))
-                    trigger_button.click()
-                    print("[DEBUG] Info: Clicked dropdown trigger button.")
-
-                    # 2. Wait for the 'All' option link to appear in the menu and click it.
-                    all_option_link = self.wait.until(EC.element_to_be_clickable((By.XPATH, "//ul[contains(@class, 'dropdown-menu')]//a[normalize-space()='All']")))
-                    all_option_link.click()
-                    
-                    print("[DEBUG] Success: Used custom dropdown to show all entries.")
-                    self.wait.until(EC.invisibility_of_element_located((By.ID, 'ResultTable_processing')))
-                except Exception as e:
-                    print(f"[DEBUG] Error: Failed to interact with custom dropdown. Proceeding with default. Error: {e}")
-            
-            time.sleep(2) # Final breather for JS updates
-            
             table_element = self.wait.until(EC.presence_of_element_located((By.ID, 'ResultTable')))
             html = table_element.get_attribute('outerHTML')
             
@@ -1,32 +1,62 @@
+import gc
+import numpy as np
 import pandas as pd
 import requests
 import json
+from contextlib import contextmanager
 from datetime import datetime
+import events
+
+try:
+    import orjson  # only marginally faster than json here on mostly-Thai responses; pausing the GC matters more
+except ImportError:
+    orjson = None
+
+# DataFrame column -> key in each row of the CheckRank response
+RESPONSE_COLUMNS = {'Rank': 'Place', 'Name': 'FullName', 'Club': 'ClubName', 'Nationality': 'Nation', 'Time': 'Time'}
+# DataFrame column -> key in each row's nested Competition object
+COMPETITION_COLUMNS = {'Competition': 'Name', 'CompetitionDate': 'StartDayString'}
+
+
+@contextmanager
+def _gc_paused():
+    # Decoding allocates a dict per row; left on, the cyclic GC rescans them all many times over
+    enabled = gc.isenabled()
+    gc.disable()
+    try:
+        yield
+    finally:
+        if enabled:
+            gc.enable()
+
+def loads(content):
+    """Decodes a JSON response body, with orjson when it is installed."""
+    return orjson.loads(content) if orjson is not None else json.loads(content)
+
+def constant_column(value, length: int) -> pd.Categorical:
+    """One repeated value as a single-category column: one code byte per row instead of a string."""
+    return pd.Categorical.from_codes(np.zeros(length, dtype=np.int8), categories=[value])
+
+def records_frame(rows: list) -> pd.DataFrame:
+    """Builds the scraped-records DataFrame column by column from the response rows."""
+    columns = {column: [row.get(key) for row in rows] for column, key in RESPONSE_COLUMNS.items()}
+    competitions = [row.get('Competition') or {} for row in rows]
+    for column, key in COMPETITION_COLUMNS.items():
+        columns[column] = [competition.get(key) for competition in competitions]
+    return pd.DataFrame(columns)
+
+def parse_rankings(content) -> pd.DataFrame:
+    """The records in a CheckRank response body (empty if it has none)."""
+    with _gc_paused():
+        rows = loads(content).get('data')
+        return records_frame(rows) if rows else pd.DataFrame()
 
 class SwimDataAjaxScraper:
-    STROKES = {
-        "1": {"name": "FreeStyle (ฟรีสไตล์)", "id": "2"},
-        "2": {"name": "Backstroke (กรรเชียง)", "id": "3"},
-        "3": {"name": "Breaststroke (กบ)", "id": "4"},
-        "4": {"name": "Butterfly (ผีเสื้อ)", "id": "5"},
-        "5": {"name": "Individual Medley (เดี่ยวผสม)", "id": "6"}
-    }
-    DISTANCES = {
-        "1": {"name": "50 m", "id": "1"},
-        "2": {"name": "100 m", "id": "2"},
-        "3": {"name": "200 m", "id": "3"},
-        "4": {"name": "400 m", "id": "4"},
-        "5": {"name": "800 m", "id": "5"},
-        "6": {"name": "1500 m", "id": "9"}
-    }
-    GENDERS = {
-        "1": {"name": "Male (ชาย)", "id": "1"},
-        "2": {"name": "Female (หญิง)", "id": "2"}
-    }
-    POOL_TYPES = {
-        "1": {"name": "Long Course (50m)", "id": "1"},
-        "2": {"name": "Short Course (25m)", "id": "2"}
-    }
+    # Kept as class attributes for callers that read them off the scraper
+    STROKES = events.STROKES
+    DISTANCES = events.DISTANCES
+    GENDERS = events.GENDERS
+    POOL_TYPES = events.POOL_TYPES
 
     def __init__(self, headless=True): # headless parameter is ignored for AJAX scraper
         self.base_url = "https://www.thaiaquatics.or.th"
@@ -35,7 +65,8 @@ class SwimDataAjaxScraper:
         # response = self.session.get(self.base_url + "/Index/HomeRanking")
         # response.raise_for_status()
 
-    def scrape_rankings(self, stroke, dist, gender, pool, min_age, max_age, start_date, end_date):
+    def scrape_rankings(self, stroke, dist, gender, pool, min_age, max_age, start_date, end_date, time_standard=""):
+        # time_standard: optional MM:SS.ss cut for the site's time-standard filter (the TimeStd box)
         try:
             # Format dates as DD/Mon/YY (2-digit Gregorian year), matching the website's JS
             start_str = start_date.strftime('%d/%b/%y')
@@ -43,7 +74,7 @@ class SwimDataAjaxScraper:
 
             # Construct ModelCompetition object as in JS
             model_competition = {
-                "TimestdF": "", # Not available from Streamlit UI, assume empty
+                "TimestdF": time_standard or "",
                 "SwimmingTypeDetailId": stroke['id'],
                 "GenderId": gender['id'],
                 "DistId": dist['id'],
@@ -79,30 +110,15 @@ class SwimDataAjaxScraper:
             response = self.session.post(ajax_url, data=data_ajax, headers=headers)
             response.raise_for_status() # Raise an exception for HTTP errors
 
-            json_data = response.json()
-
-            if 'data' in json_data and json_data['data']:
-                records = []
-                for item in json_data['data']:
-                    record = {
-                        'Rank': item.get('Place'),
-                        'Name': item.get('FullName'),
-                        'Club': item.get('ClubName'),
-                        'Nationality': item.get('Nation'),
-                        'Time': item.get('Time'),
-                        'Competition': item.get('Competition', {}).get('Name'),
-                        'CompetitionDate': item.get('Competition', {}).get('StartDayString'),
-                    }
-                    records.append(record)
-                
-                df = pd.DataFrame(records)
-                
+            df = parse_rankings(response.content)
+
+            if not df.empty:
                 # Add context columns from scrape parameters (still needed as they are not in the raw AJAX response)
-                df['Stroke'] = stroke['name']
-                df['Distance'] = dist['name']
-                df['AgeRange'] = f"{min_age}-{max_age}"
-                df['Pool'] = pool['name']
-                df['Gender'] = gender['name']
+                df['Stroke'] = constant_column(stroke['name'], len(df))
+                df['Distance'] = constant_column(dist['name'], len(df))
+                df['AgeRange'] = constant_column(f"{min_age}-{max_age}", len(df))
+                df['Pool'] = constant_column(pool['name'], len(df))
+                df['Gender'] = constant_column(gender['name'], len(df))
 
                 print(f"[DEBUG] AJAX fetched {len(df)} records.")
                 return df
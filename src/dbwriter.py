@@ -0,0 +1,120 @@
+import queue
+import sqlite3
+import threading
+from concurrent.futures import Future
+
+# Most requests one group-committed transaction may hold
+MAX_BATCH = 256
+# How long a writer waits on a lock held by another process (e.g. a cron ingest)
+BUSY_TIMEOUT_MS = 30_000
+
+_STOP = object()
+
+
+class WriteQueue:
+    """
+    The single writer for one SQLite file. Callers hand it functions of a cursor;
+    a dedicated thread runs them in order on its own connection.
+
+    Whatever is queued while a transaction is committing goes into the next one,
+    so many small concurrent writes share one lock acquisition and one fsync
+    (group commit). Each request runs inside its own SAVEPOINT: a request that
+    raises is rolled back alone and its exception is re-raised to its caller,
+    while the rest of the batch still commits.
+    """
+
+    def __init__(self, db_file: str, max_batch: int = MAX_BATCH):
+        self.db_file = db_file
+        self.max_batch = max_batch
+        self.commits = 0
+        self.requests = 0
+        self._queue = queue.Queue()
+        self._thread = threading.Thread(target=self._run, name=f"WriteQueue({db_file})", daemon=True)
+        self._thread.start()
+
+    def submit_async(self, func, *args) -> Future:
+        """Queues func(cursor, *args) and returns a Future for its result."""
+        if not self._thread.is_alive():
+            raise RuntimeError("The write queue has been closed.")
+        future = Future()
+        self._queue.put((future, func, args))
+        return future
+
+    def submit(self, func, *args):
+        """Runs func(cursor, *args) on the writer thread and returns its result once committed."""
+        if threading.current_thread() is self._thread:
+            raise RuntimeError("submit() called from inside a write request.")
+        return self.submit_async(func, *args).result()
+
+    def close(self):
+        """Finishes the queued requests, then stops the writer thread."""
+        if self._thread.is_alive():
+            self._queue.put(_STOP)
+            self._thread.join()
+
+    def _connect(self):
+        # Autocommit mode: the writer issues BEGIN/SAVEPOINT/COMMIT itself
+        conn = sqlite3.connect(self.db_file, isolation_level=None, check_same_thread=False)
+        conn.execute(f"PRAGMA busy_timeout = {BUSY_TIMEOUT_MS}")
+        # WAL lets the dashboard keep reading while a batch commits
+        conn.execute("PRAGMA journal_mode = WAL")
+        conn.execute("PRAGMA synchronous = NORMAL")
+        return conn
+
+    def _next_batch(self):
+        batch = [self._queue.get()]
+        while len(batch) < self.max_batch and batch[-1] is not _STOP:
+            try:
+                batch.append(self._queue.get_nowait())
+            except queue.Empty:
+                break
+        return batch
+
+    def _run(self):
+        conn = self._connect()
+        try:
+            while True:
+                batch = self._next_batch()
+                stop = batch[-1] is _STOP
+                requests = [item for item in batch if item is not _STOP]
+                if requests:
+                    self._commit_batch(conn, requests)
+                if stop:
+                    return
+        finally:
+            conn.close()
+
+    def _commit_batch(self, conn, requests):
+        c = conn.cursor()
+        outcomes = []
+        try:
+            c.execute("BEGIN IMMEDIATE")
+            for future, func, args in requests:
+                if not future.set_running_or_notify_cancel():
+                    continue
+                c.execute("SAVEPOINT request")
+                try:
+                    result = func(c, *args)
+                except Exception as e:
+                    c.execute("ROLLBACK TO request")
+                    outcomes.append((future, None, e))
+                else:
+                    outcomes.append((future, result, None))
+                c.execute("RELEASE request")
+            c.execute("COMMIT")
+        except sqlite3.Error as e:
+            print(f"[ERROR] Write batch of {len(requests)} requests failed: {e}")
+            if conn.in_transaction:
+                conn.execute("ROLLBACK")
+            # Nothing in the batch was committed, so every caller sees the failure
+            for future, _, _ in requests:
+                if not future.done():
+                    future.set_exception(e)
+            return
+        self.commits += 1
+        self.requests += len(outcomes)
+        for future, result, error in outcomes:
+            if error is not None:
+                future.set_exception(error)
+            else:
+                future.set_result(result)
@@ -0,0 +1,86 @@
+"""
+Seeded meet entries for a roster.
+
+A roster is a CSV or Excel sheet with a UniqID or Name column (otherwise its
+first column is used), one swimmer per row. seed_entries() looks up every
+swimmer's seed time for every chosen event with db.get_seed_times(), one query
+for the whole list, and write_entries() writes the entry file through export.
+
+Swims from the other pool can be converted with factors loaded from a CSV:
+
+    Stroke,Distance,FromPool,ToPool,Factor
+
+Stroke and Pool may be given by their English name ("FreeStyle", "Short
+Course") or the full option name. A swim in FromPool times Factor is its
+ToPool equivalent.
+"""
+import pandas as pd
+import database as db
+import events
+import export
+from standards import format_cut_time
+
+CONVERSION_COLUMNS = ['Stroke', 'Distance', 'FromPool', 'ToPool', 'Factor']
+ENTRY_COLUMNS = ['Entry', 'SwimmerUniqID', 'Name', 'Gender', 'Club', 'School', 'Stroke', 'Distance', 'SeedTime',
+                 'SeedSeconds', 'Time', 'Pool', 'Converted', 'Competition', 'CompetitionDate', 'SwimDate']
+ROSTER_COLUMNS = ['UniqID', 'Name']
+# Seed time of an entry without a stored swim
+NO_TIME = "NT"
+
+_OPTIONS = {
+    'Stroke': events.STROKES,
+    'Distance': events.DISTANCES,
+    'Pool': events.POOL_TYPES,
+}
+
+
+def _option_name(kind: str, value) -> str:
+    """The full option name for a full name ("Short Course (25m)") or its English part ("short course")."""
+    value = str(value).strip()
+    for option in _OPTIONS[kind].values():
+        if value == option['name'] or value.lower() == option['name'].split(' (')[0].lower():
+            return option['name']
+    raise ValueError(f"Unknown {kind.lower()} '{value}'. Choose from: {', '.join(o['name'] for o in _OPTIONS[kind].values())}")
+
+def parse_conversions(df: pd.DataFrame) -> pd.DataFrame:
+    """Validates a course conversion table and normalizes its names and factors."""
+    missing = [col for col in CONVERSION_COLUMNS if col not in df.columns]
+    if missing:
+        raise ValueError(f"Conversions are missing columns: {', '.join(missing)}")
+    df = df[CONVERSION_COLUMNS].copy()
+    for column, kind in (('Stroke', 'Stroke'), ('Distance', 'Distance'), ('FromPool', 'Pool'), ('ToPool', 'Pool')):
+        df[column] = [_option_name(kind, value) for value in df[column]]
+    df['Factor'] = pd.to_numeric(df['Factor'], errors='coerce')
+    bad = df.index[df['Factor'].isna() | (df['Factor'] <= 0)]
+    if len(bad):
+        raise ValueError(f"Factors must be positive numbers (rows {', '.join(str(i + 2) for i in bad)})")
+    return df
+
+def load_conversions(path_or_buffer) -> int:
+    """Replaces the stored course conversion factors with a CSV file."""
+    return db.set_course_conversions(parse_conversions(pd.read_csv(path_or_buffer, dtype=str)))
+
+def read_roster(df: pd.DataFrame) -> list:
+    """The swimmer entries of a roster sheet: its UniqID or Name column, else its first column."""
+    column = next((col for col in ROSTER_COLUMNS if col in df.columns), df.columns[0] if len(df.columns) else None)
+    if column is None:
+        return []
+    entries = df[column].dropna().astype(str).str.strip()
+    return entries[entries != ""].tolist()
+
+def seed_entries(roster: list, event_list: list, pool: str = None, start_date=None, end_date=None,
+                 convert: bool = False) -> pd.DataFrame:
+    """
+    One row (ENTRY_COLUMNS) per roster entry and (stroke, distance) in
+    event_list, with the seed time in pool (any pool if None) as MM:SS.ss,
+    or NO_TIME.
+    start_date/end_date are dates or ISO strings bounding the swims used.
+    """
+    df = db.get_seed_times(roster, event_list, pool, start_date, end_date, convert)
+    df['SeedTime'] = [NO_TIME if pd.isna(s) else format_cut_time(s) for s in df['SeedSeconds']]
+    return df[ENTRY_COLUMNS]
+
+def write_entries(target, entries: pd.DataFrame, fmt: str = 'csv') -> int:
+    """Writes seeded entries to target, a path or binary file object. Returns the number of rows."""
+    entries = entries.astype(object).where(entries.notna(), None)
+    return export.write(target, fmt, entries.columns, [list(entries.itertuples(index=False, name=None))])
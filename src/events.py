@@ -0,0 +1,31 @@
+"""
+Event option tables shared by the scrapers, the CLI and the dashboard.
+
+Each option maps a menu choice key to its display name and the id the TAA site
+uses in its form controls and AJAX parameters. This module has no imports so
+that pages which only need the option names never load a scraper backend.
+"""
+
+STROKES = {
+    "1": {"name": "FreeStyle (ฟรีสไตล์)", "id": "2"},
+    "2": {"name": "Backstroke (กรรเชียง)", "id": "3"},
+    "3": {"name": "Breaststroke (กบ)", "id": "4"},
+    "4": {"name": "Butterfly (ผีเสื้อ)", "id": "5"},
+    "5": {"name": "Individual Medley (เดี่ยวผสม)", "id": "6"}
+}
+DISTANCES = {
+    "1": {"name": "50 m", "id": "1"},
+    "2": {"name": "100 m", "id": "2"},
+    "3": {"name": "200 m", "id": "3"},
+    "4": {"name": "400 m", "id": "4"},
+    "5": {"name": "800 m", "id": "5"},
+    "6": {"name": "1500 m", "id": "9"}
+}
+GENDERS = {
+    "1": {"name": "Male (ชาย)", "id": "1"},
+    "2": {"name": "Female (หญิง)", "id": "2"}
+}
+POOL_TYPES = {
+    "1": {"name": "Long Course (50m)", "id": "1"},
+    "2": {"name": "Short Course (25m)", "id": "2"}
+}
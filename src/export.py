@@ -0,0 +1,132 @@
+"""
+Streams filtered records out of swim_data.db as CSV, Excel or Parquet.
+
+Rows come from database.iter_records() in chunks and are written as they
+arrive, so even a full-history export never holds the whole table (or a
+DataFrame of it) in memory. The target is a file path, written atomically via
+a temporary file, or a binary file object such as a download buffer.
+
+    python -m taa export --format xlsx --stroke "FreeStyle (ฟรีสไตล์)" --output free.xlsx
+"""
+import csv
+import importlib.util
+import io
+import os
+import re
+
+import database as db
+
+FORMATS = ['csv', 'xlsx', 'parquet']
+MIME_TYPES = {
+    'csv': "text/csv",
+    'xlsx': "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
+    'parquet': "application/vnd.apache.parquet",
+}
+# Rows per worksheet, header included; longer exports continue on a new sheet
+EXCEL_MAX_ROWS = 1_048_576
+# The BOM lets Excel open Thai names in a CSV without mangling them
+CSV_ENCODING = 'utf-8-sig'
+# 64-bit record keys lose digits as Excel numbers (15 significant digits), so they are written as text
+EXCEL_TEXT_COLUMNS = {'UniqueID'}
+
+
+# openpyxl and pyarrow stay optional, and are only imported by their writers
+_FORMAT_MODULES = {'xlsx': "openpyxl", 'parquet': "pyarrow"}
+
+def is_available(fmt: str) -> bool:
+    if fmt in _FORMAT_MODULES:
+        return importlib.util.find_spec(_FORMAT_MODULES[fmt]) is not None
+    return fmt == 'csv'
+
+def export_filename(filters: dict = None, fmt: str = 'csv') -> str:
+    """A descriptive file name for an export of the given dashboard filter."""
+    filters = filters or {}
+    parts = [filters.get(key) for key in ('stroke', 'distance', 'gender')]
+    parts = [p.split(' (')[0] for p in parts if p and p != "All"]
+    if 'min_age' in filters or 'max_age' in filters:
+        parts.append(f"Age{filters.get('min_age', 0)}-{filters.get('max_age', 200)}")
+    name = "_".join(["TAA_Records"] + parts)
+    return re.sub(r"[^\w.-]+", "_", name) + "." + fmt
+
+def _write_csv(f, columns, chunks) -> int:
+    text = io.TextIOWrapper(f, encoding=CSV_ENCODING, newline='', write_through=True)
+    writer = csv.writer(text)
+    writer.writerow(columns)
+    rows = 0
+    for chunk in chunks:
+        writer.writerows(chunk)
+        rows += len(chunk)
+    # Hand the binary file back to the caller instead of closing it with the wrapper
+    text.detach()
+    return rows
+
+def _write_xlsx(f, columns, chunks) -> int:
+    from openpyxl import Workbook
+    # write_only streams rows to a temporary file instead of keeping cell objects
+    workbook = Workbook(write_only=True)
+    as_text = [i for i, col in enumerate(columns) if col in EXCEL_TEXT_COLUMNS]
+    sheet, sheet_rows, rows = None, EXCEL_MAX_ROWS, 0
+    for chunk in chunks:
+        for row in chunk:
+            if sheet_rows == EXCEL_MAX_ROWS:
+                sheet = workbook.create_sheet(f"Records {len(workbook.worksheets) + 1}" if sheet else "Records")
+                sheet.append(columns)
+                sheet_rows = 1
+            if as_text:
+                row = list(row)
+                for i in as_text:
+                    row[i] = None if row[i] is None else str(row[i])
+            sheet.append(row)
+            sheet_rows += 1
+        rows += len(chunk)
+    if sheet is None:
+        workbook.create_sheet("Records").append(columns)
+    workbook.save(f)
+    return rows
+
+def _write_parquet(f, columns, chunks) -> int:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+    types = {'UniqueID': pa.int64(), 'Seconds': pa.float64()}
+    schema = pa.schema([(col, types.get(col, pa.string())) for col in columns])
+    rows = 0
+    # One row group per chunk; repeated text is dictionary-encoded by the writer
+    with pq.ParquetWriter(f, schema, compression='zstd') as writer:
+        for chunk in chunks:
+            values = list(zip(*chunk))
+            writer.write_table(pa.Table.from_arrays(
+                [pa.array(v, type=field.type) for v, field in zip(values, schema)], schema=schema))
+            rows += len(chunk)
+    return rows
+
+_WRITERS = {'csv': _write_csv, 'xlsx': _write_xlsx, 'parquet': _write_parquet}
+
+def write(target, fmt: str, columns: list, chunks) -> int:
+    """
+    Writes an iterable of row chunks (sequences of row tuples in columns order)
+    to target, a path or a binary file object. Returns the number of rows.
+    """
+    if fmt not in _WRITERS:
+        raise ValueError(f"Unknown export format '{fmt}'. Choose from: {', '.join(FORMATS)}")
+    if not is_available(fmt):
+        raise RuntimeError(f"Exporting {fmt} needs the {_FORMAT_MODULES[fmt]} package.")
+    columns = list(columns)
+    if not isinstance(target, (str, os.PathLike)):
+        return _WRITERS[fmt](target, columns, chunks)
+
+    tmp_path = f"{target}.tmp"
+    try:
+        with open(tmp_path, 'wb') as f:
+            rows = _WRITERS[fmt](f, columns, chunks)
+        os.replace(tmp_path, target)
+    finally:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+    return rows
+
+def export_records(target, fmt: str = 'csv', filters: dict = None, chunk_size: int = db.EXPORT_CHUNKSIZE) -> int:
+    """
+    Streams the records matching a dashboard filter dict to target. Returns the
+    number of rows, for the caller to report; nothing is printed, so target may be stdout.
+    """
+    return write(target, fmt, db.EXPORT_COLUMNS, db.iter_records(filters, chunk_size))
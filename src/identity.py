@@ -0,0 +1,243 @@
+import re
+import unicodedata
+from difflib import SequenceMatcher
+
+# Thai tone marks, mai taikhu and thanthakhat are the usual source of spelling
+# variants between scrapes, so they are ignored when building blocking keys.
+_THAI_MARKS = re.compile('[\u0E47-\u0E4C]')
+_LATIN_COMBINING = re.compile('[\u0300-\u036F]')
+_NON_WORD = re.compile(r"[^\w\s]")
+_HONORIFICS = {
+    'ด.ช.', 'ด.ญ.', 'เด็กชาย', 'เด็กหญิง', 'นาย', 'นาง', 'นางสาว', 'น.ส.',
+    'mr', 'mrs', 'ms', 'miss', 'master'
+}
+
+MATCH_THRESHOLD = 0.9    # Minimum score to treat an incoming name as an existing swimmer
+CLUB_BONUS = 0.05        # Same club nudges a borderline spelling variant over the line
+MAX_BLOCK_SIZE = 500     # Blocks larger than this are too common to be useful (e.g. a shared surname)
+
+
+def legacy_uniq_id(name: str) -> str:
+    """The original natural key used for SwimmerTable.UniqID."""
+    return name.replace(' ', '_').lower()
+
+def normalize_name(name) -> str:
+    """Case-folds, strips accents/punctuation/honorifics and collapses whitespace."""
+    if not isinstance(name, str):
+        return ""
+    text = unicodedata.normalize('NFKD', name)
+    text = _LATIN_COMBINING.sub('', text)
+    text = unicodedata.normalize('NFKC', text).casefold()
+    tokens = [t for t in text.split() if t not in _HONORIFICS]
+    text = _NON_WORD.sub(' ', ' '.join(tokens))
+    return ' '.join(text.split())
+
+def name_tokens(name) -> list:
+    """Blocking tokens: normalised name tokens with Thai tone marks removed."""
+    return [t for t in (strip_marks(tok) for tok in normalize_name(name).split()) if len(t) >= 2]
+
+def strip_marks(text: str) -> str:
+    """The text without Thai tone marks."""
+    return _THAI_MARKS.sub('', text)
+
+def trigrams(text) -> set:
+    """Character trigrams of the normalised text with Thai tone marks removed, for fuzzy search."""
+    text = strip_marks(normalize_name(text))
+    return {text[i:i + 3] for i in range(len(text) - 2)}
+
+def _compact(name) -> str:
+    # Order-insensitive form so "Kido Ai" and "Ai Kido" compare equal
+    return ' '.join(sorted(normalize_name(name).split()))
+
+def _club_key(club) -> str:
+    return ' '.join(normalize_name(club).split()) if isinstance(club, str) else ""
+
+def competition_year(date_str):
+    """Gregorian year of a 'DD/<thai month>/<buddhist year>' competition date, or None."""
+    if not isinstance(date_str, str):
+        return None
+    try:
+        return int(date_str.strip().rsplit('/', 1)[-1]) - 543
+    except ValueError:
+        return None
+
+def birth_year_range(age, date_str):
+    """
+    Estimates the possible birth years from an age ("9" or "10-11") at a competition.
+    Returns (earliest, latest) or None when either part is missing.
+    """
+    year = competition_year(date_str)
+    if year is None or age is None:
+        return None
+    try:
+        parts = [int(p) for p in str(age).split('-')]
+    except ValueError:
+        return None
+    # One year of slack either side: the site's age cut-off date is not published
+    return year - max(parts) - 1, year - min(parts)
+
+
+class SwimmerResolver:
+    """
+    Resolves incoming swimmer names to SwimmerTable.UniqID values.
+
+    Candidates are generated from a blocking index (normalised name tokens, gender,
+    club and birth year) so each lookup only scores the handful of swimmers sharing
+    a block instead of the whole roster. A read_only resolver keeps what it learns
+    (aliases, narrowed birth years) in memory instead of writing it back.
+    """
+
+    def __init__(self, cursor, read_only=False):
+        self.c = cursor
+        self.read_only = read_only
+        self.swimmers = {}
+        self.aliases = {}
+        self.blocks = {}
+        self._load()
+
+    def _load(self):
+        self.c.execute("SELECT UniqID, Name, Gender, YearOfBirth, Club, BirthYearMin, BirthYearMax FROM SwimmerTable")
+        for uniq_id, name, gender, yob, club, first, last in self.c.fetchall():
+            self._index(uniq_id, name, gender, yob, club, (first, last) if first is not None and last is not None else None)
+        self.c.execute("SELECT AliasID, CanonicalID FROM SwimmerMergeTable")
+        self.aliases = dict(self.c.fetchall())
+
+    def _index(self, uniq_id, name, gender, yob, club, yob_range=None):
+        if yob_range is None and yob is not None:
+            yob_range = (int(yob), int(yob))
+        profile = {
+            'UniqID': uniq_id, 'Name': name, 'Gender': gender, 'Club': club,
+            'compact': _compact(name), 'club_key': _club_key(club), 'yob_range': yob_range,
+        }
+        self.swimmers[uniq_id] = profile
+        for key in self._block_keys(profile):
+            self.blocks.setdefault(key, []).append(uniq_id)
+
+    @staticmethod
+    def _block_keys(profile):
+        gender = profile['Gender'] or ""
+        keys = [('t', gender, tok) for tok in name_tokens(profile['Name'])]
+        if profile['club_key'] and profile['yob_range']:
+            first, last = profile['yob_range']
+            keys.extend(('a', gender, profile['club_key'], y) for y in range(first, last + 1))
+        return keys
+
+    def birth_years(self, uniq_id):
+        """The (earliest, latest) birth-year estimate of a swimmer, or (None, None)."""
+        return self.swimmers[uniq_id]['yob_range'] or (None, None)
+
+    def canonical(self, uniq_id):
+        return self.aliases.get(uniq_id, uniq_id)
+
+    def _compatible(self, profile, candidate):
+        if profile['Gender'] and candidate['Gender'] and profile['Gender'] != candidate['Gender']:
+            return False
+        a, b = profile['yob_range'], candidate['yob_range']
+        if a and b and (a[1] < b[0] or b[1] < a[0]):
+            return False
+        return True
+
+    def _score(self, profile, candidate):
+        if not self._compatible(profile, candidate):
+            return 0.0
+        if profile['compact'] == candidate['compact']:
+            return 1.0
+        score = SequenceMatcher(None, profile['compact'], candidate['compact']).ratio()
+        if profile['club_key'] and profile['club_key'] == candidate['club_key']:
+            score += CLUB_BONUS
+        return score
+
+    def candidates(self, profile):
+        """Swimmer IDs sharing at least one usable block with the profile."""
+        seen = set()
+        for key in self._block_keys(profile):
+            block = self.blocks.get(key, ())
+            if len(block) > MAX_BLOCK_SIZE:
+                continue
+            seen.update(block)
+        return seen
+
+    def best_match(self, profile):
+        best_id, best_score = None, 0.0
+        for uniq_id in self.candidates(profile):
+            score = self._score(profile, self.swimmers[uniq_id])
+            if score > best_score:
+                best_id, best_score = uniq_id, score
+        return best_id, best_score
+
+    def new_uniq_id(self, name):
+        """Allocates an unused UniqID, suffixing the natural key when it is taken."""
+        base = legacy_uniq_id(name)
+        uniq_id, n = base, 1
+        while uniq_id in self.swimmers or uniq_id in self.aliases:
+            n += 1
+            uniq_id = f"{base}~{n}"
+        return uniq_id
+
+    def resolve(self, name, gender=None, club=None, age=None, competition_date=None):
+        """
+        Returns (uniq_id, is_new) for an incoming swimmer.
+        A new swimmer is added to the index but not written to the database.
+        """
+        natural_id = legacy_uniq_id(name)
+        profile = {
+            'Name': name, 'Gender': gender, 'Club': club,
+            'compact': _compact(name), 'club_key': _club_key(club),
+            'yob_range': birth_year_range(age, competition_date),
+        }
+
+        # Fast path: the natural key (or a known alias of it) is the same child
+        existing = self.swimmers.get(self.canonical(natural_id))
+        if existing is not None and self._compatible(profile, existing):
+            self._narrow(existing, profile['yob_range'])
+            return existing['UniqID'], False
+
+        match_id, score = self.best_match(profile)
+        if match_id is not None and score >= MATCH_THRESHOLD:
+            match_id = self.canonical(match_id)
+            if natural_id not in self.swimmers and natural_id not in self.aliases:
+                self.add_alias(natural_id, match_id, score, 'auto')
+            if match_id in self.swimmers:
+                self._narrow(self.swimmers[match_id], profile['yob_range'])
+            return match_id, False
+
+        uniq_id = self.new_uniq_id(name)
+        self._index(uniq_id, name, gender, None, club, profile['yob_range'])
+        return uniq_id, True
+
+    def _narrow(self, existing, yob_range):
+        """Intersects a matched swimmer's birth-year estimate with a new sighting's, storing it when it narrows."""
+        current = existing['yob_range']
+        if yob_range is None:
+            return
+        narrowed = yob_range if current is None else (max(current[0], yob_range[0]), min(current[1], yob_range[1]))
+        if narrowed == current or narrowed[0] > narrowed[1]:
+            return
+        old_keys = set(self._block_keys(existing))
+        existing['yob_range'] = narrowed
+        for key in self._block_keys(existing):
+            if key not in old_keys:
+                self.blocks.setdefault(key, []).append(existing['UniqID'])
+        if not self.read_only:
+            self.c.execute("UPDATE SwimmerTable SET BirthYearMin = ?, BirthYearMax = ? WHERE UniqID = ?",
+                           (*narrowed, existing['UniqID']))
+
+    def add_alias(self, alias_id, canonical_id, score=None, method='manual'):
+        if not self.read_only:
+            self.c.execute('''
+                INSERT OR REPLACE INTO SwimmerMergeTable (AliasID, CanonicalID, Score, Method)
+                VALUES (?, ?, ?, ?)
+            ''', (alias_id, canonical_id, score, method))
+        self.aliases[alias_id] = canonical_id
+
+    def duplicate_pairs(self, threshold=MATCH_THRESHOLD):
+        """Yields (uniq_id, other_id, score) for likely duplicates already in SwimmerTable."""
+        for uniq_id, profile in self.swimmers.items():
+            if uniq_id in self.aliases:
+                continue
+            for other_id in self.candidates(profile):
+                if other_id <= uniq_id or other_id in self.aliases:
+                    continue
+                score = self._score(profile, self.swimmers[other_id])
+                if score >= threshold:
+                    yield uniq_id, other_id, score
@@ -0,0 +1,107 @@
+import functools
+import importlib.util
+import os
+import shutil
+from urllib.parse import quote
+import database as db
+
+EXPORT_DIR = os.path.join(os.path.dirname(__file__), "exports", "records")
+
+
+def is_available() -> bool:
+    return importlib.util.find_spec("pyarrow") is not None
+
+@functools.lru_cache(maxsize=None)
+def record_schema():
+    """
+    The Arrow schema of a partition file. Season and Stroke are hive partition
+    keys, so they live in the directory names.
+    """
+    import pyarrow as pa
+    text = pa.dictionary(pa.int32(), pa.string())
+    return pa.schema([
+        ('UniqueID', pa.int64()),
+        ('SwimmerUniqID', pa.string()),
+        ('Name', pa.string()),
+        ('Age', text),
+        ('Distance', text),
+        ('Time', pa.string()),
+        ('Seconds', pa.float64()),
+        ('Competition', text),
+        ('CompetitionDate', text),
+        ('Club', text),
+        ('Nationality', text),
+        ('Gender', text),
+        ('School', text),
+    ])
+
+@functools.lru_cache(maxsize=None)
+def _partitioning():
+    import pyarrow as pa
+    import pyarrow.dataset as ds
+    return ds.partitioning(pa.schema([('Season', pa.int16()), ('Stroke', pa.string())]), flavor='hive')
+
+def _partition_dir(season, stroke):
+    return os.path.join(EXPORT_DIR, f"Season={season}", f"Stroke={quote(stroke, safe='')}")
+
+def _write_partition(season, stroke):
+    df = db.get_partition_records(season, stroke)
+    target_dir = _partition_dir(season, stroke)
+    if df.empty:
+        shutil.rmtree(target_dir, ignore_errors=True)
+        return 0
+    # pyarrow is imported by the writes and reads that need it, not at app startup
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+    os.makedirs(target_dir, exist_ok=True)
+    schema = record_schema()
+    table = pa.Table.from_pandas(df[schema.names], schema=schema, preserve_index=False)
+    tmp_path = os.path.join(target_dir, "part-0.parquet.tmp")
+    pq.write_table(table, tmp_path, compression='zstd')
+    os.replace(tmp_path, os.path.join(target_dir, "part-0.parquet"))
+    return len(df)
+
+def refresh_snapshots(full: bool = False):
+    """
+    Rewrites the Parquet partitions whose records changed since the last refresh.
+    A full refresh (or a missing export directory) rebuilds every partition.
+    Returns the number of partitions written, or None when pyarrow is unavailable.
+    """
+    if not is_available():
+        print("[DEBUG] pyarrow not installed. Skipping Parquet snapshot refresh.")
+        return None
+    full = full or not os.path.isdir(EXPORT_DIR)
+    if full:
+        shutil.rmtree(EXPORT_DIR, ignore_errors=True)
+    partitions = db.get_dirty_partitions(full=full)
+    rows = 0
+    for season, stroke, _ in partitions:
+        rows += _write_partition(season, stroke)
+    db.clear_dirty_partitions(partitions)
+    print(f"[DEBUG] Refreshed {len(partitions)} Parquet partitions ({rows} rows).")
+    return len(partitions)
+
+def load_records(columns=None, seasons=None, strokes=None, filter=None):
+    """
+    Loads the snapshot as a memory-mapped Arrow table.
+    Only the requested columns are read, and season/stroke/filter predicates are
+    pushed down so non-matching partitions and row groups are never touched.
+    """
+    if not is_available():
+        raise RuntimeError("pyarrow is required to load Parquet snapshots.")
+    import pyarrow.dataset as ds
+    import pyarrow.fs as pafs
+    if not os.path.isdir(EXPORT_DIR):
+        refresh_snapshots(full=True)
+    dataset = ds.dataset(
+        EXPORT_DIR, format='parquet', partitioning=_partitioning(),
+        filesystem=pafs.LocalFileSystem(use_mmap=True)
+    )
+    expression = filter
+    if seasons is not None:
+        season_filter = ds.field('Season').isin(list(seasons))
+        expression = season_filter if expression is None else expression & season_filter
+    if strokes is not None:
+        stroke_filter = ds.field('Stroke').isin(list(strokes))
+        expression = stroke_filter if expression is None else expression & stroke_filter
+    return dataset.to_table(columns=columns, filter=expression)
@@ -0,0 +1,174 @@
+"""
+Plans the remote requests behind a batch of scrape jobs.
+
+A job asks for one event (stroke, distance, gender, pool), an age band and a
+date window, the same dicts scrape_rankings() takes. The site ranks each
+swimmer by their best swim inside the requested band and window, so a band or
+window can be answered exactly by the union of smaller boxes that tile it,
+keeping each swimmer's best swim. The reverse does not hold: a wider box's
+rows cannot be split back into narrower ones.
+
+The planner therefore fetches the narrowest jobs first and reuses them (and
+already-stored coverage) to compose wider jobs, fetching only what is still
+missing, then fans the rows back out to every original job.
+"""
+from datetime import date
+
+import pandas as pd
+import database as db
+from swimutils import time_string_to_seconds
+
+
+def event_key(job: dict) -> tuple:
+    return (job['stroke']['name'], job['dist']['name'], job['gender']['name'], job['pool']['name'])
+
+def _box(job: dict) -> tuple:
+    """(age_lo, age_hi, day_lo, day_hi) as half-open integer ranges."""
+    return (int(job['min_age']), int(job['max_age']) + 1,
+            job['start_date'].toordinal(), job['end_date'].toordinal() + 1)
+
+def _job_for_box(template: dict, box: tuple) -> dict:
+    return {
+        **template,
+        'min_age': str(box[0]), 'max_age': str(box[1] - 1),
+        'start_date': date.fromordinal(box[2]), 'end_date': date.fromordinal(box[3] - 1),
+    }
+
+def _contains(outer: tuple, inner: tuple) -> bool:
+    return outer[0] <= inner[0] and inner[1] <= outer[1] and outer[2] <= inner[2] and inner[3] <= outer[3]
+
+def _uncovered(target: tuple, parts: list) -> list:
+    """The cells of target (split on every part boundary) that no part covers."""
+    ages = sorted({target[0], target[1], *(p[i] for p in parts for i in (0, 1))})
+    days = sorted({target[2], target[3], *(p[i] for p in parts for i in (2, 3))})
+    cells = []
+    for a_lo, a_hi in zip(ages, ages[1:]):
+        for d_lo, d_hi in zip(days, days[1:]):
+            cell = (a_lo, a_hi, d_lo, d_hi)
+            if not any(_contains(p, cell) for p in parts):
+                cells.append(cell)
+    return cells
+
+def _missing_box(target: tuple, parts: list) -> tuple:
+    """
+    The smallest box that completes target given parts: the bounding box of the
+    uncovered cells when those cells fill it exactly, otherwise target itself.
+    """
+    cells = _uncovered(target, parts)
+    bounds = (min(c[0] for c in cells), max(c[1] for c in cells), min(c[2] for c in cells), max(c[3] for c in cells))
+    area = sum((c[1] - c[0]) * (c[3] - c[2]) for c in cells)
+    if area == (bounds[1] - bounds[0]) * (bounds[3] - bounds[2]):
+        return bounds
+    return target
+
+
+class ScrapePlan:
+    """
+    fetches: jobs to request remotely.
+    sources: for each original job, the boxes whose rows answer it, each either
+    ('fetch', index into fetches) or ('stored', CoverageID of stored coverage).
+    """
+
+    def __init__(self, jobs: list):
+        self.jobs = jobs
+        self.fetches = []
+        self.sources = [[] for _ in jobs]
+
+    def __repr__(self):
+        stored = sum(1 for sources in self.sources for kind, _ in sources if kind == 'stored')
+        return f"<ScrapePlan {len(self.jobs)} jobs -> {len(self.fetches)} requests, {stored} stored boxes reused>"
+
+
+def plan(jobs: list, use_stored: bool = True) -> ScrapePlan:
+    """Works out the fewest remote requests that, with stored coverage, answer every job exactly."""
+    result = ScrapePlan(jobs)
+    by_event = {}
+    for index, job in enumerate(jobs):
+        by_event.setdefault(event_key(job), []).append(index)
+
+    for key, indexes in by_event.items():
+        template = jobs[indexes[0]]
+        # Boxes known to be complete: stored coverage first, then each fetch as it is planned
+        known = []
+        if use_stored:
+            for coverage_id, min_age, max_age, start_date, end_date in db.get_scrape_coverage(*key):
+                box = (min_age, max_age + 1, date.fromisoformat(start_date).toordinal(), date.fromisoformat(end_date).toordinal() + 1)
+                known.append((box, ('stored', coverage_id)))
+
+        # Narrowest first, so wide jobs can be composed from the narrow ones
+        def width(i):
+            box = _box(jobs[i])
+            return ((box[1] - box[0]) * (box[3] - box[2]), box)
+
+        for index in sorted(indexes, key=width):
+            target = _box(jobs[index])
+            parts = [(box, source) for box, source in known if _contains(target, box)]
+            if _uncovered(target, [box for box, _ in parts]):
+                missing = _missing_box(target, [box for box, _ in parts])
+                result.fetches.append(_job_for_box(template, missing))
+                fetched = (missing, ('fetch', len(result.fetches) - 1))
+                known.append(fetched)
+                parts.append(fetched)
+            result.sources[index] = [source for _, source in parts]
+    return result
+
+
+def best_per_swimmer(frames: list, job: dict, resolver=None) -> pd.DataFrame:
+    """
+    Unions rows from several boxes into the ranking for one job.
+    Rows are matched to swimmers with the SwimmerResolver the database uses, so
+    spelling variants count as one swimmer; the club is part of the key too, so
+    two children sharing a name in the same box are never folded together.
+    """
+    frames = [f for f in frames if f is not None and not f.empty]
+    if not frames:
+        return pd.DataFrame()
+    df = pd.concat(frames, ignore_index=True)
+    resolver = resolver or db.swimmer_resolver()
+    df['_swimmer'] = [
+        resolver.resolve(row.get('Name'), row.get('Gender'), row.get('Club'), row.get('AgeRange'), row.get('CompetitionDate'))[0]
+        for row in df.to_dict('records')
+    ]
+    df['_seconds'] = df['Time'].map(time_string_to_seconds)
+    df = df.sort_values(['_seconds', 'Name'], kind='mergesort').drop_duplicates(subset=['_swimmer', 'Club'], keep='first')
+    df['Rank'] = df['_seconds'].rank(method='min').astype(int)
+    df['AgeRange'] = f"{job['min_age']}-{job['max_age']}"
+    return df.drop(columns=['_swimmer', '_seconds']).reset_index(drop=True)
+
+def save(job: dict, df: pd.DataFrame) -> int:
+    """Stores one fetched box and records it as covered."""
+    return db.add_covered_records(
+        df, *event_key(job), job['min_age'], job['max_age'],
+        job['start_date'].isoformat(), job['end_date'].isoformat()
+    )
+
+def run(jobs: list, scraper, ingest: bool = False, use_stored: bool = None):
+    """
+    Plans and runs the jobs with one scraper.
+    Returns (results, fetched): one DataFrame per job (None if a request it
+    needed failed) and the (job, DataFrame) of every remote request made.
+    With ingest=True each fetched box is saved and recorded as covered as soon
+    as it arrives. Stored coverage is used by default only when ingesting,
+    since only then is the database kept in step with what was fetched.
+    """
+    scrape_plan = plan(jobs, use_stored=ingest if use_stored is None else use_stored)
+    print(f"[DEBUG] {scrape_plan}")
+    fetched = []
+    for job in scrape_plan.fetches:
+        df = scraper.scrape_rankings(**job)
+        if df is not None and ingest:
+            save(job, df)
+        fetched.append((job, df))
+
+    results = []
+    resolver = db.swimmer_resolver()
+    for job, sources in zip(jobs, scrape_plan.sources):
+        frames = []
+        for kind, source in sources:
+            frames.append(fetched[source][1] if kind == 'fetch' else db.get_coverage_records(source))
+        if any(frame is None for frame in frames):
+            results.append(None)
+        else:
+            results.append(best_per_swimmer(frames, job, resolver))
+    return results, fetched
+
@@ -0,0 +1,82 @@
+"""
+Per-swimmer progression, precomputed.
+
+ProgressionTable holds every timed swim of each canonical swimmer in event
+order (stroke, distance, pool; then swim date), with the personal best to
+date, how much a new PB took off the old one, the change from the previous
+swim and a rolling mean over the last TREND_WINDOW swims. refresh_progression()
+keeps it current from the change log, re-building only the swimmers touched
+since the last refresh, so a swimmer profile is one indexed lookup
+(db.get_progression) instead of a full load of get_records().
+"""
+import pandas as pd
+import database as db
+from standards import format_cut_time
+
+EVENT_COLUMNS = ['Stroke', 'Distance', 'Pool']
+# Swims averaged into Trend
+TREND_WINDOW = 3
+
+
+def build(records: pd.DataFrame) -> pd.DataFrame:
+    """
+    Progression rows (db.PROGRESSION_COLUMNS) for timed records as returned by
+    db.get_timed_records(). Within each swimmer's event, swims are numbered by
+    SwimDate (ties by UniqueID). The first swim is a PB with no Improvement or
+    Delta; later swims that are not a PB have Improvement 0.
+    """
+    if records.empty:
+        return pd.DataFrame(columns=db.PROGRESSION_COLUMNS)
+    records = records.sort_values(['SwimmerUniqID'] + EVENT_COLUMNS + ['SwimDate', 'UniqueID'],
+                                  kind='mergesort', na_position='first').reset_index(drop=True)
+    # One group per swimmer and event; a missing pool is an event of its own
+    events = records.groupby(records.groupby(['SwimmerUniqID'] + EVENT_COLUMNS, dropna=False, sort=False).ngroup())
+    best = events['Seconds'].cummin()
+    previous_best = best.groupby(events.ngroup()).shift()
+    records = records.assign(
+        Swim=events.cumcount() + 1,
+        BestSeconds=best,
+        IsPB=previous_best.isna() | (records['Seconds'] < previous_best),
+        Improvement=(previous_best - best).round(2),
+        Delta=events['Seconds'].diff().round(2),
+        Trend=events['Seconds'].transform(lambda s: s.rolling(TREND_WINDOW, min_periods=1).mean()).round(2),
+    )
+    records['BestTime'] = [format_cut_time(s) for s in records['BestSeconds']]
+    return records[db.PROGRESSION_COLUMNS]
+
+def _changed_swimmers(changes: list) -> set:
+    record_ids = {c['RowKey'] for c in changes if c['TableName'] == 'RecordTable'}
+    swimmer_ids = {c['RowKey'] for c in changes if c['TableName'] != 'RecordTable'}
+    return db.get_affected_swimmers(record_ids, swimmer_ids, cache='progression')
+
+def refresh_progression(full: bool = False) -> int:
+    """
+    Brings ProgressionTable up to date. Only swimmers touched since the last
+    refresh are rebuilt, unless full is set or the store was never built.
+    Returns the number of swimmers rebuilt (None for a full rebuild).
+    """
+    last_seq = db.get_progression_seq()
+    if full or last_seq is None:
+        seq, swimmer_ids = db.get_change_seq(), None
+    else:
+        changes = list(db.changes_since(last_seq))
+        if not changes:
+            return 0
+        seq, swimmer_ids = changes[-1]['Seq'], _changed_swimmers(changes)
+
+    progression = build(db.get_timed_records(swimmer_ids))
+    db.replace_progression(progression, swimmer_ids, seq)
+    print(f"[DEBUG] Progression refreshed for {'all' if swimmer_ids is None else len(swimmer_ids)} swimmers: "
+          f"{len(progression)} swims.")
+    return None if swimmer_ids is None else len(swimmer_ids)
+
+def personal_bests(progression: pd.DataFrame) -> pd.DataFrame:
+    """One row per event of a db.get_progression() frame: swims, PB, when it was set and the latest trend."""
+    if progression.empty:
+        return pd.DataFrame(columns=EVENT_COLUMNS + ['Swims', 'BestTime', 'PBDate', 'Improvement', 'Trend'])
+    events = progression.groupby(EVENT_COLUMNS, dropna=False, sort=False)
+    last_pb = progression[progression['IsPB']].groupby(EVENT_COLUMNS, dropna=False, sort=False).tail(1)
+    summary = events.agg(Swims=('Swim', 'max'), BestTime=('BestTime', 'last'), Trend=('Trend', 'last')).reset_index()
+    last_pb = last_pb[EVENT_COLUMNS + ['SwimDate', 'Improvement']].rename(columns={'SwimDate': 'PBDate'})
+    summary = summary.merge(last_pb, on=EVENT_COLUMNS, how='left')
+    return summary[EVENT_COLUMNS + ['Swims', 'BestTime', 'PBDate', 'Improvement', 'Trend']]
@@ -0,0 +1,29 @@
+"""
+Registry of scraper backends, imported on first use.
+
+Selenium in particular takes a noticeable share of a cold start, so callers
+look a backend up by name here instead of importing its module at load time.
+
+    scraper = scrapers.make_scraper("ajax")
+"""
+import importlib
+
+# Backend name -> "module:Class"
+SCRAPERS = {
+    'ajax': 'datawebtaa_ajax:SwimDataAjaxScraper',
+    'selenium': 'datawebtaa:SwimDataScraper',
+}
+DEFAULT_SCRAPER = 'ajax'
+
+
+def get_scraper_class(name: str = DEFAULT_SCRAPER):
+    """The scraper class registered under name, importing its module if needed."""
+    try:
+        module_name, class_name = SCRAPERS[name.lower()].split(':')
+    except KeyError:
+        raise ValueError(f"Unknown scraper '{name}'. Choose from: {', '.join(SCRAPERS)}") from None
+    return getattr(importlib.import_module(module_name), class_name)
+
+def make_scraper(name: str = DEFAULT_SCRAPER, **kwargs):
+    """A new instance of the named scraper; kwargs go to its constructor."""
+    return get_scraper_class(name)(**kwargs)
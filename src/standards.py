@@ -0,0 +1,144 @@
+"""
+Qualifying standards (cut times) and which swimmers have made them.
+
+A standard is a named cut time for one event, gender, pool and age band, e.g.
+"Nationals 2026, 50 m FreeStyle, Female, Long Course, 11-12, 00:31.50". The
+standards are loaded from a CSV with those columns:
+
+    Standard,Stroke,Distance,Gender,Pool,MinAge,MaxAge,CutTime
+
+Stroke, Gender and Pool may be given by their English name ("FreeStyle",
+"Female", "Long Course") or the full option name used everywhere else.
+
+evaluate() joins every timed swim with every standard for its event in one
+vectorized pass and keeps each swimmer's fastest qualifying swim per standard.
+refresh_qualifications() caches the result in QualificationTable and keeps it
+current from the change log, so only swimmers touched since the last refresh
+are re-evaluated.
+"""
+import pandas as pd
+import database as db
+import events
+from swimutils import time_string_to_seconds
+
+STANDARD_COLUMNS = ['Standard', 'Stroke', 'Distance', 'Gender', 'Pool', 'MinAge', 'MaxAge', 'CutTime']
+EVENT_KEYS = ['Stroke', 'Distance', 'Gender', 'Pool']
+QUALIFICATION_COLUMNS = ['SwimmerUniqID', 'StandardID', 'BestUniqueID', 'Time', 'Seconds', 'Margin', 'SwimDate']
+
+_OPTIONS = {
+    'Stroke': events.STROKES,
+    'Distance': events.DISTANCES,
+    'Gender': events.GENDERS,
+    'Pool': events.POOL_TYPES,
+}
+
+
+def _option(kind: str, value) -> dict:
+    """The option dict for a full name ("Female (หญิง)") or its English part ("female")."""
+    value = str(value).strip()
+    for option in _OPTIONS[kind].values():
+        if value == option['name'] or value.lower() == option['name'].split(' (')[0].lower():
+            return option
+    raise ValueError(f"Unknown {kind.lower()} '{value}'. Choose from: {', '.join(o['name'] for o in _OPTIONS[kind].values())}")
+
+def format_cut_time(seconds: float) -> str:
+    """Seconds as the site's MM:SS.ss time format."""
+    minutes, rest = divmod(round(seconds * 100), 6000)
+    return f"{minutes:02d}:{rest // 100:02d}.{rest % 100:02d}"
+
+def parse_standards(df: pd.DataFrame) -> pd.DataFrame:
+    """Validates a standards table and normalizes names, ages and cut times."""
+    missing = [col for col in STANDARD_COLUMNS if col not in df.columns]
+    if missing:
+        raise ValueError(f"Standards are missing columns: {', '.join(missing)}")
+    df = df[STANDARD_COLUMNS].copy()
+    for kind in EVENT_KEYS:
+        df[kind] = [_option(kind, value)['name'] for value in df[kind]]
+    df['MinAge'] = df['MinAge'].astype(int)
+    df['MaxAge'] = df['MaxAge'].astype(int)
+    df['CutSeconds'] = df['CutTime'].astype(str).str.strip().map(time_string_to_seconds)
+    bad = df.loc[df['CutSeconds'] == float('inf'), 'CutTime'].tolist()
+    if bad:
+        raise ValueError(f"Cut times must be MM:SS.ss, got: {', '.join(map(str, bad))}")
+    df['CutTime'] = df['CutSeconds'].map(format_cut_time)
+    return df
+
+def load_standards(path_or_buffer) -> int:
+    """Replaces the stored standards with a CSV file and rebuilds the qualification cache."""
+    count = db.set_standards(parse_standards(pd.read_csv(path_or_buffer, dtype=str)))
+    refresh_qualifications(full=True)
+    return count
+
+
+def evaluate(records: pd.DataFrame, standards: pd.DataFrame) -> pd.DataFrame:
+    """
+    Each swimmer's fastest swim under each standard they qualify for.
+
+    records has the columns of db.get_timed_records(); standards those of
+    db.get_standards(). A swim counts towards a standard when its event matches
+    and the swimmer's age at the swim (or, without a birth year, the whole stored
+    age range) lies inside the standard's band, the same rule get_rankings uses.
+    """
+    if records.empty or standards.empty:
+        return pd.DataFrame(columns=QUALIFICATION_COLUMNS)
+    standards = standards.rename(columns={'MinAge': 'StdMinAge', 'MaxAge': 'StdMaxAge'})
+    pairs = records.merge(standards, on=EVENT_KEYS)
+    low = pairs['AgeAtSwim'].fillna(pairs['MinAge'])
+    high = pairs['AgeAtSwim'].fillna(pairs['MaxAge'])
+    qualified = pairs[(low >= pairs['StdMinAge']) & (high <= pairs['StdMaxAge']) & (pairs['Seconds'] <= pairs['CutSeconds'])]
+    best = (qualified.sort_values(['Seconds', 'SwimDate', 'UniqueID'], kind='mergesort')
+            .drop_duplicates(subset=['SwimmerUniqID', 'StandardID'], keep='first'))
+    best = best.assign(BestUniqueID=best['UniqueID'], Margin=(best['CutSeconds'] - best['Seconds']).round(2))
+    return best[QUALIFICATION_COLUMNS].reset_index(drop=True)
+
+def _changed_swimmers(changes: list) -> set:
+    record_ids = {c['RowKey'] for c in changes if c['TableName'] == 'RecordTable'}
+    swimmer_ids = {c['RowKey'] for c in changes if c['TableName'] != 'RecordTable'}
+    return db.get_affected_swimmers(record_ids, swimmer_ids)
+
+def refresh_qualifications(full: bool = False) -> int:
+    """
+    Brings QualificationTable up to date. Only swimmers touched since the last
+    refresh are re-evaluated, unless full is set or the cache was never built.
+    Returns the number of swimmers re-evaluated (None for a full rebuild).
+    """
+    last_seq = db.get_qualification_seq()
+    if full or last_seq is None:
+        seq, swimmer_ids = db.get_change_seq(), None
+    else:
+        changes = list(db.changes_since(last_seq))
+        if not changes:
+            return 0
+        seq, swimmer_ids = changes[-1]['Seq'], _changed_swimmers(changes)
+
+    qualifications = evaluate(db.get_timed_records(swimmer_ids), db.get_standards())
+    db.replace_qualifications(qualifications, swimmer_ids, seq)
+    print(f"[DEBUG] Qualifications refreshed for {'all' if swimmer_ids is None else len(swimmer_ids)} swimmers: "
+          f"{len(qualifications)} qualifying swims.")
+    return None if swimmer_ids is None else len(swimmer_ids)
+
+
+def fetch_qualifiers(scraper, standard: dict, start_date, end_date) -> pd.DataFrame:
+    """
+    Asks the site for the swims under one standard's cut time (its TimestdF
+    filter), for checking swims that are not stored yet. standard is a row of
+    db.get_standards(); scraper is an ajax scraper (see scrapers).
+    """
+    return scraper.scrape_rankings(
+        stroke=_option('Stroke', standard['Stroke']), dist=_option('Distance', standard['Distance']),
+        gender=_option('Gender', standard['Gender']), pool=_option('Pool', standard['Pool']),
+        min_age=str(standard['MinAge']), max_age=str(standard['MaxAge']),
+        start_date=start_date, end_date=end_date, time_standard=standard['CutTime'],
+    )
+
+def save_qualifiers(df: pd.DataFrame) -> int:
+    """
+    Stores swims returned by fetch_qualifiers() and refreshes the qualification
+    cache. Returns the number of new records.
+    """
+    if df is None or df.empty:
+        return 0
+    # Places among the swims under a cut are not a full ranking: take no snapshot
+    added = db.add_records(df.drop(columns=['Rank'], errors='ignore'))
+    refresh_qualifications()
+    return added
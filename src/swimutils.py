@@ -0,0 +1,71 @@
+import pandas as pd
+from datetime import date
+
+def parse_age_range(age_str):
+    if not isinstance(age_str, str):
+        return None, None
+    if '-' in age_str:
+        try:
+            parts = age_str.split('-')
+            return int(parts[0]), int(parts[1])
+        except (ValueError, IndexError):
+            return None, None
+    else:
+        try:
+            age = int(age_str)
+            return age, age
+        except ValueError:
+            return None, None
+
+THAI_MONTH_MAP = {
+    'ม.ค.': 'Jan', 'ก.พ.': 'Feb', 'มี.ค.': 'Mar', 'เม.ย.': 'Apr', 'พ.ค.': 'May',
+    'มิ.ย.': 'Jun', 'ก.ค.': 'Jul', 'ส.ค.': 'Aug', 'ก.ย.': 'Sep', 'ต.ค.': 'Oct',
+    'พ.ย.': 'Nov', 'ธ.ค.': 'Dec'
+}
+
+def parse_thai_date(date_str):
+    if not isinstance(date_str, str):
+        return pd.NaT
+    try:
+        day, thai_month_abbr, buddhist_year_str = date_str.split('/')
+        buddhist_year = int(buddhist_year_str)
+        english_month_abbr = THAI_MONTH_MAP.get(thai_month_abbr.strip())
+        if english_month_abbr:
+            gregorian_year = buddhist_year - 543
+            standard_date_str = f"{day}-{english_month_abbr}-{gregorian_year}"
+            return pd.to_datetime(standard_date_str, format='%d-%b-%Y', errors='coerce')
+    except (ValueError, KeyError, IndexError):
+        pass
+    return pd.NaT
+
+def thai_date_to_iso(date_str):
+    """'DD/<thai month>/<buddhist year>' as a sortable 'YYYY-MM-DD' string, or None."""
+    parsed = parse_thai_date(date_str)
+    return None if pd.isna(parsed) else parsed.strftime('%Y-%m-%d')
+
+def format_date_to_thai_buddhist(date_obj):
+    if not isinstance(date_obj, date):
+        return None
+    buddhist_year = date_obj.year + 543
+    thai_month_abbr_reverse_map = {v: k for k, v in THAI_MONTH_MAP.items()}
+    english_month_abbr = date_obj.strftime('%b')
+    thai_month = thai_month_abbr_reverse_map.get(english_month_abbr)
+    if thai_month:
+        return f"{date_obj.day}/{thai_month}/{buddhist_year}"
+    return None
+
+def time_string_to_seconds(time_str):
+    """Converts a time string (MM:SS.ss) to total seconds for sorting."""
+    if isinstance(time_str, str):
+        try:
+            parts = time_str.split(':')
+            minutes = int(parts[0])
+            seconds_parts = parts[1].split('.')
+            seconds = int(seconds_parts[0])
+            # A decimal fraction: "30.5" is 30.5 s, as SECONDS_SQL reads it
+            fraction = seconds_parts[1] if len(seconds_parts) > 1 else "0"
+            total_seconds = (minutes * 60) + seconds + int(fraction) / 10 ** len(fraction)
+            return total_seconds
+        except (ValueError, IndexError):
+            return float('inf') # Push invalid times to the end
+    return float('inf')
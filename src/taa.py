@@ -0,0 +1,313 @@
+"""
+Headless entry point for scheduled refreshes, e.g. from cron:
+
+    python -m taa scrape jobs.json > rankings.ndjson
+    python -m taa scrape jobs.json --ingest
+    python -m taa ingest rankings.ndjson
+    python -m taa export --format parquet
+    python -m taa export --format xlsx --stroke FreeStyle --min-age 9 --max-age 10 --output free.xlsx
+    python -m taa changes --since 1200 > delta.ndjson
+    python -m taa standards cuts.csv
+    python -m taa backup --keep 14
+    python -m taa restore src/backups/swim_data-20260301-020000-000000.db
+    python -m taa serve --port 8765
+
+Nothing here imports Streamlit, and Selenium is only imported for --scraper selenium.
+Machine-readable output (NDJSON) goes to stdout; the [DEBUG] logging of the
+scraper and database modules is redirected to stderr so it never mixes in.
+"""
+import argparse
+import contextlib
+import itertools
+import json
+import os
+import sys
+from datetime import date, timedelta
+
+import pandas as pd
+import database as db
+import planner
+import progression
+import events
+import scrapers
+import standards
+import teams
+
+# Option tables shared by both scrapers
+OPTIONS = {
+    'stroke': events.STROKES,
+    'distance': events.DISTANCES,
+    'gender': events.GENDERS,
+    'pool': events.POOL_TYPES,
+}
+# Matrix axes, in the order jobs are expanded
+MATRIX_AXES = ['strokes', 'distances', 'genders', 'pools', 'ages']
+INGEST_CHUNKSIZE = 5_000
+
+
+def _lookup(kind: str, value) -> dict:
+    """Resolves a choice key ("1"), site id or display name ("50 m") to its option dict."""
+    options = OPTIONS[kind]
+    value = str(value)
+    if value in options:
+        return options[value]
+    for option in options.values():
+        if value in (option['name'], option['id']) or value.lower() == option['name'].split(' (')[0].lower():
+            return option
+    raise ValueError(f"Unknown {kind} '{value}'. Choose from: {', '.join(o['name'] for o in options.values())}")
+
+def expand_jobs(spec) -> list:
+    """
+    Turns a job file into a list of scrape jobs. The file holds either a list of
+    jobs ({"stroke", "distance", "gender", "pool", "min_age", "max_age",
+    "start_date", "end_date"}) or a matrix whose list-valued axes ("strokes",
+    "distances", "genders", "pools", "ages": [[min, max], ...]) are expanded into
+    every combination. Dates are ISO strings and default to the last 365 days.
+    """
+    if isinstance(spec, dict):
+        axes = [spec.get(axis) for axis in MATRIX_AXES]
+        missing = [axis for axis, values in zip(MATRIX_AXES, axes) if not values]
+        if missing:
+            raise ValueError(f"Job matrix is missing: {', '.join(missing)}")
+        jobs = []
+        for stroke, dist, gender, pool, (min_age, max_age) in itertools.product(*axes):
+            jobs.append({
+                'stroke': stroke, 'distance': dist, 'gender': gender, 'pool': pool,
+                'min_age': min_age, 'max_age': max_age,
+                'start_date': spec.get('start_date'), 'end_date': spec.get('end_date'),
+            })
+        spec = jobs
+
+    today = date.today()
+    resolved = []
+    for job in spec:
+        end_date = date.fromisoformat(job['end_date']) if job.get('end_date') else today
+        start_date = date.fromisoformat(job['start_date']) if job.get('start_date') else end_date - timedelta(days=365)
+        resolved.append({
+            'stroke': _lookup('stroke', job['stroke']),
+            'dist': _lookup('distance', job['distance']),
+            'gender': _lookup('gender', job['gender']),
+            'pool': _lookup('pool', job.get('pool', "1")),
+            'min_age': str(job['min_age']),
+            'max_age': str(job['max_age']),
+            'start_date': start_date,
+            'end_date': end_date,
+        })
+    return resolved
+
+def describe_job(job: dict) -> dict:
+    """A JSON-friendly summary of a job for progress lines."""
+    return {
+        'stroke': job['stroke']['name'], 'distance': job['dist']['name'], 'gender': job['gender']['name'],
+        'pool': job['pool']['name'], 'ages': f"{job['min_age']}-{job['max_age']}",
+        'start_date': job['start_date'].isoformat(), 'end_date': job['end_date'].isoformat(),
+    }
+
+def make_scraper(name: str):
+    # Backends are imported on first use, so Selenium only loads for --scraper selenium
+    return scrapers.make_scraper(name, headless=True)
+
+def write_ndjson(out, df: pd.DataFrame):
+    if not df.empty:
+        # Each line ends in a newline, so successive jobs concatenate into one stream
+        out.write(df.to_json(orient='records', lines=True, force_ascii=False, date_format='iso'))
+        out.flush()
+
+def write_line(out, obj: dict):
+    out.write(json.dumps(obj, ensure_ascii=False) + "\n")
+    out.flush()
+
+
+def cmd_scrape(args, out) -> int:
+    with open(args.jobs, encoding='utf-8') as f:
+        jobs = expand_jobs(json.load(f))
+    scraper = make_scraper(args.scraper)
+    try:
+        # The planner merges overlapping jobs into the fewest remote requests
+        results, fetched = planner.run(jobs, scraper, ingest=args.ingest)
+    finally:
+        scraper.close()
+    failures = 0
+    for job, df in zip(jobs, results):
+        if df is None:
+            failures += 1
+            print(f"[ERROR] Scrape failed: {describe_job(job)}")
+        if args.ingest:
+            write_line(out, {'job': describe_job(job), 'status': "error" if df is None else "ok",
+                             'rows': None if df is None else len(df)})
+        elif df is not None:
+            write_ndjson(out, df)
+    print(f"[DEBUG] {len(jobs)} jobs answered with {len(fetched)} remote requests.")
+    if args.ingest:
+        _refresh_snapshots()
+        standards.refresh_qualifications()
+        teams.refresh_cube()
+        progression.refresh_progression()
+    return 1 if failures else 0
+
+def cmd_ingest(args, out) -> int:
+    source = sys.stdin if args.file == "-" else open(args.file, encoding='utf-8')
+    rows = added = 0
+    # A ranking can span chunks: collect every ranking and snapshot it once at the end
+    rankings = {}
+    try:
+        # dtype/convert_dates off: times like "00:34.18" and Thai dates must stay strings
+        for chunk in pd.read_json(source, lines=True, chunksize=INGEST_CHUNKSIZE, dtype=False, convert_dates=False):
+            rows += len(chunk)
+            added += db.add_records(chunk, rankings)
+    finally:
+        if source is not sys.stdin:
+            source.close()
+    db.add_ranking_snapshots(rankings)
+    _refresh_snapshots()
+    standards.refresh_qualifications()
+    teams.refresh_cube()
+    progression.refresh_progression()
+    write_line(out, {'status': "ok", 'rows': rows, 'added': added})
+    return 0
+
+def _export_filters(args):
+    """The dashboard filter dict given on the command line, or None for every record."""
+    filters = {'gender': args.gender, 'stroke': args.stroke, 'distance': args.distance,
+               'min_age': args.min_age, 'max_age': args.max_age, 'schools': args.school, 'clubs': args.club}
+    filters = {key: value for key, value in filters.items() if value}
+    if not filters:
+        return None
+    for kind, key in (('gender', 'gender'), ('stroke', 'stroke'), ('distance', 'distance')):
+        if key in filters:
+            filters[key] = _lookup(kind, filters[key])['name']
+    return filters
+
+def cmd_export(args, out) -> int:
+    if args.output or args.format in ("csv", "xlsx"):
+        import export
+        filters = _export_filters(args)
+        target = args.output or export.export_filename(filters, args.format)
+        rows = export.export_records(target, args.format, filters)
+        write_line(out, {'status': "ok", 'rows': rows, 'file': os.path.abspath(target)})
+        return 0
+    if args.format == "parquet":
+        written = _refresh_snapshots(full=args.full)
+        write_line(out, {'status': "ok" if written is not None else "skipped", 'partitions': written})
+        return 0 if written is not None else 1
+    write_ndjson(out, db.get_records(compact=False))
+    return 0
+
+def cmd_changes(args, out) -> int:
+    if args.compact:
+        db.compact_changes()
+    for change in db.changes_since(args.since, tables=args.table):
+        write_line(out, change)
+    return 0
+
+def cmd_standards(args, out) -> int:
+    count = standards.load_standards(args.file)
+    write_line(out, {'status': "ok", 'standards': count, 'qualifications': len(db.get_qualifications())})
+    return 0
+
+def cmd_backup(args, out) -> int:
+    import backup
+    if args.list:
+        for path in backup.list_snapshots(args.dir):
+            write_line(out, {'snapshot': path, 'bytes': os.path.getsize(path)})
+        return 0
+    path = backup.snapshot(args.dir, keep=args.keep)
+    write_line(out, {'status': "ok", 'snapshot': path})
+    return 0
+
+def cmd_restore(args, out) -> int:
+    import backup
+    try:
+        previous = backup.restore(args.snapshot, args.dir)
+    except backup.BackupError as e:
+        print(f"[ERROR] {e}")
+        write_line(out, {'status': "error", 'error': str(e)})
+        return 1
+    # Derived data describes the database we just replaced
+    _refresh_snapshots(full=True)
+    standards.refresh_qualifications(full=True)
+    teams.refresh_cube(full=True)
+    progression.refresh_progression(full=True)
+    write_line(out, {'status': "ok", 'restored': args.snapshot, 'previous': previous})
+    return 0
+
+def cmd_serve(args, out) -> int:
+    import api
+    api.serve(args.host, args.port)
+    return 0
+
+def _refresh_snapshots(full: bool = False):
+    import parquet_store  # pyarrow is only needed once snapshots are written
+    return parquet_store.refresh_snapshots(full=full)
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(prog="taa", description="Scrape, ingest and export TAA swimming rankings without the dashboard.")
+    parser.add_argument("--db", help="Database file (defaults to src/swim_data.db)")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    scrape = sub.add_parser("scrape", help="Run every job in a job file; stream records as NDJSON or save them.")
+    scrape.add_argument("jobs", help="JSON job list or job matrix")
+    scrape.add_argument("--scraper", choices=list(scrapers.SCRAPERS), default=scrapers.DEFAULT_SCRAPER)
+    scrape.add_argument("--ingest", action="store_true", help="Save into the database instead of printing records")
+    scrape.set_defaults(func=cmd_scrape)
+
+    ingest = sub.add_parser("ingest", help="Save NDJSON records (e.g. from 'scrape') into the database.")
+    ingest.add_argument("file", nargs="?", default="-", help="NDJSON file, or - for stdin")
+    ingest.set_defaults(func=cmd_ingest)
+
+    export = sub.add_parser("export", help="Write the stored records out.")
+    export.add_argument("--format", choices=["ndjson", "csv", "xlsx", "parquet"], default="ndjson")
+    export.add_argument("--output", help="Stream the (filtered) records to this csv/xlsx/parquet file; "
+                                         "parquet without it refreshes the partitioned snapshots")
+    export.add_argument("--full", action="store_true", help="Rebuild every Parquet partition")
+    for option in ("--gender", "--stroke", "--distance"):
+        export.add_argument(option, help="Only this option (key, site id or name)")
+    export.add_argument("--min-age", type=int)
+    export.add_argument("--max-age", type=int)
+    export.add_argument("--school", action="append", help="Only this school (repeatable)")
+    export.add_argument("--club", action="append", help="Only this club (repeatable)")
+    export.set_defaults(func=cmd_export)
+
+    changes = sub.add_parser("changes", help="Stream change log entries after a sequence number as NDJSON.")
+    changes.add_argument("--since", type=int, default=0, help="Last sequence number already applied")
+    changes.add_argument("--table", action="append", help="Only this table (repeatable)")
+    changes.add_argument("--compact", action="store_true", help="Compact the log before reading it")
+    changes.set_defaults(func=cmd_changes)
+
+    cuts = sub.add_parser("standards", help="Load qualifying standards from a CSV and re-evaluate every swim.")
+    cuts.add_argument("file", help="CSV with Standard,Stroke,Distance,Gender,Pool,MinAge,MaxAge,CutTime")
+    cuts.set_defaults(func=cmd_standards)
+
+    snap = sub.add_parser("backup", help="Write a verified online snapshot of the database and prune old ones.")
+    snap.add_argument("--dir", help="Snapshot directory (defaults to src/backups)")
+    snap.add_argument("--keep", type=int, default=14, help="Snapshots to keep")
+    snap.add_argument("--list", action="store_true", help="List snapshots instead of writing one")
+    snap.set_defaults(func=cmd_backup)
+
+    restore = sub.add_parser("restore", help="Replace the database with a verified snapshot (the current state is snapshotted first).")
+    restore.add_argument("snapshot", help="Snapshot file to restore")
+    restore.add_argument("--dir", help="Where to save the pre-restore snapshot (defaults to src/backups)")
+    restore.set_defaults(func=cmd_restore)
+
+    serve = sub.add_parser("serve", help="Run the read-only JSON API.")
+    serve.add_argument("--host", default="127.0.0.1")
+    serve.add_argument("--port", type=int, default=8765)
+    serve.set_defaults(func=cmd_serve)
+    return parser
+
+def main(argv=None) -> int:
+    args = build_parser().parse_args(argv)
+    if args.db:
+        db.DB_FILE = args.db
+    out = sys.stdout
+    with contextlib.redirect_stdout(sys.stderr):
+        db.init_db()
+        try:
+            return args.func(args, out)
+        finally:
+            db.close_writers()
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,74 @@
+"""
+School and club performance, pre-aggregated.
+
+TeamCubeTable holds, for every school and club, season, stroke, distance,
+gender and age band: the number of swims and swimmers and the best and median
+times. Triggers mark the (season, stroke) slices touched by each write, and
+refresh_cube() re-aggregates just those slices, so team comparisons are a
+lookup into the cube instead of a scan over every record.
+
+Seasons are competition years (Gregorian), as in the Parquet snapshots.
+"""
+import pandas as pd
+import database as db
+from standards import format_cut_time
+
+# Cube team kind -> record column holding the team
+TEAM_COLUMNS = {'school': 'School', 'club': 'Club'}
+EVENT_COLUMNS = ['Distance', 'Gender', 'AgeBand']
+# Cube key value for a missing distance, gender or age
+UNKNOWN = "Unknown"
+
+
+def aggregate(records: pd.DataFrame, season: int, stroke: str) -> pd.DataFrame:
+    """
+    Cube rows (db.TEAM_CUBE_COLUMNS) for the records of one (season, stroke)
+    slice, as returned by db.get_partition_records().
+    """
+    if records.empty:
+        return pd.DataFrame(columns=db.TEAM_CUBE_COLUMNS)
+    records = records.assign(AgeBand=records['Age']).fillna({column: UNKNOWN for column in EVENT_COLUMNS})
+    frames = []
+    for kind, column in TEAM_COLUMNS.items():
+        teams = records[records[column].notna() & (records[column].astype(str).str.strip() != "")]
+        if teams.empty:
+            continue
+        cube = teams.groupby([column] + EVENT_COLUMNS, observed=True).agg(
+            Records=('UniqueID', 'size'),
+            Swimmers=('SwimmerUniqID', 'nunique'),
+            BestSeconds=('Seconds', 'min'),
+            MedianSeconds=('Seconds', 'median'),
+        ).reset_index().rename(columns={column: 'Team'})
+        frames.append(cube.assign(TeamKind=kind))
+    if not frames:
+        return pd.DataFrame(columns=db.TEAM_CUBE_COLUMNS)
+    cube = pd.concat(frames, ignore_index=True).assign(Season=season, Stroke=stroke)
+    cube['MedianSeconds'] = cube['MedianSeconds'].round(2)
+    cube['BestTime'] = [format_cut_time(s) if pd.notna(s) else None for s in cube['BestSeconds']]
+    return cube[db.TEAM_CUBE_COLUMNS]
+
+def refresh_cube(full: bool = False) -> int:
+    """
+    Re-aggregates the team cube slices marked dirty since the last refresh
+    (every slice if full). Returns the number of slices rebuilt.
+    """
+    slices = db.get_dirty_team_slices(full=full)
+    rows = 0
+    for season, stroke, marker in slices:
+        rows += db.replace_team_slice(aggregate(db.get_partition_records(season, stroke), season, stroke),
+                                      season, stroke, marker)
+    if slices:
+        print(f"[DEBUG] Refreshed {len(slices)} team cube slices ({rows} rows).")
+    return len(slices)
+
+def cube_options(kind: str = 'school') -> dict:
+    """The distinct seasons, strokes, distances, genders, age bands and teams in the cube."""
+    cube = db.get_team_cube(kind)
+    return {
+        'seasons': sorted(cube['Season'].unique().tolist(), reverse=True),
+        'strokes': cube['Stroke'].unique().tolist(),
+        'distances': sorted(cube['Distance'].unique().tolist(), key=lambda d: (len(d), d)),
+        'genders': sorted(cube['Gender'].unique().tolist()),
+        'age_bands': sorted(cube['AgeBand'].unique().tolist(), key=lambda a: (len(a), a)),
+        'teams': sorted(cube['Team'].unique().tolist()),
+    }
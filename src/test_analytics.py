@@ -0,0 +1,98 @@
+import unittest
+import os
+import sys
+import pandas as pd
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '.')))
+
+import analytics
+import parquet_store
+import database as db
+from swimutils import time_string_to_seconds
+from test_database import DatabaseTestCase, scraped_row, BOY, GIRL
+
+BACKSTROKE = "Backstroke (กรรเชียง)"
+
+
+@unittest.skipUnless(analytics.duckdb_available(), "duckdb and pyarrow are required")
+class TestDuckDBEngineMatchesPandas(DatabaseTestCase):
+
+    FILTER_CASES = [
+        {},
+        {'gender': GIRL},
+        {'stroke': BACKSTROKE},
+        {'distance': "100 m", 'min_age': 10},
+        {'min_age': 9, 'max_age': 9},
+        {'clubs': ["Club B"], 'gender': BOY},
+        {'schools': ["School X"]},
+    ]
+
+    def setUp(self):
+        super().setUp()
+        self._export_dir = parquet_store.EXPORT_DIR
+        parquet_store.EXPORT_DIR = os.path.join(self.tmpdir.name, "exports")
+        rows = []
+        for i in range(40):
+            rows.append(scraped_row(
+                f"Swimmer {i:02d}", f"00:{30 + i % 17:02d}.{(i * 7) % 100:02d}",
+                club="Club A" if i % 3 else "Club B",
+                gender=GIRL if i % 2 else BOY,
+                age="9-9" if i % 4 else "10-11",
+                competition=f"Meet {i % 5}", date=f"{1 + i % 27:02d}/ก.พ./2569",
+                stroke=BACKSTROKE if i % 5 == 0 else "FreeStyle (ฟรีสไตล์)",
+                distance="100 m" if i % 6 == 0 else "50 m",
+            ))
+        rows.append(scraped_row("Bad Time", "DQ", competition="Meet 9"))
+        db.add_records(pd.DataFrame(rows))
+        swimmers = db.get_swimmers(compact=False)
+        swimmers.loc[swimmers.index[:7], 'School'] = "School X"
+        db.sync_swimmers(swimmers)
+        self.pandas_engine = analytics.PandasEngine()
+        self.duckdb_engine = analytics.DuckDBEngine()
+
+    def tearDown(self):
+        parquet_store.EXPORT_DIR = self._export_dir
+        super().tearDown()
+
+    def test_filter_options(self):
+        expected, actual = self.pandas_engine.filter_options(), self.duckdb_engine.filter_options()
+        for key in expected:
+            self.assertEqual(sorted(expected[key]), sorted(actual[key]), key)
+
+    def test_summary_and_stroke_counts(self):
+        for filters in self.FILTER_CASES:
+            with self.subTest(filters=filters):
+                self.assertEqual(self.pandas_engine.summary(filters), self.duckdb_engine.summary(filters))
+                self.assertEqual(self.pandas_engine.stroke_counts(filters), self.duckdb_engine.stroke_counts(filters))
+
+    def test_top_n(self):
+        for filters in self.FILTER_CASES:
+            for stroke in ["FreeStyle (ฟรีสไตล์)", BACKSTROKE]:
+                self.assertEqual(self.pandas_engine.distances(filters, stroke), self.duckdb_engine.distances(filters, stroke))
+                for distance in ["All", "50 m"]:
+                    with self.subTest(filters=filters, stroke=stroke, distance=distance):
+                        expected = self.pandas_engine.top_n(filters, stroke, distance, 8)
+                        actual = self.duckdb_engine.top_n(filters, stroke, distance, 8)
+                        self.assertEqual(expected['Time'].tolist(), actual['Time'].tolist())
+                        self.assertEqual(expected['Name'].tolist(), actual['Name'].tolist())
+                        self.assertEqual(
+                            pd.to_datetime(expected['CompetitionDate']).tolist(),
+                            pd.to_datetime(actual['CompetitionDate']).tolist()
+                        )
+
+    def test_one_digit_fraction_reads_as_decimal_everywhere(self):
+        db.add_records(pd.DataFrame([
+            scraped_row("Fraction Tenths", "00:25.5", distance="200 m"),
+            scraped_row("Fraction Hundredths", "00:25.10", distance="200 m"),
+        ]))
+        parquet_store.refresh_snapshots()
+        self.assertEqual((time_string_to_seconds("00:25.5"), time_string_to_seconds("00:25.10")), (25.5, 25.1))
+        for engine in (analytics.PandasEngine(), analytics.DuckDBEngine()):
+            with self.subTest(engine=engine.name):
+                top = engine.top_n({}, "FreeStyle (ฟรีสไตล์)", "200 m", 2)
+                self.assertEqual(top['Time'].tolist(), ["00:25.10", "00:25.5"])
+        self.assertEqual(self.query(f"SELECT {db.SECONDS_SQL.format(repr('00:25.5'))}"), [(25.5,)])
+
+
+if __name__ == '__main__':
+    unittest.main()
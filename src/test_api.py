@@ -0,0 +1,97 @@
+import unittest
+import json
+import os
+import sys
+import threading
+import urllib.error
+import urllib.request
+import pandas as pd
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '.')))
+
+import api
+import database as db
+import progression
+from test_database import DatabaseTestCase, scraped_row, BOY
+
+
+class TestApi(DatabaseTestCase):
+
+    def setUp(self):
+        super().setUp()
+        db.add_records(pd.DataFrame([
+            scraped_row("Alpha Swimmer", "00:30.00", competition="Open"),
+            scraped_row("Alpha Swimmer", "00:29.00", competition="Cup"),
+            scraped_row("Beta Other", "00:31.00", competition="Open", age="10-11"),
+            scraped_row("Somchai Jaidee", "00:28.00", gender=BOY, competition="Open"),
+        ]))
+        self.server = api.make_server(port=0)
+        self.thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+        self.thread.start()
+        self.base = f"http://127.0.0.1:{self.server.server_port}"
+
+    def tearDown(self):
+        self.server.shutdown()
+        self.server.server_close()
+        super().tearDown()
+
+    def get(self, path, etag=None):
+        request = urllib.request.Request(self.base + path, headers={'If-None-Match': etag} if etag else {})
+        try:
+            with urllib.request.urlopen(request) as response:
+                return response.status, response.headers.get('ETag'), json.loads(response.read())
+        except urllib.error.HTTPError as e:
+            body = e.read()
+            return e.code, e.headers.get('ETag'), json.loads(body) if body else None
+
+    def test_rankings_filter_and_paginate(self):
+        status, _, body = self.get("/rankings?gender=" + urllib.request.quote("Female (หญิง)") + "&limit=1")
+        self.assertEqual(status, 200)
+        self.assertEqual(body['total'], 2)
+        self.assertEqual([(i['Rank'], i['Name'], i['Time']) for i in body['items']], [(1, "Alpha Swimmer", "00:29.00")])
+        _, _, body = self.get("/rankings?gender=" + urllib.request.quote("Female (หญิง)") + "&min_age=10")
+        self.assertEqual([i['Name'] for i in body['items']], ["Beta Other"])
+        self.assertEqual(self.get("/rankings?limit=abc")[0], 400)
+
+    def test_history_and_competitions(self):
+        _, _, body = self.get("/swimmers/alpha_swimmer/history")
+        self.assertEqual(sorted(i['Competition'] for i in body['items']), ["Cup", "Open"])
+        self.assertEqual(self.get("/swimmers/nobody/history")[0], 404)
+        _, _, body = self.get("/competitions?q=op")
+        self.assertEqual([(i['Competition'], i['Records']) for i in body['items']], [("Open", 3)])
+
+    def test_rank_history(self):
+        _, _, body = self.get("/swimmers/alpha_swimmer/ranks")
+        self.assertEqual([(i['AgeRange'], i['Rank']) for i in body['items']], [("9-9", 1.0)])
+        self.assertEqual(self.get("/swimmers/nobody/ranks")[0], 404)
+
+    def test_progression(self):
+        self.assertEqual(self.get("/swimmers/alpha_swimmer/progression")[0], 404)
+        progression.refresh_progression()
+        _, _, body = self.get("/swimmers/alpha_swimmer/progression")
+        self.assertEqual([i['Swim'] for i in body['items']], [1, 2])
+        self.assertEqual(body['items'][-1]['BestTime'], "00:29.00")
+        self.assertIsInstance(body['items'][0]['UniqueID'], str)
+
+    def test_missing_values_become_null(self):
+        df = pd.DataFrame({'UniqueID': pd.array([1, None], dtype='Int64'), 'Time': ["00:30.00", pd.NA],
+                           'SwimDate': pd.to_datetime(["2026-01-31", None]), 'Seconds': [30.0, float('nan')]})
+        items = api._frame_items(df)
+        self.assertEqual(items[0]['UniqueID'], "1")
+        self.assertEqual(items[1], {'UniqueID': None, 'Time': None, 'SwimDate': None, 'Seconds': None})
+        json.dumps(items[1])
+
+    def test_etag_revalidation(self):
+        status, etag, _ = self.get("/competitions")
+        self.assertEqual(status, 200)
+        self.assertEqual(self.get("/competitions", etag)[0], 304)
+
+        db.add_records(pd.DataFrame([scraped_row("Gamma New", "00:35.00", competition="Winter")]))
+        status, new_etag, body = self.get("/competitions", etag)
+        self.assertEqual(status, 200)
+        self.assertNotEqual(new_etag, etag)
+        self.assertIn("Winter", [i['Competition'] for i in body['items']])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,65 @@
+import unittest
+import os
+import sys
+import threading
+import pandas as pd
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '.')))
+
+import backup
+import database as db
+from test_database import DatabaseTestCase, scraped_row
+
+
+class TestBackup(DatabaseTestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.backup_dir = os.path.join(self.tmpdir.name, "backups")
+        db.add_records(pd.DataFrame([scraped_row("Alpha Swimmer", "00:30.00"), scraped_row("Beta Other", "00:31.00")]))
+
+    def test_snapshot_during_writes_and_restore(self):
+        stop = threading.Event()
+
+        def keep_writing():
+            n = 0
+            while not stop.is_set():
+                n += 1
+                db.add_records(pd.DataFrame([scraped_row("Alpha Swimmer", f"00:{40 + n % 19}.{n % 100:02d}", competition=f"Meet {n}")]))
+
+        writer = threading.Thread(target=keep_writing)
+        writer.start()
+        try:
+            path = backup.snapshot(self.backup_dir)
+        finally:
+            stop.set()
+            writer.join()
+        self.assertEqual(backup.integrity_errors(path), [])
+        self.assertEqual(backup.list_snapshots(self.backup_dir), [path])
+
+        count = self.query("SELECT COUNT(*) FROM RecordTable")[0][0]
+        db.delete_records(db.get_records()['UniqueID'].tolist())
+        previous = backup.restore(path, self.backup_dir)
+        restored = self.query("SELECT COUNT(*) FROM RecordTable")[0][0]
+        self.assertGreaterEqual(restored, 2)
+        self.assertLessEqual(restored, count)
+        self.assertEqual(db.get_stats()['RecordCount'], restored)
+        # The state before the restore was kept and writes still work afterwards
+        self.assertEqual(self.query("SELECT COUNT(*) FROM RecordTable"), [(restored,)])
+        self.assertIn(previous, backup.list_snapshots(self.backup_dir))
+        self.assertEqual(db.add_records(pd.DataFrame([scraped_row("Gamma Third", "00:32.00")])), 1)
+
+    def test_retention_and_corrupt_snapshots(self):
+        paths = [backup.snapshot(self.backup_dir, keep=2) for _ in range(3)]
+        self.assertEqual(backup.list_snapshots(self.backup_dir), paths[:0:-1])
+
+        with open(paths[-1], 'r+b') as f:
+            f.seek(100)
+            f.write(b"\xff" * 4096)
+        with self.assertRaises(backup.BackupError):
+            backup.restore(paths[-1], self.backup_dir)
+        self.assertEqual(db.get_stats()['RecordCount'], 2)
+
+
+if __name__ == '__main__':
+    unittest.main()
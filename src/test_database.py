@@ -0,0 +1,451 @@
+import unittest
+import hashlib
+import os
+import sys
+import tempfile
+import sqlite3
+import pandas as pd
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '.')))
+
+import database as db
+
+FREESTYLE = "FreeStyle (ฟรีสไตล์)"
+GIRL = "Female (หญิง)"
+BOY = "Male (ชาย)"
+
+def scraped_row(name, time, club="Club A", gender=GIRL, age="9-9", competition="Open", date="31/ม.ค./2569", stroke=FREESTYLE, distance="50 m"):
+    return {
+        'Rank': 1, 'Name': name, 'Club': club, 'Nationality': 'ไทย', 'Time': time,
+        'Competition': competition, 'CompetitionDate': date, 'Stroke': stroke,
+        'Distance': distance, 'AgeRange': age, 'Pool': 'Long Course (50m)', 'Gender': gender,
+    }
+
+
+class DatabaseTestCase(unittest.TestCase):
+    """Points the database module at a fresh temporary file for each test."""
+
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self._db_file = db.DB_FILE
+        db.DB_FILE = os.path.join(self.tmpdir.name, "swim_data.db")
+        db.init_db()
+
+    def tearDown(self):
+        db.close_writers()
+        db.DB_FILE = self._db_file
+        self.tmpdir.cleanup()
+
+    def query(self, sql, params=()):
+        conn = sqlite3.connect(db.DB_FILE)
+        rows = conn.execute(sql, params).fetchall()
+        conn.close()
+        return rows
+
+
+class TestIdentityResolution(DatabaseTestCase):
+
+    def test_spelling_variants_resolve_to_one_swimmer(self):
+        db.add_records(pd.DataFrame([
+            scraped_row("อัยย์ คิโดะ", "00:34.18"),
+            scraped_row("อัยย์  คิโดะ", "00:34.00", competition="Winter"),
+            scraped_row("อัยย์ คิโด", "00:33.90", club="Club B", competition="Summer"),
+        ]))
+        records = db.get_records()
+        self.assertEqual(records['SwimmerUniqID'].nunique(), 1)
+        self.assertEqual(len(records), 3)
+        self.assertEqual(len(self.query("SELECT * FROM SwimmerTable")), 1)
+
+    def test_same_name_different_children_stay_apart(self):
+        db.add_records(pd.DataFrame([
+            scraped_row("Somchai Jaidee", "00:30.00", gender=BOY, age="9-9"),
+            scraped_row("Somchai Jaidee", "00:28.00", gender=BOY, age="15-15", competition="Seniors"),
+        ]))
+        ids = sorted(self.query("SELECT UniqID FROM SwimmerTable"))
+        self.assertEqual(ids, [("somchai_jaidee",), ("somchai_jaidee~2",)])
+
+    def test_same_name_different_children_stay_apart_across_batches(self):
+        db.add_records(pd.DataFrame([scraped_row("Somchai Jaidee", "00:30.00", gender=BOY, age="9-9")]))
+        db.add_records(pd.DataFrame([scraped_row("Somchai Jaidee", "00:28.00", gender=BOY, age="15-15", competition="Seniors")]))
+        ids = sorted(self.query("SELECT UniqID FROM SwimmerTable"))
+        self.assertEqual(ids, [("somchai_jaidee",), ("somchai_jaidee~2",)])
+        # The same child a year later still resolves to the first swimmer
+        db.add_records(pd.DataFrame([scraped_row("Somchai Jaidee", "00:29.00", gender=BOY, age="10-10", competition="Next",
+                                                 date="15/มี.ค./2570")]))
+        self.assertEqual(len(self.query("SELECT UniqID FROM SwimmerTable")), 2)
+        self.assertEqual(self.query("SELECT SwimmerUniqID FROM RecordView WHERE Competition = 'Next'"), [("somchai_jaidee",)])
+
+    def test_birth_years_narrow_with_every_sighting(self):
+        db.add_records(pd.DataFrame([scraped_row("Somchai Jaidee", "00:30.00", gender=BOY, age="9-9")]))
+        self.assertEqual(self.query("SELECT BirthYearMin, BirthYearMax FROM SwimmerTable"), [(2016, 2017)])
+        db.add_records(pd.DataFrame([scraped_row("Somchai Jaidee", "00:29.00", gender=BOY, age="10-10", competition="Later",
+                                                 date="15/ก.ค./2569")]))
+        self.assertEqual(self.query("SELECT BirthYearMin, BirthYearMax FROM SwimmerTable"), [(2016, 2016)])
+
+    def test_writer_keeps_one_resolver_until_another_write(self):
+        loads = []
+
+        class CountingResolver(db.SwimmerResolver):
+            def _load(self):
+                loads.append(1)
+                super()._load()
+
+        self.addCleanup(setattr, db, 'SwimmerResolver', db.SwimmerResolver)
+        db.SwimmerResolver = CountingResolver
+        db.add_records(pd.DataFrame([scraped_row("Alpha Swimmer", "00:30.00")]))
+        db.add_records(pd.DataFrame([scraped_row("Beta Other", "00:31.00")]))
+        self.assertTrue(db.merge_swimmers("beta_other", "alpha_swimmer"))
+        db.add_records(pd.DataFrame([scraped_row("Beta Other", "00:30.50", competition="Later")]))
+        self.assertEqual(len(loads), 1)
+        self.assertEqual(set(db.get_records()['SwimmerUniqID']), {"alpha_swimmer"})
+
+        # A write the resolver did not see (here another connection's) makes the next request reload it
+        with sqlite3.connect(db.DB_FILE) as conn:
+            conn.execute("DELETE FROM SwimmerMergeTable")
+        db.add_records(pd.DataFrame([scraped_row("Beta Other", "00:30.00", competition="Last")]))
+        self.assertEqual(len(loads), 2)
+        self.assertEqual(self.query("SELECT SwimmerUniqID FROM RecordView WHERE Competition = 'Last'"), [("beta_other",)])
+
+    def test_get_records_respects_manual_merge(self):
+        db.add_records(pd.DataFrame([
+            scraped_row("Alpha Swimmer", "00:30.00"),
+            scraped_row("Beta Other", "00:31.00"),
+        ]))
+        self.assertTrue(db.merge_swimmers("beta_other", "alpha_swimmer"))
+        records = db.get_records()
+        self.assertEqual(set(records['SwimmerUniqID']), {"alpha_swimmer"})
+        self.assertTrue(db.unmerge_swimmer("beta_other"))
+        self.assertEqual(db.get_records()['SwimmerUniqID'].nunique(), 2)
+
+
+class TestRecordFrames(DatabaseTestCase):
+
+    def test_get_records_follows_record_schema(self):
+        db.add_records(pd.DataFrame([
+            scraped_row("Alpha Swimmer", "00:30.00"),
+            scraped_row("Somchai Jaidee", "00:29.00", gender=BOY, club="Club B"),
+        ]))
+        records = db.get_records()
+        for column, dtype in db.RECORD_SCHEMA.items():
+            if dtype == 'category':
+                self.assertIsInstance(records[column].dtype, pd.CategoricalDtype, column)
+            else:
+                self.assertEqual(records[column].dtype, pd.api.types.pandas_dtype(dtype), column)
+        self.assertEqual(records['UniqueID'].dtype, 'int64')
+
+        plain = db.get_records(compact=False)
+        self.assertEqual(plain['UniqueID'].dtype, 'int64')
+        for column in db.RECORD_SCHEMA:
+            self.assertNotIsInstance(plain[column].dtype, pd.CategoricalDtype, column)
+        self.assertEqual(sorted(plain['Name']), sorted(records['Name'].astype(str)))
+        self.assertTrue(all(isinstance(name, str) for name in plain['Name']))
+
+
+class TestSchemaInit(DatabaseTestCase):
+
+    def test_schema_version_is_recorded(self):
+        self.assertEqual(self.query("PRAGMA user_version"), [(db.SCHEMA_VERSION,)])
+
+    def test_school_table_reloads_only_when_file_changes(self):
+        school_file = os.path.join(self.tmpdir.name, "schools.txt")
+        with open(school_file, 'w', encoding='utf-8') as f:
+            f.write("Item ThaiSchool ThaiAbridgeName ENG.Abridge SATITGAME\n1 สาธิตเกษตร สมก KUS YES\n")
+        self.assertTrue(db.refresh_school_data(school_file))
+        self.assertFalse(db.refresh_school_data(school_file))
+        self.assertEqual(self.query("SELECT ThaiSchool, SATITGAME FROM SchoolTable"), [("สาธิตเกษตร", "True")])
+
+        with open(school_file, 'a', encoding='utf-8') as f:
+            f.write("2 สาธิตขอนแก่น สมข. KKUDS NO\n")
+        self.assertTrue(db.refresh_school_data(school_file))
+        self.assertEqual(len(self.query("SELECT * FROM SchoolTable")), 2)
+
+
+class TestDimensions(DatabaseTestCase):
+
+    def test_competitions_and_clubs_are_stored_once(self):
+        db.add_records(pd.DataFrame([
+            scraped_row("Alpha Swimmer", "00:30.00", competition="Open"),
+            scraped_row("Alpha Swimmer", "00:29.00", competition="Cup", club="Club B"),
+            scraped_row("Beta Other", "00:31.00", competition="Open"),
+        ]))
+        self.assertEqual(self.query("SELECT Name FROM CompetitionTable ORDER BY Name"), [("Cup",), ("Open",)])
+        self.assertEqual(self.query("SELECT Name FROM ClubTable ORDER BY Name"), [("Club A",), ("Club B",)])
+        records = db.get_records(compact=False)
+        self.assertEqual(sorted(records['Competition']), ["Cup", "Open", "Open"])
+        self.assertEqual(db.search_competitions("Op"), ["Open"])
+        self.assertEqual(db.get_competition_date("Cup"), "31/ม.ค./2569")
+
+        records.loc[records['Competition'] == "Cup", ['Competition', 'Club']] = ["Renamed Cup", "Club A"]
+        db.sync_records(records)
+        records = db.get_records(compact=False)
+        self.assertEqual(sorted(records['Competition']), ["Open", "Open", "Renamed Cup"])
+        self.assertEqual(set(records['Club']), {"Club A"})
+
+    def test_migration_moves_inline_names_into_dimensions(self):
+        conn = sqlite3.connect(db.DB_FILE)
+        c = conn.cursor()
+        for name in c.execute("SELECT name FROM sqlite_master WHERE type IN ('table', 'view') AND name NOT LIKE 'sqlite_%'").fetchall():
+            c.execute(f"DROP {'VIEW' if name[0] == 'RecordView' else 'TABLE'} IF EXISTS {name[0]}")
+        for version, migrate in db._MIGRATIONS[:5]:
+            migrate(c)
+        c.execute("INSERT INTO SwimmerTable (UniqID, Name) VALUES ('alpha', 'Alpha')")
+        c.execute("""INSERT INTO RecordTable (UniqueID, SwimmerUniqID, Name, Stroke, Distance, Time, Competition, CompetitionDate, Club)
+                     VALUES ('r1', 'alpha', 'Alpha', 'FreeStyle', '50 m', '00:30.00', 'Open', '31/ม.ค./2569', 'Club A'),
+                            ('r2', 'alpha', 'Alpha', 'FreeStyle', '50 m', '00:29.00', 'Open', '31/ม.ค./2569', NULL)""")
+        db._migrate_v6(c)
+        conn.commit()
+        conn.close()
+
+        self.assertEqual(self.query("SELECT COUNT(*) FROM CompetitionTable"), [(1,)])
+        self.assertEqual(self.query("SELECT UniqueID, Competition, Club FROM RecordView ORDER BY UniqueID"),
+                         [("r1", "Open", "Club A"), ("r2", "Open", None)])
+        self.assertEqual(db.get_stats()['DistinctCompetitions'], 1)
+
+
+class TestRecordKeys(DatabaseTestCase):
+
+    def test_keys_are_delimited_64_bit_integers(self):
+        key = db.record_key("alpha", "Open", "31/ม.ค./2569", FREESTYLE, "50 m", "00:30.00")
+        self.assertIsInstance(key, int)
+        self.assertTrue(-2**63 <= key < 2**63)
+        self.assertNotEqual(db.record_key("ab", "c", None, None, None, None), db.record_key("a", "bc", None, None, None, None))
+        self.assertEqual(db.record_key("a", float('nan'), None, "", None, None), db.record_key("a", None, "", None, None, None))
+
+        db.add_records(pd.DataFrame([scraped_row("Alpha Swimmer", "00:30.00")] * 2))
+        records = db.get_records(compact=False)
+        self.assertEqual(len(records), 1)
+        row = records.iloc[0]
+        self.assertEqual(row['UniqueID'], db.record_key(row['SwimmerUniqID'], row['Competition'], row['CompetitionDate'],
+                                                        row['Stroke'], row['Distance'], row['Time']))
+
+    def test_migration_rewrites_hex_keys_and_references(self):
+        db.DB_FILE = os.path.join(self.tmpdir.name, "legacy.db")
+        conn = sqlite3.connect(db.DB_FILE)
+        c = conn.cursor()
+        for version, migrate in db._MIGRATIONS[:11]:
+            migrate(c)
+        c.execute("PRAGMA user_version = 11")
+        c.execute("INSERT INTO CompetitionTable (CompetitionID, Name, CompetitionDate) VALUES (1, 'Open', '31/ม.ค./2569')")
+        c.execute("""INSERT INTO RecordTable (UniqueID, SwimmerUniqID, Name, Stroke, Distance, Time, CompetitionID, SwimDate)
+                     VALUES ('aa11', 'alpha', 'Alpha', 'FreeStyle', '50 m', '00:30.00', 1, '2026-01-31'),
+                            ('bb22', 'alpha', 'Alpha', 'FreeStyle', '50 m', '00:29.00', 1, '2026-01-31')""")
+        c.execute("INSERT INTO ScrapeCoverageRecordTable (CoverageID, UniqueID) VALUES (7, 'aa11'), (7, 'bb22')")
+        c.execute("""INSERT INTO QualificationTable (SwimmerUniqID, StandardID, BestUniqueID, Time, Seconds)
+                     VALUES ('alpha', 3, 'bb22', '00:29.00', 29.0)""")
+        conn.commit()
+        conn.close()
+        db.init_db(force=True)
+
+        fast = db.record_key("alpha", "Open", "31/ม.ค./2569", "FreeStyle", "50 m", "00:29.00")
+        slow = db.record_key("alpha", "Open", "31/ม.ค./2569", "FreeStyle", "50 m", "00:30.00")
+        self.assertEqual(self.query("SELECT UniqueID, Time FROM RecordTable ORDER BY Time"), [(fast, "00:29.00"), (slow, "00:30.00")])
+        self.assertEqual(self.query("SELECT UniqueID FROM ScrapeCoverageRecordTable ORDER BY UniqueID"), sorted([(fast,), (slow,)]))
+        self.assertEqual(self.query("SELECT BestUniqueID FROM QualificationTable"), [(fast,)])
+        self.assertEqual(sorted(self.query("SELECT DISTINCT RowKey FROM ChangeLogTable WHERE TableName = 'RecordTable'")),
+                         sorted([(fast,), (slow,)]))
+        self.assertEqual(self.query("PRAGMA user_version"), [(db.SCHEMA_VERSION,)])
+
+    def test_migration_accounts_for_records_whose_keys_coincide(self):
+        db.DB_FILE = os.path.join(self.tmpdir.name, "legacy.db")
+        conn = sqlite3.connect(db.DB_FILE)
+        c = conn.cursor()
+        for version, migrate in db._MIGRATIONS[:11]:
+            migrate(c)
+        c.execute("PRAGMA user_version = 11")
+        c.execute("INSERT INTO CompetitionTable (CompetitionID, Name, CompetitionDate) VALUES (1, 'Open', '31/ม.ค./2569')")
+        c.execute("""INSERT INTO RecordTable (UniqueID, SwimmerUniqID, Name, Stroke, Distance, Time, CompetitionID)
+                     VALUES ('aa11', 'alpha', 'Alpha', 'FreeStyle', NULL, '00:30.00', 1),
+                            ('cc33', 'alpha', 'Alpha', 'FreeStyle', '', '00:30.00', 1)""")
+        c.execute("DELETE FROM TeamCubeDirtyTable")
+        conn.commit()
+        conn.close()
+        db.init_db(force=True)
+
+        self.assertEqual(len(self.query("SELECT * FROM RecordTable")), 1)
+        stats = db.get_stats()
+        self.assertEqual((stats['RecordCount'], stats['DistinctRecordSwimmers'], stats['DistinctCompetitions']), (1, 1, 1))
+        self.assertEqual(self.query("SELECT Op FROM ChangeLogTable WHERE RowKey = 'cc33' ORDER BY Seq"), [('insert',), ('delete',)])
+        self.assertEqual(self.query("SELECT Season, Stroke FROM TeamCubeDirtyTable"), [(2026, 'FreeStyle')])
+
+
+class TestSearch(DatabaseTestCase):
+
+    def test_fuzzy_search_follows_writes(self):
+        db.add_records(pd.DataFrame([
+            scraped_row("อัยย์ คิโดะ", "00:34.18", club="Dolphin Swim Club", competition="Bangkok Junior Open"),
+            scraped_row("Somchai Jaidee", "00:30.00", gender=BOY, competition="Chiang Mai Age Group"),
+            scraped_row("Somsak Jaidee", "00:31.00", gender=BOY, competition="Bangkok Junior Open"),
+        ]))
+        self.assertEqual(db.search_swimmers("Somchia Jaidee")['Name'].tolist()[0], "Somchai Jaidee")
+        self.assertEqual(db.search_swimmers("อัย คิโด")['Name'].tolist(), ["อัยย์ คิโดะ"])
+        self.assertEqual(db.search_swimmers("dolphin")['Name'].tolist(), ["อัยย์ คิโดะ"])
+        self.assertEqual(db.search_competitions("Bangkok Junor"), ["Bangkok Junior Open"])
+        self.assertEqual(db.search_competitions("zzz"), [])
+
+        swimmers = db.get_swimmers(compact=False)
+        swimmers.loc[swimmers['Name'] == "Somsak Jaidee", 'Club'] = "Dolphin Swim Club"
+        db.sync_swimmers(swimmers)
+        self.assertEqual(sorted(db.search_swimmers("dolphin")['Name']), ["Somsak Jaidee", "อัยย์ คิโดะ"])
+
+    def test_search_normalizes_the_query_and_rescores_past_the_index_order(self):
+        # Clubs repeating the name outrank the swimmer in the index's bm25 order
+        db.add_records(pd.DataFrame(
+            [scraped_row(hashlib.sha1(str(i).encode()).hexdigest()[:10], "00:31.00", club="Somchai Jaidee Somchai Jaidee Team")
+             for i in range(80)] +
+            [scraped_row("Somchai Jaidee", "00:30.00", gender=BOY, club="Other"), scraped_row("สมชาย ใจดี", "00:30.00")]
+        ))
+        self.assertEqual(db.search_swimmers("Somchia Jaidee")['Name'].tolist()[0], "Somchai Jaidee")
+        self.assertEqual(db.search_swimmers("ＳＯＭＣＨＡＩ　ＪＡＩＤＥＥ")['Name'].tolist()[0], "Somchai Jaidee")
+        self.assertEqual(db.search_swimmers("สมชาย ใจดี่")['Name'].tolist(), ["สมชาย ใจดี"])
+
+
+class TestStats(DatabaseTestCase):
+
+    def assertStatsMatchTables(self):
+        stats = db.get_stats()
+        self.assertEqual(stats['RecordCount'], self.query("SELECT COUNT(*) FROM RecordTable")[0][0])
+        self.assertEqual(stats['SwimmerCount'], self.query("SELECT COUNT(*) FROM SwimmerTable")[0][0])
+        self.assertEqual(stats['DistinctRecordSwimmers'], self.query("SELECT COUNT(DISTINCT SwimmerUniqID) FROM RecordTable")[0][0])
+        self.assertEqual(stats['DistinctCompetitions'], self.query("SELECT COUNT(DISTINCT Competition) FROM RecordView")[0][0])
+
+    def test_stats_follow_writes(self):
+        self.assertEqual(db.get_stats()['RecordCount'], 0)
+        db.add_records(pd.DataFrame([
+            scraped_row("Alpha Swimmer", "00:30.00", competition="Open"),
+            scraped_row("Alpha Swimmer", "00:29.00", competition="Cup"),
+            scraped_row("Beta Other", "00:31.00", competition="Open"),
+        ]))
+        self.assertStatsMatchTables()
+        self.assertIsNotNone(db.get_stats()['LastIngestAt'])
+
+        records = db.get_records(compact=False)
+        records.loc[records['Competition'] == "Cup", 'Competition'] = "Renamed Cup"
+        db.sync_records(records)
+        self.assertStatsMatchTables()
+
+        db.delete_records(records.loc[records['Name'] == "Beta Other", 'UniqueID'].tolist())
+        self.assertStatsMatchTables()
+
+        db.sync_swimmers(db.get_swimmers(compact=False))
+        self.assertStatsMatchTables()
+
+
+class TestChangeLog(DatabaseTestCase):
+
+    def test_writes_are_logged_and_compacted(self):
+        db.add_records(pd.DataFrame([
+            scraped_row("Alpha Swimmer", "00:30.00", competition="Open"),
+            scraped_row("Beta Other", "00:31.00", competition="Open"),
+        ]))
+        start = db.get_change_seq()
+        self.assertEqual(sorted((c['TableName'], c['Op']) for c in db.changes_since(0)),
+                         [("RecordTable", "insert")] * 2 + [("SwimmerTable", "insert")] * 2)
+
+        # Rewriting swimmers unchanged logs nothing; edits log only the changed columns
+        db.sync_swimmers(db.get_swimmers(compact=False))
+        self.assertEqual(db.get_change_seq(), start)
+        records = db.get_records(compact=False)
+        records.loc[records['Name'] == "Alpha Swimmer", 'Time'] = "00:29.50"
+        db.sync_records(records)
+        alpha = records.loc[records['Name'] == "Alpha Swimmer", 'UniqueID'].iloc[0]
+        db.delete_records([records.loc[records['Name'] == "Beta Other", 'UniqueID'].iloc[0]])
+        changes = list(db.changes_since(start, chunk_size=1))
+        self.assertEqual([(c['RowKey'] == alpha, c['Op'], c['Columns']) for c in changes],
+                         [(True, "update", ["Time"]), (False, "delete", None)])
+        self.assertEqual(list(db.changes_since(start, tables=["SwimmerTable"])), [])
+
+        self.assertEqual(db.compact_changes(), 2)
+        compacted = {(c['TableName'], c['RowKey']): c['Op'] for c in db.changes_since(0)}
+        self.assertEqual(compacted[("RecordTable", alpha)], "insert")
+        self.assertEqual(sorted(compacted.values()), ["delete", "insert", "insert", "insert"])
+        self.assertEqual(len(list(db.changes_since(start))), 2)
+
+        # The fold follows Seq order: a delete after the insert wins, a re-insert after that wins again
+        db.delete_records([alpha])
+        db.compact_changes()
+        self.assertEqual({(c['TableName'], c['RowKey']): c['Op'] for c in db.changes_since(0)}[("RecordTable", alpha)], "delete")
+        db.add_records(pd.DataFrame([scraped_row("Alpha Swimmer", "00:30.00", competition="Open")]))
+        db.compact_changes()
+        self.assertEqual({(c['TableName'], c['RowKey']): c['Op'] for c in db.changes_since(0)}[("RecordTable", alpha)], "insert")
+
+
+class TestRankingHistory(DatabaseTestCase):
+
+    def scrape(self, names):
+        rows = []
+        for place, name in enumerate(names, start=1):
+            row = scraped_row(name, f"00:{30 + place}.00")
+            row['Rank'] = place
+            rows.append(row)
+        db.add_records(pd.DataFrame(rows))
+
+    def test_snapshots_are_delta_encoded_and_replayed(self):
+        keyframe_interval = db.KEYFRAME_INTERVAL
+        db.KEYFRAME_INTERVAL = 3
+        try:
+            scrapes = [
+                ["Alpha Swimmer", "Beta Other", "Gamma Third"],
+                ["Beta Other", "Alpha Swimmer", "Gamma Third"],
+                ["Beta Other", "Alpha Swimmer", "Gamma Third"],   # unchanged: not stored again
+                ["Beta Other", "Gamma Third", "Delta Fourth"],
+                ["Delta Fourth", "Beta Other", "Gamma Third", "Alpha Swimmer"],
+            ]
+            for names in scrapes:
+                self.scrape(names)
+        finally:
+            db.KEYFRAME_INTERVAL = keyframe_interval
+        event = (FREESTYLE, "50 m", GIRL, "Long Course (50m)", "9-9")
+
+        snapshots = db.get_ranking_snapshots(*event)
+        self.assertEqual(snapshots['IsKeyframe'].tolist(), [1, 0, 0, 1])
+        # The second snapshot stores only the two swimmers who swapped places
+        self.assertEqual(self.query("SELECT COUNT(*) FROM RankingEntryTable WHERE SnapshotID = ?", (int(snapshots['SnapshotID'][1]),)), [(2,)])
+        for snapshot_id, names in zip(snapshots['SnapshotID'], [scrapes[0], scrapes[1], scrapes[3], scrapes[4]]):
+            self.assertEqual(db.get_ranking_snapshot(*event, snapshot_id=int(snapshot_id))['Name'].tolist(), names)
+
+        history = db.get_rank_history("alpha_swimmer")
+        self.assertEqual(history['Rank'].fillna(0).tolist(), [1, 2, 0, 4])
+
+        movers = db.get_biggest_movers(*event)
+        self.assertEqual(movers['Name'].tolist()[0], "Delta Fourth")
+        self.assertEqual(movers['Change'].tolist()[0], 2)
+        self.assertTrue(pd.isna(movers.set_index('Name').loc["Alpha Swimmer", 'FromRank']))
+
+
+class TestRankings(DatabaseTestCase):
+
+    def test_ties_share_a_rank_and_best_swim_wins(self):
+        db.add_records(pd.DataFrame([
+            scraped_row("Alpha Swimmer", "00:30.00", competition="Open"),
+            scraped_row("Alpha Swimmer", "00:29.00", competition="Cup"),
+            scraped_row("Beta Other", "00:29.00", competition="Open"),
+            scraped_row("Gamma Third", "00:31.00", competition="Open"),
+            scraped_row("Delta Fourth", "DQ", competition="Open"),
+        ]))
+        best = db.get_rankings(stroke=FREESTYLE, distance="50 m")
+        self.assertEqual(best['Rank'].tolist(), [1, 1, 3])
+        self.assertEqual(best['Name'].tolist()[2], "Gamma Third")
+        self.assertEqual(best['Total'].iloc[0], 3)
+        self.assertEqual(len(db.get_rankings(stroke=FREESTYLE, best_only=False)), 4)
+
+    def test_age_band_uses_birth_year_at_swim_date(self):
+        db.add_records(pd.DataFrame([
+            scraped_row("Alpha Swimmer", "00:30.00", age="9-10", date="15/ม.ค./2568"),
+            scraped_row("Alpha Swimmer", "00:29.00", age="10-11", competition="Cup", date="15/ม.ค./2569"),
+            scraped_row("Beta Other", "00:31.00", age="9-10", date="15/ม.ค./2568"),
+        ]))
+        swimmers = db.get_swimmers(compact=False)
+        swimmers.loc[swimmers['UniqID'] == "alpha_swimmer", 'YearOfBirth'] = 2015
+        db.sync_swimmers(swimmers)
+
+        # Alpha was 10 in 2025 and 11 in 2026; Beta has no birth year but a 9-10 range
+        band = db.get_rankings(stroke=FREESTYLE, min_age=9, max_age=10)
+        self.assertEqual(list(zip(band['Name'], band['Time'])), [("Alpha Swimmer", "00:30.00"), ("Beta Other", "00:31.00")])
+        self.assertEqual(band['AgeAtSwim'].tolist()[0], 10)
+        self.assertEqual(db.get_rankings(stroke=FREESTYLE, min_age=11, max_age=11)['Time'].tolist(), ["00:29.00"])
+        window = db.get_rankings(stroke=FREESTYLE, start_date="2026-01-01", pool="Long Course (50m)")
+        self.assertEqual(window['SwimDate'].tolist(), ["2026-01-15"])
+
+
+if __name__ == '__main__':
+    unittest.main()
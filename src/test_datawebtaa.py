@@ -1,4 +1,5 @@
 import unittest
+import json
 import os
 import sys
 import pandas as pd
@@ -7,7 +8,7 @@ import pandas as pd
 # This allows importing 'datawebtaa' as a module
 sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '.')))
 
-from datawebtaa import SwimDataScraper 
+from datawebtaa import SwimDataScraper, filter_mismatches
 class TestSwimDataScraper(unittest.TestCase):
 
     # Define test cases mapping to the internal structure of SwimDataScraper
@@ -77,5 +78,25 @@ class TestSwimDataScraper(unittest.TestCase):
                    #     #os.remove(expected_filename)
         dummy_scraper.close() # Close dummy scraper, as it launched a headless browser.
 
+
+class TestFastPathVerification(unittest.TestCase):
+
+    FILTERS = {
+        'event': {"SwimmingTypeDetailId": "2", "DistId": "1", "GenderId": "2", "PoolLengthId": "1", "AgeMin": "9", "AgeMax": "9"},
+        'startDate': "01/Jan/25", 'endDate': "31/Dec/25",
+    }
+
+    def params(self, **event):
+        sent = {**self.FILTERS['event'], "TimestdF": "", "NationId": "0", **event}
+        return {'CompetitionEvent': json.dumps(sent), 'startDate': "01/Jan/25", 'endDate': "31/Dec/25", 'length': -1}
+
+    def test_matching_request_passes(self):
+        self.assertEqual(filter_mismatches(self.params(), self.FILTERS), [])
+
+    def test_mismatches_are_named(self):
+        self.assertEqual(filter_mismatches(self.params(GenderId="1"), self.FILTERS), ["GenderId"])
+        self.assertEqual(filter_mismatches({**self.params(), 'length': 50, 'endDate': ""}, self.FILTERS), ["endDate", "length"])
+        self.assertEqual(filter_mismatches(None, self.FILTERS), ["request"])
+
 if __name__ == '__main__':
     unittest.main()
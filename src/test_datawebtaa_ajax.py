@@ -0,0 +1,76 @@
+import unittest
+import os
+import sys
+import json
+from datetime import date
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '.')))
+
+from datawebtaa_ajax import SwimDataAjaxScraper, parse_rankings
+
+S = SwimDataAjaxScraper
+
+
+class FakeResponse:
+
+    def __init__(self, payload):
+        self.content = json.dumps(payload, ensure_ascii=False).encode('utf-8')
+
+    def raise_for_status(self):
+        pass
+
+
+class FakeSession:
+
+    def __init__(self, payload):
+        self.payload = payload
+        self.posted = []
+
+    def post(self, url, data=None, headers=None):
+        self.posted.append(data)
+        return FakeResponse(self.payload)
+
+    def close(self):
+        pass
+
+
+class TestAjaxParsing(unittest.TestCase):
+
+    ROWS = [
+        {'Place': 1, 'FullName': "อัยย์ คิโดะ", 'ClubName': "Club A", 'Nation': "ไทย", 'Time': "00:34.18",
+         'Competition': {'Name': "Open", 'StartDayString': "31/ม.ค./2569"}},
+        {'Place': 2, 'FullName': "Somchai Jaidee", 'ClubName': None, 'Nation': "ไทย", 'Time': "00:35.00",
+         'Competition': None},
+    ]
+
+    def scraper(self, payload):
+        scraper = S()
+        scraper.session = FakeSession(payload)
+        return scraper
+
+    def scrape(self, scraper, **kwargs):
+        return scraper.scrape_rankings(S.STROKES["1"], S.DISTANCES["1"], S.GENDERS["2"], S.POOL_TYPES["1"], "9", "10",
+                                       date(2025, 1, 1), date(2025, 12, 31), **kwargs)
+
+    def test_rows_become_columns_with_categorical_context(self):
+        scraper = self.scraper({'data': self.ROWS})
+        df = self.scrape(scraper, time_standard="00:35.00")
+        self.assertEqual(df['Name'].tolist(), ["อัยย์ คิโดะ", "Somchai Jaidee"])
+        self.assertEqual(df['Competition'].tolist()[0], "Open")
+        self.assertTrue(df['Competition'].isna().tolist()[1])
+        self.assertEqual(df['CompetitionDate'].tolist()[0], "31/ม.ค./2569")
+        self.assertEqual(str(df['Stroke'].dtype), 'category')
+        self.assertEqual(df['AgeRange'].tolist(), ["9-10", "9-10"])
+        self.assertEqual(json.loads(scraper.session.posted[0]['CompetitionEvent'])['TimestdF'], "00:35.00")
+
+    def test_empty_and_invalid_responses(self):
+        self.assertTrue(parse_rankings(b'{"data": []}').empty)
+        self.assertTrue(self.scrape(self.scraper({'data': []})).empty)
+        scraper = self.scraper({})
+        scraper.session.payload = None
+        scraper.session.post = lambda *a, **k: type("R", (), {'content': b"<html>", 'raise_for_status': lambda self: None})()
+        self.assertIsNone(self.scrape(scraper))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,90 @@
+import unittest
+import os
+import sys
+import threading
+import pandas as pd
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '.')))
+
+import database as db
+from dbwriter import WriteQueue
+from test_database import DatabaseTestCase, scraped_row
+
+
+class TestWriteQueue(DatabaseTestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.writer = WriteQueue(db.DB_FILE)
+        self.release = threading.Event()
+
+    def hold_writer(self):
+        """Keeps the writer busy in a transaction until self.release is set."""
+        started = threading.Event()
+        def blocker(c):
+            started.set()
+            return self.release.wait(5)
+        future = self.writer.submit_async(blocker)
+        started.wait(5)
+        return future
+
+    def tearDown(self):
+        self.writer.close()
+        super().tearDown()
+
+    def test_queued_requests_share_one_commit(self):
+        blocker = self.hold_writer()
+        futures = [
+            self.writer.submit_async(db._add_records, pd.DataFrame([scraped_row("Alpha Swimmer", f"00:{30 + i}.00")]))
+            for i in range(10)
+        ]
+        self.release.set()
+        self.assertTrue(blocker.result())
+        self.assertEqual([f.result() for f in futures], [1] * 10)
+        self.assertEqual(self.writer.commits, 2)
+        self.assertEqual(self.query("SELECT COUNT(*) FROM RecordTable"), [(10,)])
+
+    def test_failed_request_rolls_back_alone(self):
+        def failing(c):
+            c.execute("INSERT INTO MetaTable (Key, Value) VALUES ('partial', 'x')")
+            raise ValueError("boom")
+
+        self.hold_writer()
+        bad = self.writer.submit_async(failing)
+        good = self.writer.submit_async(db._add_records, pd.DataFrame([scraped_row("Alpha Swimmer", "00:30.00")]))
+        self.release.set()
+        with self.assertRaises(ValueError):
+            bad.result()
+        self.assertEqual(good.result(), 1)
+        self.assertEqual(self.query("SELECT * FROM MetaTable WHERE Key = 'partial'"), [])
+
+
+class TestConcurrentWrites(DatabaseTestCase):
+
+    def test_sessions_writing_at_once(self):
+        results = {}
+
+        def session(n):
+            results[n] = db.add_single_record({
+                'name': f"Swimmer {n}", 'gender': "Female (หญิง)", 'club': "Club A", 'school': None,
+                'age': "9-9", 'stroke': "FreeStyle (ฟรีสไตล์)", 'distance': "50 m", 'time': f"00:{30 + n}.00",
+                'competition': "Open", 'competition_date': "31/ม.ค./2569", 'nationality': "ไทย",
+            })
+
+        threads = [threading.Thread(target=session, args=(n,)) for n in range(16)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        self.assertEqual(results, {n: True for n in range(16)})
+        self.assertEqual(db.get_stats()['RecordCount'], 16)
+        # A duplicate is reported to its caller without disturbing the queue
+        self.assertFalse(db.add_single_record({
+            'name': "Swimmer 0", 'gender': "Female (หญิง)", 'club': "Club A", 'school': None,
+            'age': "9-9", 'stroke': "FreeStyle (ฟรีสไตล์)", 'distance': "50 m", 'time': "00:30.00",
+            'competition': "Open", 'competition_date': "31/ม.ค./2569", 'nationality': "ไทย",
+        }))
+
+
+if __name__ == '__main__':
+    unittest.main()
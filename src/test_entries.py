@@ -0,0 +1,69 @@
+import unittest
+import io
+import os
+import sys
+import pandas as pd
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '.')))
+
+import database as db
+import entries
+from test_database import DatabaseTestCase, scraped_row, FREESTYLE
+
+LONG = "Long Course (50m)"
+SHORT = "Short Course (25m)"
+EVENTS = [(FREESTYLE, "50 m"), (FREESTYLE, "100 m")]
+
+
+class TestSeedTimes(DatabaseTestCase):
+
+    def setUp(self):
+        super().setUp()
+        db.add_records(pd.DataFrame([
+            scraped_row("Alpha Swimmer", "00:30.00", competition="Open"),
+            scraped_row("Alpha Swimmer", "00:29.00", competition="Cup", date="15/มี.ค./2568"),
+            {**scraped_row("Alpha Swimmer", "00:26.00", competition="Short Meet"), 'Pool': SHORT},
+            scraped_row("Beta Other", "00:31.00", competition="Open"),
+        ]))
+
+    def test_roster_is_seeded_in_one_lookup(self):
+        seeded = entries.seed_entries(["alpha_swimmer", "Beta Other", "Nobody"], EVENTS, LONG)
+        self.assertEqual(seeded['Entry'].tolist(), ["alpha_swimmer"] * 2 + ["Beta Other"] * 2 + ["Nobody"] * 2)
+        self.assertEqual(seeded['SeedTime'].tolist(), ["00:29.00", "NT", "00:31.00", "NT", "NT", "NT"])
+        self.assertEqual(seeded['Competition'].iloc[0], "Cup")
+        self.assertEqual(seeded['SwimmerUniqID'].tolist()[2:4], ["beta_other"] * 2)
+        self.assertTrue(seeded['SwimmerUniqID'].iloc[4:].isna().all())
+
+        # The date window drops last season's 29.00
+        seeded = entries.seed_entries(["alpha_swimmer"], EVENTS[:1], LONG, start_date="2026-01-01")
+        self.assertEqual(seeded['SeedTime'].tolist(), ["00:30.00"])
+        seeded = entries.seed_entries(["alpha_swimmer"], EVENTS[:1], start_date="2026-01-01")
+        self.assertEqual((seeded['SeedTime'].iloc[0], seeded['Converted'].iloc[0]), ("00:26.00", False))
+
+        # Merged aliases count towards their canonical swimmer
+        db.merge_swimmers("beta_other", "alpha_swimmer")
+        seeded = entries.seed_entries(["Beta Other"], EVENTS[:1], LONG)
+        self.assertEqual((seeded['SwimmerUniqID'].iloc[0], seeded['SeedTime'].iloc[0]), ("alpha_swimmer", "00:29.00"))
+
+    def test_course_conversion(self):
+        entries.load_conversions(io.StringIO("Stroke,Distance,FromPool,ToPool,Factor\nFreeStyle,50 m,Short Course,Long Course,1.1\n"))
+        self.assertEqual(db.get_course_conversions()['FromPool'].tolist(), [SHORT])
+        seeded = entries.seed_entries(["alpha_swimmer"], EVENTS[:1], LONG)
+        self.assertEqual(seeded['SeedTime'].tolist(), ["00:29.00"])
+        seeded = entries.seed_entries(["alpha_swimmer"], EVENTS[:1], LONG, convert=True).iloc[0]
+        self.assertEqual((seeded['SeedTime'], seeded['Time'], seeded['Pool'], seeded['Converted']),
+                         ("00:28.60", "00:26.00", SHORT, True))
+        with self.assertRaises(ValueError):
+            entries.parse_conversions(pd.DataFrame([{'Stroke': "FreeStyle", 'Distance': "50 m", 'FromPool': "Short Course",
+                                                     'ToPool': "Long Course", 'Factor': "-1"}]))
+
+    def test_roster_sheet_and_entry_file(self):
+        self.assertEqual(entries.read_roster(pd.DataFrame({'No': ["1", "2"], 'Name': [" Alpha Swimmer ", None]})),
+                         ["Alpha Swimmer"])
+        target = os.path.join(self.tmpdir.name, "entries.csv")
+        self.assertEqual(entries.write_entries(target, entries.seed_entries(["Alpha Swimmer"], EVENTS, LONG)), 2)
+        self.assertEqual(pd.read_csv(target, encoding="utf-8-sig")['SeedTime'].tolist(), ["00:29.00", "NT"])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,71 @@
+import unittest
+import contextlib
+import io
+import os
+import sys
+import pandas as pd
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '.')))
+
+import database as db
+import export
+from test_database import DatabaseTestCase, scraped_row, BOY
+
+
+class TestStreamingExport(DatabaseTestCase):
+
+    def setUp(self):
+        super().setUp()
+        db.add_records(pd.DataFrame([
+            scraped_row("Alpha Swimmer", "00:34.18"),
+            scraped_row("เด็กหญิง ทดสอบ", "00:36.02", age="10-11"),
+            scraped_row("Somchai Jaidee", "01:02.50", gender=BOY, distance="100 m"),
+        ]))
+        self.filters = {'gender': "Female (หญิง)", 'stroke': "All", 'distance': "All", 'min_age': 9, 'max_age': 9,
+                        'schools': [], 'clubs': []}
+
+    def test_filter_streams_in_chunks(self):
+        chunks = list(db.iter_records({**self.filters, 'max_age': 200}, chunk_size=1))
+        self.assertEqual([len(chunk) for chunk in chunks], [1, 1])
+        self.assertEqual(db.count_records(self.filters), 1)
+        self.assertEqual(sum(len(chunk) for chunk in db.iter_records()), 3)
+
+    def test_formats_round_trip(self):
+        for fmt in export.FORMATS:
+            if not export.is_available(fmt):
+                continue
+            with self.subTest(fmt):
+                path = os.path.join(self.tmpdir.name, export.export_filename(self.filters, fmt))
+                self.assertEqual(export.export_records(path, fmt, {**self.filters, 'max_age': 200}, chunk_size=1), 2)
+                self.assertFalse(os.path.exists(path + ".tmp"))
+                if fmt == 'csv':
+                    df = pd.read_csv(path, encoding=export.CSV_ENCODING, dtype=str)
+                elif fmt == 'xlsx':
+                    df = pd.read_excel(path, dtype=str)
+                else:
+                    df = pd.read_parquet(path)
+                self.assertEqual(list(df.columns), db.EXPORT_COLUMNS)
+                self.assertEqual(sorted(df['Time']), ["00:34.18", "00:36.02"])
+                self.assertIn("เด็กหญิง ทดสอบ", set(df['Name']))
+
+    def test_download_buffer_and_empty_result(self):
+        buffer, stdout = io.BytesIO(), io.StringIO()
+        with contextlib.redirect_stdout(stdout):
+            self.assertEqual(export.export_records(buffer, 'csv', {**self.filters, 'gender': "Nobody"}), 0)
+        self.assertEqual(stdout.getvalue(), "")
+        self.assertEqual(buffer.getvalue().decode(export.CSV_ENCODING).strip(), ",".join(db.EXPORT_COLUMNS))
+
+    def test_excel_continues_on_new_sheet(self):
+        limit = export.EXCEL_MAX_ROWS
+        export.EXCEL_MAX_ROWS = 3
+        try:
+            buffer = io.BytesIO()
+            export.write(buffer, 'xlsx', ['A'], [[(1,), (2,)], [(3,)]])
+        finally:
+            export.EXCEL_MAX_ROWS = limit
+        sheets = pd.read_excel(io.BytesIO(buffer.getvalue()), sheet_name=None)
+        self.assertEqual([len(df) for df in sheets.values()], [2, 1])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,83 @@
+import unittest
+import os
+import sqlite3
+import sys
+import pandas as pd
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '.')))
+
+import parquet_store
+import database as db
+from test_database import DatabaseTestCase, scraped_row, BOY
+
+BACKSTROKE = "Backstroke (กรรเชียง)"
+
+
+@unittest.skipUnless(parquet_store.is_available(), "pyarrow is required")
+class TestParquetSnapshots(DatabaseTestCase):
+
+    def setUp(self):
+        super().setUp()
+        self._export_dir = parquet_store.EXPORT_DIR
+        parquet_store.EXPORT_DIR = os.path.join(self.tmpdir.name, "exports")
+        db.add_records(pd.DataFrame([
+            scraped_row("Alpha Swimmer", "00:30.00"),
+            scraped_row("Alpha Swimmer", "00:40.00", stroke=BACKSTROKE),
+            scraped_row("Beta Other", "00:31.00", date="15/มี.ค./2568"),
+            scraped_row("Somchai Jaidee", "00:29.00", gender=BOY, date="15/มี.ค./2568"),
+        ]))
+
+    def tearDown(self):
+        parquet_store.EXPORT_DIR = self._export_dir
+        super().tearDown()
+
+    def snapshot(self):
+        """Every exported row, in a stable order."""
+        table = parquet_store.load_records(columns=['UniqueID', 'SwimmerUniqID', 'Gender', 'Season', 'Stroke'])
+        return table.to_pandas().astype(object).sort_values('UniqueID').reset_index(drop=True)
+
+    def assert_matches_full_rebuild(self):
+        incremental = self.snapshot()
+        parquet_store.refresh_snapshots(full=True)
+        pd.testing.assert_frame_equal(incremental, self.snapshot())
+
+    def test_incremental_refresh_matches_full_rebuild(self):
+        self.assertEqual(parquet_store.refresh_snapshots(full=True), 3)
+        self.assertEqual(parquet_store.refresh_snapshots(), 0)
+
+        db.add_records(pd.DataFrame([scraped_row("Gamma Third", "00:33.00", date="15/มี.ค./2568")]))
+        self.assertEqual(parquet_store.refresh_snapshots(), 1)
+        self.assert_matches_full_rebuild()
+
+        # Re-pointing an alias moves its records to the new canonical swimmer
+        db.merge_swimmers("beta_other", "gamma_third")
+        parquet_store.refresh_snapshots()
+        with sqlite3.connect(db.DB_FILE) as conn:
+            conn.execute("UPDATE SwimmerMergeTable SET CanonicalID = 'alpha_swimmer' WHERE AliasID = 'beta_other'")
+        self.assertEqual(parquet_store.refresh_snapshots(), 1)
+        self.assert_matches_full_rebuild()
+
+        # A deleted swimmer's records stay, without the swimmer's gender
+        with sqlite3.connect(db.DB_FILE) as conn:
+            conn.execute("DELETE FROM SwimmerTable WHERE UniqID = 'somchai_jaidee'")
+        self.assertEqual(parquet_store.refresh_snapshots(), 1)
+        self.assert_matches_full_rebuild()
+        self.assertTrue(pd.isna(self.snapshot().set_index('SwimmerUniqID').loc["somchai_jaidee", 'Gender']))
+
+    def test_load_records_pushes_down_columns_and_partitions(self):
+        import pyarrow.dataset
+        parquet_store.refresh_snapshots(full=True)
+        table = parquet_store.load_records(columns=['Name', 'Time'], seasons=[2025])
+        self.assertEqual(table.column_names, ['Name', 'Time'])
+        self.assertEqual(sorted(table.column('Name').to_pylist()), ["Beta Other", "Somchai Jaidee"])
+
+        table = parquet_store.load_records(columns=['Name'], strokes=[BACKSTROKE])
+        self.assertEqual(table.column('Name').to_pylist(), ["Alpha Swimmer"])
+
+        table = parquet_store.load_records(columns=['Name'], seasons=[2026],
+                                           filter=pyarrow.dataset.field('Seconds') < 35)
+        self.assertEqual(table.column('Name').to_pylist(), ["Alpha Swimmer"])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,105 @@
+import unittest
+import os
+import sys
+from datetime import date
+import pandas as pd
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '.')))
+
+import planner
+from datawebtaa_ajax import SwimDataAjaxScraper
+from test_database import DatabaseTestCase, scraped_row
+
+YEAR = (date(2025, 1, 1), date(2025, 12, 31))
+H1 = (date(2025, 1, 1), date(2025, 6, 30))
+H2 = (date(2025, 7, 1), date(2025, 12, 31))
+
+def job(min_age, max_age, window=YEAR):
+    return {
+        'stroke': SwimDataAjaxScraper.STROKES["1"], 'dist': SwimDataAjaxScraper.DISTANCES["1"],
+        'gender': SwimDataAjaxScraper.GENDERS["2"], 'pool': SwimDataAjaxScraper.POOL_TYPES["1"],
+        'min_age': str(min_age), 'max_age': str(max_age), 'start_date': window[0], 'end_date': window[1],
+    }
+
+def requested(fetches):
+    return sorted((f['min_age'], f['max_age'], f['start_date'], f['end_date']) for f in fetches)
+
+
+class FakeScraper:
+    """Serves a fixed list of swims, ranked the way the site does: best per swimmer in the box."""
+
+    def __init__(self, swims):
+        self.swims = swims  # (name, age, date, time)
+        self.calls = []
+
+    def scrape_rankings(self, stroke, dist, gender, pool, min_age, max_age, start_date, end_date):
+        self.calls.append((min_age, max_age, start_date, end_date))
+        rows = [
+            {'Rank': 0, 'Name': name, 'Club': "Club A", 'Nationality': "ไทย", 'Time': time,
+             'Competition': f"Meet {day.month}", 'CompetitionDate': f"{day.day:02d}/ม.ค./{day.year + 543}",
+             'Stroke': stroke['name'], 'Distance': dist['name'], 'AgeRange': f"{min_age}-{max_age}",
+             'Pool': pool['name'], 'Gender': gender['name']}
+            for name, age, day, time in self.swims
+            if int(min_age) <= age <= int(max_age) and start_date <= day <= end_date
+        ]
+        df = pd.DataFrame(rows)
+        if df.empty:
+            return df
+        return df.sort_values('Time').drop_duplicates('Name').reset_index(drop=True)
+
+
+class TestPlan(unittest.TestCase):
+
+    def test_wide_bands_are_composed_from_narrow_ones(self):
+        plan = planner.plan([job(9, 10), job(9, 9), job(10, 10)], use_stored=False)
+        self.assertEqual(requested(plan.fetches), [("10", "10", *YEAR), ("9", "9", *YEAR)])
+        self.assertEqual(len(plan.sources[0]), 2)
+
+    def test_only_the_missing_box_is_fetched(self):
+        plan = planner.plan([job(9, 9, H1), job(9, 9)], use_stored=False)
+        self.assertEqual(requested(plan.fetches), [("9", "9", *H1), ("9", "9", *H2)])
+
+    def test_overlapping_bands_are_fetched_as_asked(self):
+        plan = planner.plan([job(9, 10), job(10, 11), job(9, 10)], use_stored=False)
+        self.assertEqual(requested(plan.fetches), [("10", "11", *YEAR), ("9", "10", *YEAR)])
+
+
+class TestRun(DatabaseTestCase):
+
+    SWIMS = [
+        ("Alpha Swimmer", 9, date(2025, 1, 10), "00:31.00"),
+        ("Alpha Swimmer", 9, date(2025, 1, 20), "00:30.00"),
+        ("Beta Other", 10, date(2025, 1, 15), "00:29.50"),
+        ("Gamma Third", 10, date(2025, 1, 25), "00:32.00"),
+    ]
+
+    def test_composed_results_match_a_direct_scrape(self):
+        scraper = FakeScraper(self.SWIMS)
+        results, fetched = planner.run([job(9, 9), job(10, 10), job(9, 10)], scraper)
+        self.assertEqual(len(fetched), 2)
+        direct = FakeScraper(self.SWIMS).scrape_rankings(**job(9, 10))
+        self.assertEqual(list(zip(results[2]['Name'], results[2]['Time'])), list(zip(direct['Name'], direct['Time'])))
+        self.assertEqual(results[2]['Rank'].tolist(), [1, 2, 3])
+
+    def test_stored_coverage_saves_requests(self):
+        planner.run([job(9, 9), job(10, 10)], FakeScraper(self.SWIMS), ingest=True)
+        scraper = FakeScraper(self.SWIMS)
+        results, fetched = planner.run([job(9, 10)], scraper, ingest=True)
+        self.assertEqual(scraper.calls, [])
+        self.assertEqual(results[0]['Time'].tolist(), ["00:29.50", "00:30.00", "00:32.00"])
+
+    def test_best_per_swimmer_keeps_namesakes_apart_and_joins_spellings(self):
+        nines = pd.DataFrame([scraped_row("Somchai Jaidee", "00:30.00", age="9-9"),
+                              scraped_row("อัยย์ คิโดะ", "00:33.00", age="9-9")])
+        tens = pd.DataFrame([scraped_row("Somchai Jaidee", "00:31.00", club="Club B", age="10-10"),
+                             scraped_row("อัยย์  คิโดะ", "00:32.00", age="10-10")])
+        result = planner.best_per_swimmer([nines, tens], job(9, 10))
+        self.assertEqual(list(zip(result['Name'], result['Club'], result['Time'])), [
+            ("Somchai Jaidee", "Club A", "00:30.00"),
+            ("Somchai Jaidee", "Club B", "00:31.00"),
+            ("อัยย์  คิโดะ", "Club A", "00:32.00"),
+        ])
+
+
+if __name__ == '__main__':
+    unittest.main()
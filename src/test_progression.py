@@ -0,0 +1,61 @@
+import unittest
+import os
+import sys
+import pandas as pd
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '.')))
+
+import database as db
+import progression
+from test_database import DatabaseTestCase, scraped_row
+
+
+class TestProgression(DatabaseTestCase):
+
+    def setUp(self):
+        super().setUp()
+        db.add_records(pd.DataFrame([
+            scraped_row("Alpha Swimmer", "00:35.00", competition="Jan", date="10/ม.ค./2569"),
+            scraped_row("Alpha Swimmer", "00:34.00", competition="Feb", date="10/ก.พ./2569"),
+            scraped_row("Alpha Swimmer", "00:34.60", competition="Mar", date="10/มี.ค./2569"),
+            scraped_row("Beta Other", "00:40.00", competition="Jan", date="10/ม.ค./2569"),
+        ]))
+        progression.refresh_progression()
+
+    def test_personal_best_improvement_and_trend(self):
+        df = db.get_progression("alpha_swimmer")
+        self.assertEqual(df['Swim'].tolist(), [1, 2, 3])
+        self.assertEqual(df['Competition'].tolist(), ["Jan", "Feb", "Mar"])
+        self.assertEqual(df['BestTime'].tolist(), ["00:35.00", "00:34.00", "00:34.00"])
+        self.assertEqual(df['IsPB'].tolist(), [True, True, False])
+        self.assertEqual(df['Improvement'].tolist()[1:], [1.0, 0.0])
+        self.assertEqual(df['Delta'].tolist()[1:], [-1.0, 0.6])
+        self.assertAlmostEqual(df['Trend'].iloc[-1], 34.53)
+
+        bests = progression.personal_bests(df).iloc[0]
+        self.assertEqual((bests['Swims'], bests['BestTime'], bests['PBDate']), (3, "00:34.00", "2026-02-10"))
+
+    def test_refresh_rebuilds_only_touched_swimmers(self):
+        self.assertEqual(progression.refresh_progression(), 0)
+        db.add_records(pd.DataFrame([scraped_row("Alpha Swimmer", "00:33.00", competition="Apr", date="10/เม.ย./2569")]))
+        self.assertEqual(progression.refresh_progression(), 1)
+        df = db.get_progression("alpha_swimmer")
+        self.assertEqual((df['BestTime'].iloc[-1], df['Improvement'].iloc[-1]), ("00:33.00", 1.0))
+
+        db.delete_records([int(df['UniqueID'].iloc[0])])
+        progression.refresh_progression()
+        self.assertEqual(db.get_progression("alpha_swimmer")['Competition'].tolist(), ["Feb", "Mar", "Apr"])
+
+        # A merge moves the alias's swims into the canonical swimmer's series
+        db.merge_swimmers("beta_other", "alpha_swimmer")
+        progression.refresh_progression()
+        self.assertEqual(len(db.get_progression("beta_other")), 4)
+        self.assertEqual(self.query("SELECT COUNT(*) FROM ProgressionTable WHERE SwimmerUniqID = 'beta_other'"), [(0,)])
+
+        before = db.get_progression("alpha_swimmer")
+        progression.refresh_progression(full=True)
+        pd.testing.assert_frame_equal(before, db.get_progression("alpha_swimmer"))
+
+
+if __name__ == '__main__':
+    unittest.main()
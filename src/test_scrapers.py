@@ -0,0 +1,31 @@
+import unittest
+import os
+import subprocess
+import sys
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '.')))
+
+import events
+import scrapers
+
+
+class TestScraperRegistry(unittest.TestCase):
+
+    def test_registry_imports_backends_on_demand(self):
+        code = ("import sys, events, scrapers; print(any(m.split('.')[0] in ('requests', 'selenium', 'datawebtaa', "
+                "'datawebtaa_ajax') for m in sys.modules))")
+        result = subprocess.run([sys.executable, "-c", code], cwd=os.path.dirname(os.path.abspath(__file__)),
+                                capture_output=True, text=True, check=True)
+        self.assertEqual(result.stdout.strip(), "False")
+
+    def test_backend_by_name(self):
+        cls = scrapers.get_scraper_class("AJAX")
+        self.assertEqual(cls.__name__, "SwimDataAjaxScraper")
+        # The class attributes are the shared tables, not copies
+        self.assertIs(cls.STROKES, events.STROKES)
+        with self.assertRaises(ValueError):
+            scrapers.get_scraper_class("carrier-pigeon")
+
+
+if __name__ == '__main__':
+    unittest.main()
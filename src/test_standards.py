@@ -0,0 +1,90 @@
+import unittest
+import os
+import sys
+import io
+import json
+from datetime import date
+import pandas as pd
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '.')))
+
+import database as db
+import standards
+from datawebtaa_ajax import SwimDataAjaxScraper
+from test_database import DatabaseTestCase, scraped_row, FREESTYLE, GIRL
+from test_datawebtaa_ajax import FakeSession
+
+STANDARDS_CSV = """Standard,Stroke,Distance,Gender,Pool,MinAge,MaxAge,CutTime
+Regional,FreeStyle,50 m,Female,Long Course,9,10,00:32.00
+National,FreeStyle,50 m,Female,Long Course,9,10,00:30.50
+"""
+
+
+class TestStandards(DatabaseTestCase):
+
+    def qualified(self, standard):
+        return dict(zip(*[db.get_qualifications(standard)[col] for col in ('Name', 'Time')]))
+
+    def test_parse_normalizes_names_and_times(self):
+        parsed = standards.parse_standards(pd.read_csv(io.StringIO(STANDARDS_CSV.replace("00:30.50", "0:30.50")), dtype=str))
+        self.assertEqual(parsed['Stroke'].tolist(), [FREESTYLE] * 2)
+        self.assertEqual(parsed['Gender'].tolist(), [GIRL] * 2)
+        self.assertEqual(parsed['CutTime'].tolist(), ["00:32.00", "00:30.50"])
+        with self.assertRaises(ValueError):
+            standards.parse_standards(pd.read_csv(io.StringIO(STANDARDS_CSV.replace("Female", "Girls")), dtype=str))
+
+    def test_cache_follows_ingest_edits_and_merges(self):
+        db.add_records(pd.DataFrame([
+            scraped_row("Alpha Swimmer", "00:31.00", competition="Open"),
+            scraped_row("Alpha Swimmer", "00:30.00", competition="Cup"),
+            scraped_row("Beta Other", "00:33.00"),
+            scraped_row("Gamma Older", "00:29.00", age="13-13"),
+        ]))
+        self.assertEqual(standards.load_standards(io.StringIO(STANDARDS_CSV)), 2)
+        self.assertEqual(self.qualified("Regional"), {"Alpha Swimmer": "00:30.00"})
+        self.assertEqual(self.qualified("National"), {"Alpha Swimmer": "00:30.00"})
+        self.assertEqual(standards.refresh_qualifications(), 0)
+
+        # A new fast swim only re-evaluates its own swimmer
+        db.add_records(pd.DataFrame([scraped_row("Beta Other", "00:31.90", competition="Cup")]))
+        self.assertEqual(standards.refresh_qualifications(), 1)
+        self.assertEqual(self.qualified("Regional"), {"Alpha Swimmer": "00:30.00", "Beta Other": "00:31.90"})
+
+        # Deleting a best swim falls back to the next one
+        records = db.get_records(compact=False)
+        db.delete_records(records.loc[records['Time'] == "00:30.00", 'UniqueID'].tolist())
+        standards.refresh_qualifications()
+        self.assertEqual(self.qualified("Regional")["Alpha Swimmer"], "00:31.00")
+        self.assertEqual(self.qualified("National"), {})
+
+        # A merge moves the alias's qualifications onto the canonical swimmer
+        db.merge_swimmers("beta_other", "alpha_swimmer")
+        standards.refresh_qualifications()
+        self.assertEqual(db.get_qualifications("Regional")['SwimmerUniqID'].tolist(), ["alpha_swimmer"])
+        self.assertEqual(self.qualified("Regional")["Alpha Swimmer"], "00:31.00")
+
+        full = db.get_qualifications()
+        standards.refresh_qualifications(full=True)
+        pd.testing.assert_frame_equal(db.get_qualifications(), full)
+
+    def test_site_qualifiers_are_fetched_under_the_cut_and_saved(self):
+        standards.load_standards(io.StringIO(STANDARDS_CSV))
+        national = db.get_standards().set_index('Standard').loc["National"]
+        scraper = SwimDataAjaxScraper()
+        scraper.session = FakeSession({'data': [
+            {'Place': 1, 'FullName': "Alpha Swimmer", 'ClubName': "Club A", 'Nation': "ไทย", 'Time': "00:30.10",
+             'Competition': {'Name': "Open", 'StartDayString': "31/ม.ค./2569"}},
+        ]})
+        df = standards.fetch_qualifiers(scraper, national, date(2026, 1, 1), date(2026, 12, 31))
+        sent = json.loads(scraper.session.posted[0]['CompetitionEvent'])
+        self.assertEqual((sent['TimestdF'], sent['AgeMin'], sent['AgeMax']), ("00:30.50", "9", "10"))
+        self.assertEqual((df['Stroke'].iloc[0], df['Gender'].iloc[0]), (FREESTYLE, GIRL))
+
+        self.assertEqual(standards.save_qualifiers(df), 1)
+        self.assertEqual(self.qualified("National"), {"Alpha Swimmer": "00:30.10"})
+        # Places among the swims under a cut are not stored as a ranking
+        self.assertEqual(self.query("SELECT COUNT(*) FROM RankingSnapshotTable"), [(0,)])
+
+
+if __name__ == '__main__':
+    unittest.main()
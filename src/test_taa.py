@@ -0,0 +1,106 @@
+import unittest
+import io
+import json
+import os
+import subprocess
+import sys
+from datetime import date
+import pandas as pd
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '.')))
+
+import taa
+import parquet_store
+from test_database import DatabaseTestCase, scraped_row, BOY, FREESTYLE, GIRL
+
+
+class TestJobMatrix(unittest.TestCase):
+
+    def test_matrix_expands_every_combination(self):
+        jobs = taa.expand_jobs({
+            'strokes': ["FreeStyle", "2"], 'distances': ["50 m"], 'genders': ["Female (หญิง)", "Male"],
+            'pools': ["1"], 'ages': [[9, 9], [10, 11]], 'start_date': "2025-01-01", 'end_date': "2025-12-31",
+        })
+        self.assertEqual(len(jobs), 8)
+        self.assertEqual(jobs[0]['stroke']['id'], "2")
+        self.assertEqual(jobs[-1]['stroke']['name'], "Backstroke (กรรเชียง)")
+        self.assertEqual((jobs[-1]['min_age'], jobs[-1]['max_age']), ("10", "11"))
+        self.assertEqual(jobs[0]['start_date'], date(2025, 1, 1))
+
+    def test_unknown_option_is_rejected(self):
+        with self.assertRaises(ValueError):
+            taa.expand_jobs([{'stroke': "Sidestroke", 'distance': "50 m", 'gender': "1", 'min_age': 9, 'max_age': 9}])
+
+    def test_cli_does_not_import_streamlit_or_selenium(self):
+        code = "import sys, taa; print(any(m.split('.')[0] in ('streamlit', 'selenium') for m in sys.modules))"
+        result = subprocess.run([sys.executable, "-c", code], cwd=os.path.dirname(os.path.abspath(__file__)),
+                                capture_output=True, text=True, check=True)
+        self.assertEqual(result.stdout.strip(), "False")
+
+
+class TestIngestExport(DatabaseTestCase):
+
+    def setUp(self):
+        super().setUp()
+        self._export_dir = parquet_store.EXPORT_DIR
+        parquet_store.EXPORT_DIR = os.path.join(self.tmpdir.name, "exports")
+
+    def tearDown(self):
+        parquet_store.EXPORT_DIR = self._export_dir
+        super().tearDown()
+
+    def test_ndjson_round_trip(self):
+        source = os.path.join(self.tmpdir.name, "scraped.ndjson")
+        pd.DataFrame([
+            scraped_row("Alpha Swimmer", "00:34.18"),
+            scraped_row("Somchai Jaidee", "01:02.50", gender=BOY, distance="100 m"),
+        ]).to_json(source, orient='records', lines=True, force_ascii=False)
+
+        out = io.StringIO()
+        self.assertEqual(self.run_cli(["ingest", source], out), 0)
+        self.assertEqual(json.loads(out.getvalue()), {'status': "ok", 'rows': 2, 'added': 2})
+
+        out = io.StringIO()
+        self.assertEqual(self.run_cli(["export"], out), 0)
+        exported = [json.loads(line) for line in out.getvalue().splitlines()]
+        self.assertEqual(sorted(r['Time'] for r in exported), ["00:34.18", "01:02.50"])
+        self.assertEqual({r['CompetitionDate'] for r in exported}, {"31/ม.ค./2569"})
+
+        out = io.StringIO()
+        self.assertEqual(self.run_cli(["changes", "--table", "RecordTable"], out), 0)
+        changes = [json.loads(line) for line in out.getvalue().splitlines()]
+        self.assertEqual(sorted(c['RowKey'] for c in changes), sorted(r['UniqueID'] for r in exported))
+
+        out = io.StringIO()
+        target = os.path.join(self.tmpdir.name, "boys.csv")
+        self.assertEqual(self.run_cli(["export", "--format", "csv", "--gender", "Male", "--output", target], out), 0)
+        self.assertEqual(json.loads(out.getvalue())['rows'], 1)
+        self.assertEqual(pd.read_csv(target, encoding="utf-8-sig")['Time'].tolist(), ["01:02.50"])
+
+    def test_ranking_split_across_chunks_is_one_snapshot(self):
+        source = os.path.join(self.tmpdir.name, "ranking.ndjson")
+        names = ["Alpha Swimmer", "Beta Other", "Gamma Third", "Delta Fourth"]
+        rows = [{**scraped_row(name, f"00:{30 + place}.00"), 'Rank': place} for place, name in enumerate(names, start=1)]
+        pd.DataFrame(rows).to_json(source, orient='records', lines=True, force_ascii=False)
+
+        chunksize = taa.INGEST_CHUNKSIZE
+        taa.INGEST_CHUNKSIZE = 2
+        try:
+            self.assertEqual(self.run_cli(["ingest", source], io.StringIO()), 0)
+        finally:
+            taa.INGEST_CHUNKSIZE = chunksize
+        event = (FREESTYLE, "50 m", GIRL, "Long Course (50m)", "9-9")
+        self.assertEqual(len(taa.db.get_ranking_snapshots(*event)), 1)
+        self.assertEqual(taa.db.get_ranking_snapshot(*event)['Name'].tolist(), names)
+
+    def run_cli(self, argv, out):
+        stdout = sys.stdout
+        sys.stdout = out
+        try:
+            return taa.main(["--db", taa.db.DB_FILE] + argv)
+        finally:
+            sys.stdout = stdout
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,62 @@
+import unittest
+import os
+import sys
+import pandas as pd
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '.')))
+
+import database as db
+import teams
+from test_database import DatabaseTestCase, scraped_row, GIRL
+
+SATIT = "สาธิตเกษตร"
+
+
+class TestTeamCube(DatabaseTestCase):
+
+    def setUp(self):
+        super().setUp()
+        db.add_records(pd.DataFrame([
+            scraped_row("Alpha Swimmer", "00:34.18", club="Club A"),
+            scraped_row("Alpha Swimmer", "00:33.50", club="Club A", competition="Winter"),
+            scraped_row("Beta Swimmer", "00:36.00", club="Club A"),
+            scraped_row("Gamma Swimmer", "00:31.00", club="Club B"),
+            scraped_row("Gamma Swimmer", "00:40.00", club="Club B", date="15/มี.ค./2568"),
+        ]))
+        self.set_school({"Alpha Swimmer": SATIT, "Beta Swimmer": SATIT, "Gamma Swimmer": "Other School"})
+        teams.refresh_cube()
+
+    def set_school(self, schools: dict):
+        swimmers = db.get_swimmers(compact=False)
+        swimmers['School'] = swimmers['Name'].map(schools).fillna(swimmers['School'])
+        db.sync_swimmers(swimmers)
+
+    def test_cube_aggregates_per_team_and_season(self):
+        cube = db.get_team_cube('club', season=2026)
+        self.assertEqual(cube['Team'].tolist(), ["Club B", "Club A"])
+        club_a = cube[cube['Team'] == "Club A"].iloc[0]
+        self.assertEqual((club_a['Records'], club_a['Swimmers'], club_a['BestTime']), (3, 2, "00:33.50"))
+        self.assertAlmostEqual(club_a['MedianSeconds'], 34.18)
+        self.assertEqual((club_a['Gender'], club_a['AgeBand']), (GIRL, "9"))
+        self.assertEqual(db.get_team_cube('club', season=2025)['Records'].tolist(), [1])
+
+    def test_satit_filter_and_incremental_refresh(self):
+        self.assertEqual(db.get_team_cube('school', satit_only=True)['Team'].tolist(), [SATIT])
+        self.assertEqual(teams.refresh_cube(), 0)
+
+        # Moving a swimmer dirties only the slices holding their records
+        self.set_school({"Gamma Swimmer": SATIT})
+        self.assertEqual(teams.refresh_cube(), 2)
+        satit = db.get_team_cube('school', season=2026, satit_only=True).iloc[0]
+        self.assertEqual((satit['Records'], satit['Swimmers'], satit['BestTime']), (4, 3, "00:31.00"))
+        self.assertTrue(satit['SatitGame'])
+        self.assertTrue(db.get_team_cube('school', teams=["Other School"]).empty)
+
+        # A full rebuild gives the same cube
+        before = db.get_team_cube('school')
+        teams.refresh_cube(full=True)
+        pd.testing.assert_frame_equal(before, db.get_team_cube('school'))
+
+
+if __name__ == '__main__':
+    unittest.main()